@@ -0,0 +1,45 @@
+"""YOLO throughput on a synthetic image folder."""
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("ultralytics")
+
+from traffic_sim.detection import load_model, process_image_with_yolo
+
+N_IMAGES = 16
+MODEL_PATH = os.environ.get("TRAFFIC_SIM_BENCH_MODEL", "yolov8n.pt")
+
+
+@pytest.fixture(scope="module")
+def image_dir(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("traffic_images")
+    rng = np.random.default_rng(0)
+    for i in range(N_IMAGES):
+        image = rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8)
+        cv2.imwrite(str(folder / f"{i}.jpg"), image)
+    return sorted(str(p) for p in folder.iterdir())
+
+
+@pytest.fixture(scope="module")
+def model():
+    model = load_model(MODEL_PATH)
+    if model is None:
+        pytest.skip(f"could not load {MODEL_PATH}")
+    return model
+
+
+@pytest.mark.benchmark(group="detector")
+def bench_yolo_images_per_second(benchmark, model, image_dir):
+    process_image_with_yolo(model, image_dir[0])  # warm-up outside the timing
+
+    def process_folder():
+        for path in image_dir:
+            process_image_with_yolo(model, path)
+
+    benchmark.pedantic(process_folder, rounds=3)
+    # No timings are collected under --benchmark-disable
+    if benchmark.stats:
+        benchmark.extra_info["images_per_second"] = len(image_dir) / benchmark.stats.stats.mean
@@ -0,0 +1,98 @@
+"""Engine hot paths: car movement, spawning, planning and end-to-end speed."""
+import pytest
+
+from traffic_sim.engine import Simulation
+from traffic_sim.movements import PHASE_PLANS
+from traffic_sim.planner import get_phase_durations, get_signal_durations
+from traffic_sim.sources import RandomSource
+
+from helpers import fill_pools, make_sim, populate
+
+SIM_SECONDS = 60.0
+
+
+@pytest.mark.benchmark(group="move_cars")
+@pytest.mark.parametrize("n_cars", [10, 100, 1000])
+def bench_move_cars(benchmark, n_cars):
+    def setup():
+        return (populate(make_sim(), n_cars),), {}
+
+    benchmark.pedantic(lambda sim: sim.move_cars(), setup=setup, rounds=50)
+
+
+@pytest.mark.benchmark(group="attempt_to_spawn_car")
+@pytest.mark.parametrize("pool_size", [20, 200, 2000])
+def bench_attempt_to_spawn_car(benchmark, pool_size):
+    sim = fill_pools(make_sim(), pool_size)
+    spare = [car for free in sim.free_cars.values() for car in free]
+
+    def setup():
+        # Return the cars admitted last round
+        for car in spare:
+            if car.is_active:
+                sim._deactivate(car)
+        # One arrival waiting upstream per lane; taking a free car should not depend on pool size
+        for lane_name in sim.car_pool:
+            sim.upstream[lane_name].append(sim.sim_time)
+            sim.backlog[lane_name] = None
+        return (), {}
+
+    benchmark.pedantic(sim.attempt_to_spawn_car, setup=setup, rounds=200)
+
+
+@pytest.mark.benchmark(group="planner")
+def bench_get_signal_durations(benchmark):
+    counts = {"North": 42, "South": 17, "East": 88, "West": 5}
+    benchmark(get_signal_durations, counts, "Morning")
+
+
+@pytest.mark.benchmark(group="planner")
+def bench_get_signal_durations_with_arrival_rates(benchmark):
+    counts = {"North": 42, "South": 17, "East": 88, "West": 5}
+    rates = {"North": 12.0, "South": 30.0, "East": 4.5, "West": 9.0}
+    benchmark(get_signal_durations, counts, "Normal", rates)
+
+
+@pytest.mark.benchmark(group="planner")
+def bench_get_phase_durations(benchmark):
+    counts = {"North": 42, "South": 17, "East": 88, "West": 5}
+    benchmark(get_phase_durations, PHASE_PLANS["protected_left"], counts, "Morning")
+
+
+@pytest.mark.benchmark(group="snapshot")
+def bench_snapshot(benchmark):
+    sim = populate(make_sim(), 200)
+    benchmark(sim.snapshot)
+
+
+@pytest.mark.benchmark(group="snapshot")
+def bench_restore(benchmark):
+    sim = populate(make_sim(), 200)
+    state = sim.snapshot()
+    benchmark(sim.restore, state)
+
+
+@pytest.mark.benchmark(group="snapshot")
+def bench_checkpoint_dumps(benchmark):
+    checkpoint = pytest.importorskip("traffic_sim.checkpoint")
+    sim = populate(make_sim(), 200)
+    benchmark(checkpoint.dumps, sim)
+
+
+@pytest.mark.benchmark(group="snapshot")
+def bench_checkpoint_loads(benchmark):
+    checkpoint = pytest.importorskip("traffic_sim.checkpoint")
+    sim = populate(make_sim(), 200)
+    data = checkpoint.dumps(sim)
+    benchmark(checkpoint.loads, sim, data)
+
+
+@pytest.mark.benchmark(group="end_to_end")
+def bench_simulated_seconds_per_wall_second(benchmark):
+    def setup():
+        return (Simulation(RandomSource(), seed=1),), {}
+
+    benchmark.pedantic(lambda sim: sim.run(SIM_SECONDS), setup=setup, rounds=5)
+    # No timings are collected under --benchmark-disable
+    if benchmark.stats:
+        benchmark.extra_info["sim_seconds_per_wall_second"] = SIM_SECONDS / benchmark.stats.stats.mean
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Run from the repository root: python -m pytest benchmarks
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
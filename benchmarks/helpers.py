@@ -0,0 +1,37 @@
+"""Builders for simulations in a known state."""
+from traffic_sim import DIRECTIONS
+from traffic_sim.engine import Simulation
+from traffic_sim.sources import RandomSource
+
+
+def make_sim(seed=0):
+    """An empty simulation in its first phase, so only the cars a benchmark adds are on the road."""
+    sim = Simulation(RandomSource(), seed=seed)
+    sim.current_traffic_counts = {d: 50 for d in DIRECTIONS}
+    sim._set_phase(0)
+    return sim
+
+
+def populate(sim, n_cars):
+    """Queue ``n_cars`` spread evenly over all lanes; the pools grow as needed."""
+    lanes = list(sim.car_pool)
+    for index, lane_name in enumerate(lanes):
+        per_lane = n_cars // len(lanes) + (index < n_cars % len(lanes))
+        for i in range(per_lane):
+            sim._activate(sim._take_car(lane_name), *sim.geometry.queue_position(lane_name, i))
+    return sim
+
+
+def fill_pools(sim, pool_size):
+    """Spawn ``pool_size`` cars per lane through the engine and free one, leaving one free car per lane.
+
+    The cars are parked at the stop line, so the lane entries stay clear.
+    Pools start at ``max_cars_per_lane``, so smaller sizes keep more free cars.
+    """
+    for lane_name in sim.car_pool:
+        for _ in range(pool_size):
+            car = sim._take_car(lane_name)
+            sim._activate(car)
+            car.advance(car.stop - car.s)
+        sim._deactivate(sim.active_cars[lane_name][-1])
+    return sim
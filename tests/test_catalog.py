@@ -0,0 +1,49 @@
+from traffic_sim.catalog import Frame, FrameCatalog
+from traffic_sim.detection import fuse_counts
+
+
+def frame(timestamp, camera, direction="North"):
+    return Frame(timestamp, direction, f"{camera}_{timestamp}.jpg", camera)
+
+
+def test_snapshots_group_one_frame_per_camera_within_tolerance():
+    catalog = FrameCatalog([
+        frame(1.2, "b"), frame(0.0, "a"), frame(5.0, "a"), frame(0.4, "b"),
+        frame(1.0, "a"), frame(1.5, "b"), frame(0.2, "a", direction="South"),
+    ])
+    groups = [[(f.camera, f.timestamp) for f in group] for group in catalog.snapshots("North", tolerance=1.0)]
+    assert groups == [
+        [("a", 0.0), ("b", 0.4)],
+        [("a", 1.0), ("b", 1.2)],
+        [("b", 1.5)],
+        [("a", 5.0)],
+    ]
+    assert catalog.cameras("North") == ["a", "b"]
+
+
+def test_single_camera_snapshots_are_single_frames():
+    catalog = FrameCatalog([frame(t, "") for t in (0.0, 0.1, 0.2)])
+    assert [len(group) for group in catalog.snapshots("North")] == [1, 1, 1]
+    assert catalog.snapshots("East") == []
+
+
+def test_frame_lookups_by_time_and_camera():
+    catalog = FrameCatalog([frame(0.0, "a"), frame(0.4, "b"), frame(1.0, "a")])
+    assert catalog.next_frame("North").timestamp == 0.0
+    assert catalog.next_frame("North", after=0.0).timestamp == 0.4
+    assert catalog.next_frame("North", after=0.0, camera="a").timestamp == 1.0
+    assert catalog.next_frame("North", after=1.0) is None
+    assert catalog.latest_frame("North", 0.9).timestamp == 0.4
+    assert catalog.latest_frame("North", 0.9, camera="a").timestamp == 0.0
+    assert catalog.latest_frame("North", -1.0) is None
+
+
+def test_fuse_counts_by_overlap():
+    assert fuse_counts([3, 5]) == 5
+    assert fuse_counts([3, 5], overlap=0.0) == 8
+    assert fuse_counts([4, 6], overlap=0.5) == 8
+
+
+def test_fuse_counts_skips_failed_cameras():
+    assert fuse_counts([None, 4, 2], overlap=0.0) == 6
+    assert fuse_counts([None, None]) is None
@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from traffic_sim import checkpoint
+from traffic_sim.config import SimConfig
+from traffic_sim.engine import Simulation
+from traffic_sim.reports import build_report
+from traffic_sim.sources import RandomSource
+
+
+def make_sim(config):
+    return Simulation(RandomSource(), seed=3, config=config)
+
+
+@pytest.mark.parametrize("phase_plan", ["split", "protected_left"])
+def test_resumed_run_matches_uninterrupted(phase_plan):
+    config = SimConfig(phase_plan=phase_plan)
+    uninterrupted = make_sim(config)
+    uninterrupted.run(400)
+
+    first = make_sim(config)
+    first.run(170)
+    resumed = make_sim(config)
+    checkpoint.loads(resumed, checkpoint.dumps(first))
+    resumed.run(230)
+
+    assert build_report(resumed) == build_report(uninterrupted)
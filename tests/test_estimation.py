@@ -0,0 +1,56 @@
+from traffic_sim.estimation import CountEstimator
+
+
+class FlatProfile:
+    def rate(self, direction, time_of_day):
+        return 0.1
+
+
+def test_counts_are_smoothed():
+    estimator = CountEstimator(alpha=0.5)
+    assert estimator.update("North", 10) == 10
+    assert estimator.update("North", 12) == 11
+    assert estimator.mean["North"] == 11.0
+    assert estimator.var["North"] == 1.0
+
+
+def test_outliers_are_ignored_until_they_persist():
+    estimator = CountEstimator(alpha=0.5, outlier_sigma=3.0, max_rejections=3)
+    estimator.update("North", 10)
+    estimator.update("North", 12)
+    assert estimator.update("North", 40) == 11
+    assert estimator.update("North", 40) == 11
+    # The third rejection in a row means traffic really changed
+    assert estimator.update("North", 40) == 40
+    assert estimator.update("North", 41) == 40
+
+
+def test_poisson_floor_keeps_small_changes_in():
+    estimator = CountEstimator(alpha=0.5)
+    for _ in range(10):
+        estimator.update("North", 9)
+    assert estimator.var["North"] == 0.0
+    # sqrt(9) = 3, so a change of 6 is within three deviations
+    assert estimator.update("North", 15) == 12
+
+
+def test_failed_detection_falls_back_and_marks_direction_degraded():
+    estimator = CountEstimator(profile=FlatProfile(), window_seconds=150)
+    assert estimator.update("North", None, time_of_day=8 * 3600) == 15
+    assert estimator.degraded["North"]
+    assert estimator.update("North", None) is None
+
+    estimator.update("North", 7)
+    assert not estimator.degraded["North"]
+    assert estimator.update("North", None, time_of_day=8 * 3600) == 7
+    assert estimator.degraded["North"]
+
+
+def test_state_round_trips():
+    estimator = CountEstimator()
+    for count in (4, 6, 5, None):
+        estimator.update("East", count)
+    restored = CountEstimator()
+    restored.set_state(estimator.get_state())
+    assert restored.update("East", 5) == estimator.update("East", 5)
+    assert restored.degraded == estimator.degraded
@@ -0,0 +1,42 @@
+import pytest
+
+from traffic_sim.inference import InferenceScheduler
+
+
+def test_never_inferred_directions_go_first_soonest_needed_first():
+    scheduler = InferenceScheduler(max_per_second=2.0)
+    needed_in = {"North": 5.0, "South": 1.0}
+    assert scheduler.choose(0.0, needed_in) == "South"
+    assert scheduler.choose(0.0, needed_in) == "North"
+
+
+def test_requests_over_budget_are_dropped():
+    scheduler = InferenceScheduler(max_per_second=2.0)
+    needed_in = {"North": 5.0, "South": 1.0}
+    scheduler.choose(0.0, needed_in)
+    scheduler.choose(0.0, needed_in)
+    assert scheduler.choose(0.0, needed_in) is None
+    assert scheduler.choose(0.4, needed_in) is None
+    # Half a second refills one token; South has waited longest relative to its need
+    assert scheduler.choose(0.5, needed_in) == "South"
+    assert scheduler.choose(0.5, needed_in) is None
+
+
+def test_rate_is_capped_over_time():
+    scheduler = InferenceScheduler(max_per_second=2.0)
+    needed_in = {"North": 0.0, "South": 0.0, "East": 0.0, "West": 0.0}
+    chosen = [scheduler.choose(step * 0.1, needed_in) for step in range(101)]
+    # The initial burst of two, then two per second for ten seconds
+    assert sum(d is not None for d in chosen) == 22
+
+
+def test_candidates_limit_the_choice():
+    scheduler = InferenceScheduler()
+    needed_in = {"North": 1.0, "South": 1.0}
+    assert scheduler.choose(0.0, needed_in, candidates=["North"]) == "North"
+    assert scheduler.choose(0.0, needed_in, candidates=[]) is None
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        InferenceScheduler(max_per_second=0)
@@ -0,0 +1,68 @@
+import pytest
+
+from traffic_sim.config import SimConfig
+from traffic_sim.engine import Simulation
+from traffic_sim.movements import PHASE_PLANS
+from traffic_sim.signals import SignalState
+from traffic_sim.sources import RandomSource
+
+
+def make_sim(config):
+    return Simulation(RandomSource(), seed=1, config=config)
+
+
+@pytest.mark.parametrize("phase_plan", sorted(PHASE_PLANS))
+def test_builtin_phase_plans_are_valid(phase_plan):
+    make_sim(SimConfig(phase_plan=phase_plan))
+
+
+@pytest.mark.parametrize("heads", [
+    ("North", "East"),
+    ("North", "South_left"),
+    ("North_left", "South"),
+])
+def test_conflicting_heads_in_one_phase_are_rejected(heads):
+    config = SimConfig(phase_groups=(("bad", heads), ("rest", ("West",))))
+    with pytest.raises(ValueError, match="conflicting movements"):
+        make_sim(config)
+
+
+def test_unknown_heads_are_rejected():
+    config = SimConfig(phase_groups=(("bad", ("North", "North_right")),))
+    with pytest.raises(ValueError, match="unknown signal heads: North_right"):
+        make_sim(config)
+
+
+def test_unknown_phase_plan_is_rejected():
+    with pytest.raises(ValueError, match="Unknown phase plan"):
+        make_sim(SimConfig(phase_plan="roundabout"))
+
+
+@pytest.mark.parametrize("phase_plan", sorted(PHASE_PLANS))
+def test_clearance_goes_yellow_then_red_before_conflicting_green(phase_plan):
+    config = SimConfig(phase_plan=phase_plan)
+    sim = make_sim(config)
+    shown = dict(sim.lights)
+    changes = []
+    sim.signal_listeners.append(lambda head, state: changes.append((sim.sim_time, head, state)))
+    sim.run(300)
+
+    phases = [set(heads) for _, heads in sim.phase_plan]
+    tick = config.tick_seconds
+    yellow_since = {}
+    for time, head, state in changes:
+        if state is SignalState.RED and head in yellow_since:
+            assert time - yellow_since.pop(head) == pytest.approx(config.yellow_seconds, abs=tick)
+        elif state is SignalState.YELLOW:
+            assert shown[head] is SignalState.GREEN
+            yellow_since[head] = time
+        else:
+            assert not (shown[head] is SignalState.GREEN and state is SignalState.RED)
+        shown[head] = state
+        green = {h for h, s in shown.items() if s is SignalState.GREEN}
+        assert any(green <= heads for heads in phases)
+
+    assert sim.clearance_times
+    for elapsed in sim.clearance_times:
+        assert config.yellow_seconds <= elapsed + 1e-9
+        assert elapsed <= config.yellow_seconds + config.max_all_red_seconds + tick
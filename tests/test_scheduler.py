@@ -0,0 +1,33 @@
+from traffic_sim.scheduler import ArrivalScheduler
+
+
+class MeanGaps:
+    """Stands in for random.Random: every exponential gap is its mean."""
+
+    def expovariate(self, rate):
+        return 1.0 / rate
+
+
+def test_arrivals_come_due_in_time_order():
+    scheduler = ArrivalScheduler(MeanGaps())
+    scheduler.set_rates(0.0, {"North_0": 1.0, "East_0": 0.5, "South_0": 0.0})
+    assert scheduler.next_due() == 1.0
+    assert scheduler.pop_due(0.5) == []
+    assert scheduler.pop_due(4.0) == ["North_0", "East_0", "North_0", "North_0", "East_0", "North_0"]
+    assert scheduler.next_due() == 5.0
+
+
+def test_set_rates_redraws_from_now():
+    scheduler = ArrivalScheduler(MeanGaps())
+    scheduler.set_rates(0.0, {"North_0": 1.0})
+    scheduler.set_rates(10.0, {"North_0": 0.25, "West_0": 0.0})
+    assert scheduler.next_due() == 14.0
+    assert scheduler.pop_due(13.9) == []
+    assert scheduler.pop_due(14.0) == ["North_0"]
+
+
+def test_no_arrivals_without_positive_rates():
+    scheduler = ArrivalScheduler(MeanGaps())
+    scheduler.set_rates(0.0, {"North_0": 0.0})
+    assert scheduler.next_due() == float("inf")
+    assert scheduler.pop_due(1e9) == []
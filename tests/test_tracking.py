@@ -0,0 +1,72 @@
+from traffic_sim.tracking import FlowMeter, LineCounter, VehicleTracker
+
+
+def box(cx, cy=50, size=20, confidence=0.9):
+    half = size / 2
+    return (cx - half, cy - half, cx + half, cy + half, confidence)
+
+
+def test_track_is_confirmed_after_min_hits():
+    tracker = VehicleTracker(min_hits=2)
+    assert tracker.update([box(50)]) == []
+    confirmed = tracker.update([box(55)])
+    assert [t.track_id for t in confirmed] == [1]
+
+
+def test_low_confidence_detection_keeps_track_alive_but_never_starts_one():
+    tracker = VehicleTracker(min_hits=1)
+    assert tracker.update([box(50, confidence=0.2)]) == []
+    assert tracker.tracks == []
+
+    tracker.update([box(50)])
+    confirmed = tracker.update([box(52, confidence=0.2)])
+    assert [t.track_id for t in confirmed] == [1]
+    assert confirmed[0].hits == 2
+
+
+def test_track_is_dropped_after_max_age():
+    tracker = VehicleTracker(max_age=2)
+    tracker.update([box(50)])
+    for _ in range(3):
+        tracker.update([])
+    assert tracker.tracks == []
+
+
+def test_track_crossing_line_counts_exactly_once():
+    tracker = VehicleTracker()
+    counter = LineCounter(((100, 0), (100, 100)))
+    crossings = 0
+    # Cross x = 100, roll back over the line and cross it again
+    for cx in (50, 60, 70, 80, 90, 98, 104, 100, 94, 92, 96, 102, 108, 116):
+        confirmed = tracker.update([box(cx, size=60)])
+        assert [t.track_id for t in confirmed] in ([], [1])
+        crossings += counter.update(confirmed)
+    assert crossings == 1
+    assert counter.total == 1
+    assert counter.counted_ids == {1}
+
+
+def test_separate_tracks_each_count_once():
+    tracker = VehicleTracker()
+    counter = LineCounter(((100, 0), (100, 200)))
+    for step in range(10):
+        counter.update(tracker.update([box(60 + 10 * step, cy=40), box(140 - 10 * step, cy=160)]))
+    assert counter.total == 2
+    assert counter.counted_ids == {1, 2}
+
+
+def test_flow_meter_uses_elapsed_time_until_window_fills():
+    meter = FlowMeter(window_seconds=60.0, start=0.0)
+    meter.record("North", 10.0)
+    meter.record("North", 20.0)
+    meter.record("North", 30.0)
+    assert meter.arrival_rate("North", 30.0) == 6.0
+
+
+def test_flow_meter_forgets_crossings_outside_window():
+    meter = FlowMeter(window_seconds=60.0)
+    meter.record("North", 10.0, count=2)
+    meter.record("North", 30.0)
+    meter.record("East", 80.0, count=3)
+    assert meter.arrival_rates(90.0) == {"North": 1.0, "East": 3.0}
+    assert meter.arrival_rate("South", 90.0) == 0.0
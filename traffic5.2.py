@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 import random
 import time
+from traffic_sim.signals import SignalState
+from traffic_sim.widgets import CanvasLights
 
 # -----------------------------
 # Global Simulation State
@@ -129,6 +131,8 @@ lights = {
     "West":  canvas.create_oval(210, 310, 240, 340, fill="red", outline="black", width=2),
 }
 
+signal_lights = CanvasLights(canvas, lights)
+
 # Car objects - will be generated dynamically
 cars = {
     "North": [],
@@ -362,7 +366,7 @@ def remove_passed_cars():
 def move_cars():
     """Moves cars based on traffic light status and position, ensuring no collisions."""
     for lane, car_list in cars.items():
-        is_green = canvas.itemcget(lights[lane], "fill") == "green"
+        is_green = signal_lights.is_green(lane)
         stop_line = stop_lines[lane]
         
         for i, car_id in enumerate(car_list):
@@ -476,7 +480,7 @@ def start_new_cycle():
     # Deactivate the previous light
     if active_lane_index != -1:
         prev_lane = lanes[active_lane_index]
-        canvas.itemconfig(lights[prev_lane], fill="red")
+        signal_lights.set(prev_lane, SignalState.RED)
 
     # Move to the next lane in sequence
     active_lane_index = (active_lane_index + 1) % len(lanes)
@@ -494,7 +498,7 @@ def start_new_cycle():
     time_left = current_durations[active_lane]
 
     # Activate the new light
-    canvas.itemconfig(lights[active_lane], fill="green")
+    signal_lights.set(active_lane, SignalState.GREEN)
     play_sound("light_change")
 
     # Update GUI Labels
@@ -546,7 +550,7 @@ def update_simulation():
         # Update dynamic labels
         if active_lane_index >= 0:
             active_lane = lanes[active_lane_index]
-            active_lane_label.config(text=active_lane, fg="green" if canvas.itemcget(lights[active_lane], "fill") == "green" else "red")
+            active_lane_label.config(text=active_lane, fg="green" if signal_lights.is_green(active_lane) else "red")
             time_left_label.config(text=f"{time_left:.1f}s")
 
     # Schedule the next update
@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk
 import random
 import time
+from traffic_sim.config import load_config
+from traffic_sim.signals import SignalState
+from traffic_sim.widgets import CanvasLights
 
 # -----------------------------
 # Global Simulation State & Constants
@@ -20,19 +23,20 @@ active_direction_sequence = ["North", "South", "East", "West"]
 active_direction_index = -1
 
 # --- Canvas and Road Constants ---
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 800
-ROAD_WIDTH = 200
-LANE_WIDTH = 50
+CONFIG = load_config()
+CANVAS_WIDTH = CONFIG.canvas_width
+CANVAS_HEIGHT = CONFIG.canvas_height
+ROAD_WIDTH = CONFIG.road_width
+LANE_WIDTH = CONFIG.lane_width
 CENTER = CANVAS_WIDTH / 2
 INTERSECTION_START = CENTER - (ROAD_WIDTH / 2)
 INTERSECTION_END = CENTER + (ROAD_WIDTH / 2)
-STOP_LINE_MARGIN = 15
-CAR_LENGTH = 30
-CAR_WIDTH = 20
-SAFE_DISTANCE = 15
-MAX_CARS_PER_LANE = 12 # Max cars to render at once
-BASE_CAR_SPEED = 5.0
+STOP_LINE_MARGIN = CONFIG.stop_line_margin
+CAR_LENGTH = CONFIG.car_length
+CAR_WIDTH = CONFIG.car_width
+SAFE_DISTANCE = CONFIG.safe_distance
+MAX_CARS_PER_LANE = CONFIG.max_cars_per_lane # Max cars to render at once
+BASE_CAR_SPEED = CONFIG.base_car_speed
 
 # -----------------------------
 # Car Class
@@ -153,6 +157,8 @@ lights = {
     "West": canvas.create_oval(CENTER - 20, CENTER - 7, CENTER - 6, CENTER + 7, fill="red"),
 }
 
+signal_lights = CanvasLights(canvas, lights)
+
 # --- Car Creation ---
 car_pool = {}
 car_colors = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#9B59B6", "#1ABC9C", "#E74C3C", "#F39C12", "#D35400"]
@@ -245,7 +251,7 @@ def attempt_to_spawn_car():
 def move_cars():
     current_speed = BASE_CAR_SPEED * (speed_slider.get() / 5.0)
     for lane_name, car_list in car_pool.items():
-        is_green = canvas.itemcget(lights[lane_name.split("_")[0]], "fill") == "lime green"
+        is_green = signal_lights.is_green(lane_name.split("_")[0])
         
         active_cars = [c for c in car_list if c.is_active]
         for i, car in enumerate(active_cars):
@@ -278,7 +284,7 @@ def move_cars():
 
 def start_new_cycle():
     global active_direction_index, active_direction, time_left, current_traffic_counts, current_durations
-    if active_direction: canvas.itemconfig(lights[active_direction], fill="red")
+    if active_direction: signal_lights.set(active_direction, SignalState.RED)
 
     active_direction_index = (active_direction_index + 1) % len(active_direction_sequence)
     active_direction = active_direction_sequence[active_direction_index]
@@ -288,7 +294,7 @@ def start_new_cycle():
         current_durations = get_signal_durations(current_traffic_counts, time_of_day_var.get())
 
     time_left = current_durations[active_direction]
-    canvas.itemconfig(lights[active_direction], fill="lime green")
+    signal_lights.set(active_direction, SignalState.GREEN)
 
     for d in directions:
         lane_labels[d][0].config(text=str(current_traffic_counts.get(d, 0)))
@@ -0,0 +1,7 @@
+"""Shared building blocks for the AI traffic signal simulator.
+
+The top-level scripts (``traffic10.py``, ``yolo12.py``, ...) are Tk front-ends;
+the modules in this package hold the logic that does not depend on a display.
+"""
+
+DIRECTIONS = ["North", "South", "East", "West"]
@@ -0,0 +1,288 @@
+"""Local REST/WebSocket control API for detections and signal state.
+
+External detectors push per-direction counts, and subscribers receive phase
+changes and per-second metrics. The simulation keeps running on its own
+thread (the Tk loop, or a headless driver). The API runs an asyncio loop in
+a background thread, and the two meet only in :class:`ControlBridge`:
+
+- pushed counts reach the simulation through a thread-safe
+  :class:`queue.Queue`, read when each cycle is planned (:class:`PushSource`);
+- events reach the asyncio loop through ``call_soon_threadsafe`` and are fanned
+  out to one bounded queue per subscriber, so a slow client drops old events
+  instead of stalling the simulation.
+
+Endpoints on ``http://127.0.0.1:PORT``:
+
+- ``POST /counts`` with ``{"North": 12, "South": 30, "East": 8, "West": 5}``
+  queues counts for the next cycle;
+- ``GET /state`` returns the latest ``phase`` and ``metrics`` events;
+- ``GET /ws`` streams events as JSON; clients may also send
+  ``{"type": "counts", "counts": {...}}``.
+
+``python -m traffic_sim.api`` is a stand-in detector that pushes random
+counts and prints the events it receives.
+
+Requires ``aiohttp`` (``pip install aiohttp``).
+"""
+import argparse
+import asyncio
+import json
+import queue
+import random
+import threading
+
+from aiohttp import ClientSession, WSMsgType, web
+
+from . import DIRECTIONS
+from .sources import TrafficSource
+
+# Events kept per subscriber before the oldest are dropped
+SUBSCRIBER_BACKLOG = 256
+
+
+def parse_counts(data):
+    """Validate pushed counts: a non-negative integer for every direction."""
+    if not isinstance(data, dict):
+        raise ValueError("Counts must be a JSON object keyed by direction")
+    counts = {}
+    for d in DIRECTIONS:
+        value = data.get(d)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"Count for {d} must be a non-negative integer, got {value!r}")
+        counts[d] = value
+    return counts
+
+
+def _offer(events, event):
+    """Queue an event for one subscriber, dropping its oldest if the backlog is full."""
+    if events.full():
+        events.get_nowait()
+    events.put_nowait(event)
+
+
+class ControlBridge:
+    """State shared between the simulation thread and the API's asyncio loop."""
+
+    def __init__(self):
+        self.inbox = queue.Queue()
+        # Latest event of each type; replaced, never mutated, by the simulation thread
+        self.state = {}
+        self.loop = None
+        self.subscribers = set()
+        self.sim = None
+
+    # --- Simulation thread ---
+    def attach(self, sim):
+        """Publish ``sim``'s signal changes as they happen and its metrics every simulated second."""
+        self.sim = sim
+        sim.signal_listeners.append(self.publish_signal)
+        sim.second_listeners.append(self.publish)
+        self._emit(self._phase_event(sim))
+        self.publish(sim)
+
+    def take_counts(self):
+        """The most recently pushed counts, or None if nothing arrived since the last call."""
+        latest = None
+        while True:
+            try:
+                latest = self.inbox.get_nowait()
+            except queue.Empty:
+                return latest
+
+    def _phase_event(self, sim, head=None):
+        return {"type": "phase", "time": round(sim.sim_time, 3), "phase": sim.active_phase, "head": head,
+                "lights": {h: state.name for h, state in sim.lights.items()},
+                "durations": dict(sim.current_durations)}
+
+    def publish_signal(self, head, state):
+        """Emit a ``phase`` event for one signal head's change, with every head's state after it."""
+        self._emit(self._phase_event(self.sim, head))
+
+    def publish(self, sim):
+        self._emit({"type": "metrics", "time": round(sim.sim_time, 3), "total_cars_passed": sim.total_cars_passed,
+                    "cars_on_screen": sim.cars_on_screen, "time_left": sim.time_left,
+                    "counts": dict(sim.current_traffic_counts),
+                    "degraded": [d for d in DIRECTIONS if sim.degraded[d]],
+                    "upstream": {d: sum(len(q) for lane_name, q in sim.upstream.items()
+                                        if lane_name.split("_")[0] == d) for d in DIRECTIONS}})
+
+    def _emit(self, event):
+        self.state = {**self.state, event["type"]: event}
+        loop = self.loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._broadcast, event)
+
+    # --- Asyncio loop ---
+    def _broadcast(self, event):
+        for events in self.subscribers:
+            _offer(events, event)
+
+
+class PushSource(TrafficSource):
+    """Counts pushed through a :class:`ControlBridge`.
+
+    Until the first push, counts come from ``fallback`` (if given); after it,
+    a cycle without a new push keeps the previous counts.
+    """
+
+    def __init__(self, bridge, fallback=None):
+        self.bridge = bridge
+        self.fallback = fallback
+        self.received = False
+
+    def counts_for_cycle(self, sim):
+        counts = self.bridge.take_counts()
+        if counts is not None:
+            self.received = True
+            return counts
+        if self.fallback is not None and not self.received:
+            return self.fallback.counts_for_cycle(sim)
+        return None
+
+    def get_state(self):
+        return {"received": self.received}
+
+    def set_state(self, state):
+        self.received = state["received"]
+
+
+# -----------------------------
+# HTTP Server
+# -----------------------------
+def build_app(bridge):
+    async def post_counts(request):
+        try:
+            counts = parse_counts(await request.json())
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        bridge.inbox.put(counts)
+        return web.json_response({"queued": counts}, status=202)
+
+    async def get_state(request):
+        return web.json_response(bridge.state)
+
+    async def websocket(request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        events = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        for event in bridge.state.values():
+            events.put_nowait(event)
+        bridge.subscribers.add(events)
+
+        async def forward():
+            while True:
+                await ws.send_json(await events.get())
+
+        sender = asyncio.ensure_future(forward())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                    if not isinstance(data, dict) or data.get("type") != "counts":
+                        raise ValueError('Expected {"type": "counts", "counts": {...}}')
+                    bridge.inbox.put(parse_counts(data.get("counts")))
+                except ValueError as e:
+                    _offer(events, {"type": "error", "error": str(e)})
+        finally:
+            bridge.subscribers.discard(events)
+            sender.cancel()
+        return ws
+
+    app = web.Application()
+    app.router.add_post("/counts", post_counts)
+    app.router.add_get("/state", get_state)
+    app.router.add_get("/ws", websocket)
+    return app
+
+
+class ApiServer:
+    """Runs the API on its own asyncio loop in a daemon thread."""
+
+    def __init__(self, bridge, host="127.0.0.1", port=8080):
+        self.bridge = bridge
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="control-api", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(build_app(self.bridge))
+        try:
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, self.host, self.port)
+            loop.run_until_complete(site.start())
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            loop.close()
+            return
+        self.port = runner.addresses[0][1]
+        self.loop = loop
+        self.bridge.loop = loop
+        self.ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self.bridge.loop = None
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5)
+
+
+# -----------------------------
+# Stand-in Detector Client
+# -----------------------------
+async def run_client(url, interval=5.0, rounds=None, low=10, high=100, seed=None):
+    """Push random counts over the WebSocket every ``interval`` seconds, printing received events."""
+    rng = random.Random(seed)
+    async with ClientSession() as session:
+        async with session.ws_connect(url.rstrip("/") + "/ws") as ws:
+            async def push():
+                n = 0
+                while rounds is None or n < rounds:
+                    counts = {d: rng.randint(low, high) for d in DIRECTIONS}
+                    await ws.send_json({"type": "counts", "counts": counts})
+                    print(f"pushed {counts}")
+                    n += 1
+                    await asyncio.sleep(interval)
+                await ws.close()
+
+            pusher = asyncio.ensure_future(push())
+            try:
+                async for msg in ws:
+                    if msg.type == WSMsgType.TEXT:
+                        print(msg.data)
+            finally:
+                pusher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m traffic_sim.api",
+                                     description="Stand-in detector client for the control API")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between pushed counts")
+    parser.add_argument("--rounds", type=int, help="stop after this many pushes (default: run until closed)")
+    parser.add_argument("--seed", type=int, help="random seed for the pushed counts")
+    args = parser.parse_args(argv)
+    asyncio.run(run_client(args.url, args.interval, args.rounds, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
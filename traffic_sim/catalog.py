@@ -0,0 +1,167 @@
+"""Camera frames per direction, indexed by timestamp.
+
+A :class:`FrameCatalog` maps each direction to its frames sorted by
+timestamp, so "the next frame for North after time t" is a bisect instead of
+a folder scan. Catalogs come from a manifest or from an image folder.
+
+A manifest names each frame's direction and timestamp explicitly. It is a CSV
+with ``path,direction,timestamp`` columns, or a JSON list of objects with the
+same keys (optionally under ``"frames"``). Timestamps are seconds (e.g. Unix
+time) or ISO 8601 strings. Relative paths are taken from the manifest's
+folder. An optional ``camera`` column names the camera when an approach has
+several; :meth:`FrameCatalog.snapshots` groups their frames taken together.
+
+Without a manifest the folder's filenames decide, as the scripts always did:
+``"number"`` sorts images by the first number in the name and deals them to
+directions round-robin (``yolo12.py``); ``"name"`` gives each direction the
+images whose name contains it, or every image if none do (``yolo6.py``). A
+frame's timestamp is then its position in that order.
+"""
+import csv
+import json
+import os
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from . import DIRECTIONS
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+Frame = namedtuple("Frame", ["timestamp", "direction", "path", "camera"], defaults=("",))
+
+
+def extract_number_from_filename(filename):
+    numbers = re.findall(r'\d+', filename)
+    return int(numbers[0]) if numbers else 0
+
+
+def _parse_timestamp(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _parse_direction(value):
+    direction = str(value).strip().capitalize()
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction {value!r}; expected one of {', '.join(DIRECTIONS)}")
+    return direction
+
+
+class FrameCatalog:
+    """Frames per direction, sorted by timestamp (ties keep their camera and path order).
+
+    Lookups take an optional ``camera`` to search one camera's frames only.
+    """
+
+    def __init__(self, frames):
+        by_direction = {d: [] for d in DIRECTIONS}
+        for frame in frames:
+            by_direction[frame.direction].append(frame)
+        self.frames = {}
+        self.timestamps = {}
+        # (direction, camera) -> (timestamps, frames) of that camera alone
+        self.streams = {}
+        for d, found in by_direction.items():
+            found.sort(key=lambda frame: (frame.timestamp, frame.camera, frame.path))
+            self.frames[d] = found
+            self.timestamps[d] = [frame.timestamp for frame in found]
+            for frame in found:
+                timestamps, stream = self.streams.setdefault((d, frame.camera), ([], []))
+                timestamps.append(frame.timestamp)
+                stream.append(frame)
+
+    def __len__(self):
+        return sum(len(found) for found in self.frames.values())
+
+    def cameras(self, direction):
+        return sorted(camera for d, camera in self.streams if d == direction)
+
+    def _stream(self, direction, camera):
+        if camera is None:
+            return self.timestamps[direction], self.frames[direction]
+        return self.streams.get((direction, camera), ([], []))
+
+    def next_frame(self, direction, after=None, camera=None):
+        """First frame for ``direction`` later than ``after`` (the earliest if None), or None."""
+        timestamps, frames = self._stream(direction, camera)
+        i = 0 if after is None else bisect_right(timestamps, after)
+        return frames[i] if i < len(timestamps) else None
+
+    def latest_frame(self, direction, at, camera=None):
+        """Newest frame for ``direction`` taken at or before ``at``, or None."""
+        timestamps, frames = self._stream(direction, camera)
+        i = bisect_right(timestamps, at)
+        return frames[i - 1] if i else None
+
+    def snapshots(self, direction, tolerance=1.0):
+        """``direction``'s frames grouped into views taken together, at most one per camera.
+
+        A group starts at its earliest frame and takes each camera's next
+        frame within ``tolerance`` seconds; a second frame from a camera
+        already in the group starts a new one. With one camera every frame
+        is its own group.
+        """
+        groups = []
+        group = []
+        for frame in self.frames[direction]:
+            if group and (frame.timestamp - group[0].timestamp > tolerance
+                          or any(other.camera == frame.camera for other in group)):
+                groups.append(group)
+                group = []
+            group.append(frame)
+        if group:
+            groups.append(group)
+        return groups
+
+    @classmethod
+    def from_manifest(cls, path):
+        base = os.path.dirname(os.path.abspath(path))
+        with open(path, newline="") as f:
+            if path.lower().endswith(".json"):
+                rows = json.load(f)
+                if isinstance(rows, dict):
+                    rows = rows.get("frames", [])
+            else:
+                rows = list(csv.DictReader(f))
+        frames = []
+        for n, row in enumerate(rows, 1):
+            try:
+                frames.append(Frame(_parse_timestamp(row["timestamp"]), _parse_direction(row["direction"]),
+                                    os.path.join(base, row["path"]), str(row.get("camera") or "")))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Bad entry {n} in manifest {path}: {e}") from None
+        return cls(frames)
+
+    @classmethod
+    def from_directory(cls, image_dir, match="number"):
+        names = sorted(f for f in os.listdir(image_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+        paths = [os.path.join(image_dir, f) for f in names]
+        if match == "number":
+            paths.sort(key=lambda x: extract_number_from_filename(os.path.basename(x)))
+            return cls(Frame(float(i), DIRECTIONS[i % len(DIRECTIONS)], path) for i, path in enumerate(paths))
+        if match == "name":
+            frames = []
+            for d in DIRECTIONS:
+                named = [path for path in paths if d.lower() in os.path.basename(path).lower()]
+                frames.extend(Frame(float(i), d, path) for i, path in enumerate(named or paths))
+            return cls(frames)
+        raise ValueError(f"Unknown match rule {match!r}; expected 'number' or 'name'")
+
+
+# Catalogs by (source, match rule) with the source's mtime when they were built
+_cache = {}
+
+
+def load_catalog(image_dir, manifest=None, match="number"):
+    """The catalog for ``manifest`` if given, else ``image_dir``; rebuilt only when that file or folder changes."""
+    source = manifest or image_dir
+    stamp = os.stat(source).st_mtime_ns
+    cached = _cache.get((source, match))
+    if cached is None or cached[0] != stamp:
+        catalog = FrameCatalog.from_manifest(manifest) if manifest else FrameCatalog.from_directory(image_dir, match)
+        cached = _cache[(source, match)] = (stamp, catalog)
+    return cached[1]
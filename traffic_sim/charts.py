@@ -0,0 +1,97 @@
+"""Live charts of a metrics recorder, updated incrementally by blitting.
+
+The axes, grid and labels are drawn once and cached as a background image.
+Each refresh restores that background and redraws only the data lines, so
+an update costs a few line draws instead of a full figure render. A full
+redraw happens only when the time window slides on or a value outgrows the
+y-axis.
+
+Requires matplotlib (TkAgg backend) and numpy.
+"""
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from . import DIRECTIONS
+
+PANELS = [
+    ("Queue (vehicles)", "queue_"),
+    ("Green (s)", "green_"),
+    ("Detector count", "count_"),
+]
+
+
+class LiveChart:
+    """Queue, green allocation, detector count and throughput over a sliding time window."""
+
+    def __init__(self, master, recorder, window_seconds=600):
+        self.recorder = recorder
+        self.window_seconds = window_seconds
+        self.figure = Figure(figsize=(6, 7), dpi=90)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+        self.axes = []
+        self.lines = []
+        for i, (title, prefix) in enumerate(PANELS + [("Passed per second", None)]):
+            ax = self.figure.add_subplot(len(PANELS) + 1, 1, i + 1)
+            ax.set_ylabel(title, fontsize=8)
+            ax.tick_params(labelsize=7)
+            ax.grid(True, alpha=0.3)
+            columns = [prefix + d for d in DIRECTIONS] if prefix else ["passed"]
+            for column in columns:
+                (line,) = ax.plot([], [], label=column.split("_")[-1], animated=True)
+                self.lines.append((ax, column, line))
+            if prefix:
+                ax.legend(loc="upper left", fontsize=6, ncol=4)
+            self.axes.append(ax)
+        self.figure.tight_layout()
+
+        self.t0 = 0.0
+        self.last_time = None
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self._set_window(0.0)
+
+    def _set_window(self, start):
+        self.t0 = start
+        for ax in self.axes:
+            ax.set_xlim(start, start + self.window_seconds)
+            ax.set_ylim(0, max(ax.get_ylim()[1], 1))
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for ax, _, line in self.lines:
+            ax.draw_artist(line)
+
+    def refresh(self):
+        """Pull the latest samples from the recorder and redraw the lines."""
+        buffer = self.recorder.buffer
+        latest = buffer.latest("time")
+        if latest is None or latest == self.last_time:
+            return
+        self.last_time = latest
+        times = buffer.column("time")
+        now = times[-1]
+        needs_redraw = now > self.t0 + self.window_seconds
+        if needs_redraw:
+            self.t0 = now - self.window_seconds / 2
+
+        visible = times >= self.t0
+        for ax, column, line in self.lines:
+            values = buffer.column(column)[visible]
+            line.set_data(times[visible], values)
+            if len(values) and values.max() > ax.get_ylim()[1]:
+                ax.set_ylim(0, values.max() * 1.5)
+                needs_redraw = True
+
+        if needs_redraw or self.background is None:
+            # Redraws the static parts; _on_draw re-caches them and draws the lines
+            self._set_window(self.t0)
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_lines()
+        self.canvas.blit(self.figure.bbox)
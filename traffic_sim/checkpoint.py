@@ -0,0 +1,185 @@
+"""Binary checkpoints of a running simulation: numpy arrays behind a small JSON header.
+
+A checkpoint holds everything :meth:`Simulation.snapshot` captures plus the
+config it ran with, the time of day and the traffic source's position, so a
+run can be checkpointed and resumed, forked into what-if scenarios (load one
+file into several simulations with different planners) or warm-started at
+rush hour instead of filling up from empty.
+
+File layout: :data:`MAGIC`, the header length as a little-endian uint32, the
+UTF-8 JSON header, then the raw bytes of each array the header lists, in
+order. The state that grows with traffic (cars, upstream arrivals, the
+arrival heap) lives in the arrays and is read back with ``np.frombuffer``
+without parsing; the header holds timers, totals and per-cycle history.
+
+Requires numpy.
+"""
+import json
+import os
+import struct
+from dataclasses import asdict
+
+import numpy as np
+
+from .config import config_from_dict
+from .movements import MOVEMENTS
+from .signals import SignalState
+
+MAGIC = b"TSIMCKPT"
+VERSION = 1
+
+# One record per active car; ``flags`` packs the booleans of CAR_FLAGS
+CAR_DTYPE = np.dtype([("lane", "<i2"), ("movement", "i1"), ("flags", "u1"), ("s", "<f8"),
+                      ("lateral", "<f8"), ("spawn_time", "<f8"), ("delay", "<f8")])
+CAR_FLAGS = ("waiting_at_light", "has_passed_intersection", "is_in_intersection",
+             "has_entered_intersection", "in_box", "sneaker")
+
+
+def _encode_cars(lanes, lane_index):
+    records = []
+    for lane_name, cars in lanes.items():
+        for (s, lateral, movement, waiting, passed, in_intersection, entered, spawn_time, delay,
+             in_box, sneaker) in cars:
+            flags = 0
+            for bit, flag in enumerate((waiting, passed, in_intersection, entered, in_box, sneaker)):
+                flags |= bool(flag) << bit
+            records.append((lane_index[lane_name], MOVEMENTS.index(movement), flags, s, lateral, spawn_time, delay))
+    return np.array(records, dtype=CAR_DTYPE)
+
+
+def _decode_cars(cars, lane_names):
+    lanes = {lane_name: [] for lane_name in lane_names}
+    for lane, movement, flags, s, lateral, spawn_time, delay in cars.tolist():
+        waiting, passed, in_intersection, entered, in_box, sneaker = (
+            bool(flags >> bit & 1) for bit in range(len(CAR_FLAGS)))
+        lanes[lane_names[lane]].append((s, lateral, MOVEMENTS[movement], waiting, passed, in_intersection,
+                                        entered, spawn_time, delay, in_box, sneaker))
+    return {lane_name: tuple(cars) for lane_name, cars in lanes.items()}
+
+
+def dumps(sim):
+    """Serialize ``sim`` to checkpoint bytes."""
+    lanes, signals, stats, rng_state = sim.snapshot()
+    (sim_time, active_phase, active_phase_index, next_phase_index, phase_durations,
+     time_left, timer_countdown, clearing_heads, clearance_elapsed,
+     lights, direction_timers, current_durations, counts, pending,
+     arrival_rates, arrival_heap, next_rate_refresh, next_second, backlog) = signals
+    (total_cars_passed, cars_on_screen, by_direction,
+     total_delay, cycles, clearance_times, upstream_peak, spillback_seconds, pool_sizes) = stats
+    rng_version, rng_words, rng_gauss = rng_state
+
+    lane_names = list(sim.geometry.lane_names)
+    lane_index = {lane_name: i for i, lane_name in enumerate(lane_names)}
+    arrays = {
+        "cars": _encode_cars(lanes, lane_index),
+        "upstream_lane": np.array([lane_index[lane_name] for lane_name, times in pending.items() for _ in times],
+                                  dtype="<i2"),
+        "upstream_time": np.array([t for times in pending.values() for t in times], dtype="<f8"),
+        "heap_time": np.array([when for when, _ in arrival_heap], dtype="<f8"),
+        "heap_lane": np.array([lane_index[lane_name] for _, lane_name in arrival_heap], dtype="<i2"),
+        "clearance_times": np.array(clearance_times, dtype="<f8"),
+        "rng_state": np.array(rng_words, dtype="<u4"),
+    }
+    header = {
+        "version": VERSION,
+        "config": asdict(sim.config),
+        "lane_names": lane_names,
+        "phase_plan": [name for name, _ in sim.phase_plan],
+        "time_of_day": sim.time_of_day,
+        "source": sim.source.get_state(),
+        "signals": {
+            "sim_time": sim_time, "active_phase": active_phase, "active_phase_index": active_phase_index,
+            "next_phase_index": next_phase_index, "phase_durations": phase_durations, "time_left": time_left,
+            "timer_countdown": timer_countdown, "clearing_heads": list(clearing_heads),
+            "clearance_elapsed": clearance_elapsed, "lights": {head: state.name for head, state in lights.items()},
+            "direction_timers": direction_timers, "current_durations": current_durations, "counts": counts,
+            "arrival_rates": arrival_rates, "next_rate_refresh": next_rate_refresh, "next_second": next_second,
+            "backlog": list(backlog),
+        },
+        "stats": {
+            "total_cars_passed": total_cars_passed, "cars_on_screen": cars_on_screen, "by_direction": by_direction,
+            "total_delay": total_delay, "cycles": cycles, "upstream_peak": upstream_peak,
+            "spillback_seconds": spillback_seconds, "pool_sizes": pool_sizes,
+        },
+        "rng": {"version": rng_version, "gauss": rng_gauss},
+        "arrays": [[name, array.dtype.descr if array.dtype.names else array.dtype.str, len(array)]
+                   for name, array in arrays.items()],
+    }
+    encoded = json.dumps(header).encode()
+    parts = [MAGIC, struct.pack("<I", len(encoded)), encoded]
+    parts.extend(array.tobytes() for array in arrays.values())
+    return b"".join(parts)
+
+
+def read_header(data):
+    """Split checkpoint bytes into the JSON header and a dict of arrays viewing ``data``."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a simulation checkpoint")
+    (length,) = struct.unpack_from("<I", data, len(MAGIC))
+    offset = len(MAGIC) + 4
+    header = json.loads(bytes(data[offset:offset + length]))
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {header['version']}")
+    offset += length
+    arrays = {}
+    for name, descr, count in header["arrays"]:
+        dtype = np.dtype([tuple(field) for field in descr] if isinstance(descr, list) else descr)
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += dtype.itemsize * count
+    return header, arrays
+
+
+def loads(sim, data):
+    """Restore ``sim`` (built with the checkpoint's config, see :func:`read_config`) from checkpoint bytes."""
+    header, arrays = read_header(data)
+    lane_names = header["lane_names"]
+    if lane_names != list(sim.geometry.lane_names):
+        raise ValueError("Checkpoint lanes do not match the simulation's geometry")
+    if header["phase_plan"] != [name for name, _ in sim.phase_plan]:
+        raise ValueError(f"Checkpoint was taken with phases {header['phase_plan']}, "
+                         f"not {[name for name, _ in sim.phase_plan]}")
+
+    sig = header["signals"]
+    pending = {lane_name: [] for lane_name in lane_names}
+    for lane, t in zip(arrays["upstream_lane"].tolist(), arrays["upstream_time"].tolist()):
+        pending[lane_names[lane]].append(t)
+    heap = [(when, lane_names[lane]) for when, lane in zip(arrays["heap_time"].tolist(),
+                                                           arrays["heap_lane"].tolist())]
+    signals = (sig["sim_time"], sig["active_phase"], sig["active_phase_index"], sig["next_phase_index"],
+               sig["phase_durations"], sig["time_left"], sig["timer_countdown"], tuple(sig["clearing_heads"]),
+               sig["clearance_elapsed"], {head: SignalState[name] for head, name in sig["lights"].items()},
+               sig["direction_timers"], sig["current_durations"], sig["counts"], pending,
+               sig["arrival_rates"], heap, sig["next_rate_refresh"], sig["next_second"],
+               # Checkpoints written before the backlog was saved fall back to lane order
+               sig.get("backlog", [lane_name for lane_name in lane_names if pending[lane_name]]))
+    st = header["stats"]
+    stats = (st["total_cars_passed"], st["cars_on_screen"], st["by_direction"], st["total_delay"], st["cycles"],
+             arrays["clearance_times"].tolist(), st["upstream_peak"], st["spillback_seconds"],
+             st.get("pool_sizes", {}))
+    rng = header["rng"]
+    rng_state = (rng["version"], tuple(arrays["rng_state"].tolist()), rng["gauss"])
+
+    sim.restore((_decode_cars(arrays["cars"], lane_names), signals, stats, rng_state))
+    sim.time_of_day = header["time_of_day"]
+    if header["source"] is not None:
+        sim.source.set_state(header["source"])
+
+
+def read_config(path):
+    """The :class:`~traffic_sim.config.SimConfig` a checkpoint file was taken with."""
+    with open(path, "rb") as f:
+        header, _ = read_header(f.read())
+    return config_from_dict(header["config"])
+
+
+def save(sim, path):
+    """Write a checkpoint, replacing ``path`` atomically so a crash never leaves a torn file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps(sim))
+    os.replace(tmp_path, path)
+
+
+def load(sim, path):
+    with open(path, "rb") as f:
+        loads(sim, f.read())
@@ -0,0 +1,171 @@
+"""Command-line entry point: ``python -m traffic_sim``.
+
+Runs the simulation headless for a fixed number of simulated seconds and
+writes a throughput/delay/cycle report.
+"""
+import argparse
+import os
+from dataclasses import replace
+
+from .catalog import load_catalog
+from .config import load_config
+from .demand import DemandClock, DemandProfile, ProfileSource
+from .detection import load_model
+from .engine import Simulation
+from .estimation import CountEstimator
+from .exporter import MetricsServer, SimulationExporter
+from .movements import PHASE_PLANS
+from .mpc import MPCController
+from .planner import PHASE_PLANNERS, PLANNERS
+from .reports import build_report, write_csv, write_json
+from .inference import CameraFeedSource, InferenceScheduler
+from .sources import ImageDirSource, RandomSource, TraceSource
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m traffic_sim", description=__doc__.splitlines()[0])
+    parser.add_argument("--config", help="JSON config file (see traffic_sim.config)")
+    parser.add_argument("--duration", type=float, default=600.0, help="simulated seconds to run (default: 600)")
+    parser.add_argument("--source", choices=["random", "images", "cameras", "trace", "profile"], default="random")
+    parser.add_argument("--image-dir", help="image folder for --source images (default: from config)")
+    parser.add_argument("--model", help="YOLO weights for --source images (default: from config)")
+    parser.add_argument("--manifest", help="CSV/JSON mapping images to direction and timestamp for --source images "
+                                           "(default: from config, else by filename)")
+    parser.add_argument("--max-inference-rate", type=float,
+                        help="YOLO inferences per simulated second for --source cameras (default: from config)")
+    parser.add_argument("--trace", help="CSV of per-cycle counts for --source trace")
+    parser.add_argument("--profile", help="CSV of hourly volumes for --source profile, and the fallback for "
+                                          "failed detections with --source images (default: from config, "
+                                          "else built-in)")
+    parser.add_argument("--start-hour", type=float, default=0.0, help="time of day the profile clock starts at")
+    parser.add_argument("--clock-speedup", type=float, default=1.0,
+                        help="profile hours per simulated hour (60 sweeps a day in 24 minutes)")
+    parser.add_argument("--planner", choices=sorted(PLANNERS) + sorted(PHASE_PLANNERS) + ["mpc"],
+                        default="proportional",
+                        help="per-direction planner, 'phase' to allocate green per phase group, "
+                             "or 'mpc' to pick plans by simulating ahead")
+    parser.add_argument("--mpc-horizon", type=float, default=90.0, help="seconds simulated per MPC candidate")
+    parser.add_argument("--mpc-workers", type=int, default=0, help="processes for MPC rollouts (default: serial)")
+    parser.add_argument("--phase-plan", choices=sorted(PHASE_PLANS), help="signal phase plan (default: from config)")
+    parser.add_argument("--time-of-day", choices=["Normal", "Morning", "Evening"], default="Normal")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible runs")
+    parser.add_argument("--json", dest="json_path", help="write the full report as JSON")
+    parser.add_argument("--csv", dest="csv_path", help="write per-cycle durations as CSV")
+    parser.add_argument("--metrics-csv", help="write per-second queue/green/count samples as CSV (needs numpy)")
+    parser.add_argument("--resume", help="continue from a checkpoint file (its config is used; needs numpy)")
+    parser.add_argument("--checkpoint", help="write a binary checkpoint to this file at the end of the run")
+    parser.add_argument("--checkpoint-every", type=float,
+                        help="also rewrite --checkpoint every this many simulated seconds")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics while running")
+    return parser
+
+
+def check_image_source(args, config):
+    """Exit with a message unless the manifest (or, without one, the image folder) exists."""
+    manifest = args.manifest or config.image_manifest_path
+    path = manifest or args.image_dir or config.traffic_image_dir
+    if not os.path.exists(path):
+        raise SystemExit(f"--source {args.source}: {'manifest' if manifest else 'image folder'} {path} does not exist")
+
+
+def make_source(args, config):
+    profile_path = args.profile or config.history_profile_path
+    profile = DemandProfile.from_csv(profile_path) if profile_path else DemandProfile.default()
+    clock = DemandClock(args.start_hour, args.clock_speedup)
+    if args.source == "images":
+        check_image_source(args, config)
+        try:
+            return ImageDirSource(args.image_dir or config.traffic_image_dir, args.model or config.yolo_model_path,
+                                  config.detection_confidence, config.detection_iou,
+                                  CountEstimator(config.count_smoothing, config.count_outlier_sigma, profile=profile),
+                                  clock, args.manifest or config.image_manifest_path,
+                                  config.camera_overlap, config.camera_sync_seconds)
+        except ValueError as e:
+            raise SystemExit(f"--source images: {e}")
+    if args.source == "cameras":
+        check_image_source(args, config)
+        try:
+            catalog = load_catalog(args.image_dir or config.traffic_image_dir,
+                                   args.manifest or config.image_manifest_path)
+        except ValueError as e:
+            raise SystemExit(f"--source cameras: {e}")
+        scheduler = InferenceScheduler(args.max_inference_rate or config.max_inferences_per_second)
+        return CameraFeedSource(catalog, load_model(args.model or config.yolo_model_path), scheduler,
+                                CountEstimator(config.count_smoothing, config.count_outlier_sigma, profile=profile),
+                                clock, config.detection_confidence, config.detection_iou,
+                                config.camera_overlap, config.camera_sync_seconds)
+    if args.source == "trace":
+        if not args.trace:
+            raise SystemExit("--source trace requires --trace")
+        return TraceSource(args.trace)
+    if args.source == "profile":
+        return ProfileSource(profile, clock)
+    return RandomSource()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.resume or args.checkpoint:
+        from . import checkpoint
+    config = checkpoint.read_config(args.resume) if args.resume else load_config(args.config)
+    if args.phase_plan:
+        config = replace(config, phase_plan=args.phase_plan)
+    exporter = None
+    if args.metrics_port is not None:
+        exporter = SimulationExporter()
+        server = MetricsServer(exporter.registry, port=args.metrics_port).start()
+    controller = None
+    if args.planner == "mpc":
+        controller = MPCController(args.mpc_horizon, workers=args.mpc_workers)
+        sim = Simulation(make_source(args, config), time_of_day=args.time_of_day, seed=args.seed,
+                         config=config, controller=controller)
+    elif args.planner in PHASE_PLANNERS:
+        sim = Simulation(make_source(args, config), time_of_day=args.time_of_day, seed=args.seed,
+                         config=config, phase_planner=PHASE_PLANNERS[args.planner])
+    else:
+        sim = Simulation(make_source(args, config), PLANNERS[args.planner], args.time_of_day,
+                         seed=args.seed, config=config)
+    if isinstance(sim.source, CameraFeedSource):
+        sim.source.attach(sim)
+    if args.resume:
+        try:
+            checkpoint.load(sim, args.resume)
+        except ValueError as e:
+            raise SystemExit(f"Cannot resume from {args.resume}: {e}")
+    recorder = None
+    if args.metrics_csv:
+        from .metrics import MetricsRecorder
+        recorder = MetricsRecorder(sim, capacity=max(1, int(args.duration)))
+    run = sim.run
+    if exporter is not None:
+        exporter.attach(sim)
+        run = exporter.run
+    try:
+        if args.checkpoint:
+            end_time = sim.sim_time + args.duration
+            while sim.sim_time < end_time - 1e-9:
+                run(min(args.checkpoint_every or args.duration, end_time - sim.sim_time))
+                checkpoint.save(sim, args.checkpoint)
+        else:
+            run(args.duration)
+    finally:
+        if controller is not None:
+            controller.close()
+        if exporter is not None:
+            exporter.close()
+            server.close()
+
+    report = build_report(sim)
+    if args.json_path:
+        write_json(report, args.json_path)
+    if args.csv_path:
+        write_csv(report, args.csv_path)
+    if recorder is not None:
+        recorder.write_csv(args.metrics_csv)
+
+    print(f"Simulated {report['sim_seconds']:.0f}s over {len(report['cycles'])} cycles: "
+          f"{report['throughput']['total_cars_passed']} cars passed "
+          f"({report['throughput']['cars_per_hour']:.0f}/h), "
+          f"average delay {report['delay']['average_seconds']:.1f}s")
+    return 0
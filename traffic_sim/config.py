@@ -0,0 +1,226 @@
+"""Simulator configuration: defaults, optional JSON file and environment overrides.
+
+Values are resolved in order default -> config file -> environment. The file
+is JSON with the same keys as :class:`SimConfig`; environment variables are
+the upper-cased key prefixed with ``TRAFFIC_SIM_`` (e.g.
+``TRAFFIC_SIM_MAX_CARS_PER_LANE=40``). ``TRAFFIC_SIM_CONFIG`` names the file
+when none is passed explicitly.
+"""
+import json
+import os
+from collections import namedtuple
+from dataclasses import dataclass, fields, replace
+
+from . import DIRECTIONS
+
+ENV_PREFIX = "TRAFFIC_SIM_"
+
+
+@dataclass(frozen=True)
+class SimConfig:
+    canvas_width: int = 800
+    canvas_height: int = 800
+    road_width: int = 200
+    lane_width: int = 50
+    lanes_per_direction: int = 2
+    stop_line_margin: int = 15
+    car_length: int = 30
+    car_width: int = 20
+    safe_distance: int = 15
+    # Cars preallocated per lane; pools grow beyond this on demand
+    max_cars_per_lane: int = 20
+    base_car_speed: float = 5.0
+    tick_seconds: float = 0.02
+    spawn_interval: float = 0.5
+    left_turn_ratio: float = 0.2
+    right_turn_ratio: float = 0.2
+    phase_plan: str = "split"
+    # Custom phase groups as [[name, [signal heads...]], ...]; overrides phase_plan
+    phase_groups: tuple = ()
+    # Clearance between phases: fixed yellow, then all-red only until the box
+    # is clear of the ending movements, never longer than the cap
+    yellow_seconds: float = 1.0
+    max_all_red_seconds: float = 3.0
+    # Oncoming time headway a permissive left turn needs before it commits
+    permissive_gap_seconds: float = 2.0
+    # Left-turn pocket: over this distance before the stop line, left turns
+    # queue beside the rest of the inner lane instead of holding it up
+    # (0 shares the lane all the way to the stop line). The default holds
+    # three cars at the default headway, about half of each approach.
+    left_pocket_length: int = 135
+    yolo_model_path: str = "yolov8n.pt"
+    # Minimum detection confidence and NMS overlap (ultralytics defaults)
+    detection_confidence: float = 0.25
+    detection_iou: float = 0.7
+    # Per-direction count smoothing: EWMA weight of each new image, and how
+    # many standard deviations off a count must be to be rejected as a glitch
+    count_smoothing: float = 0.3
+    count_outlier_sigma: float = 3.0
+    # Hourly volume CSV (see traffic_sim.demand) giving the fallback count for
+    # a direction whose detection fails before it has a good count; empty
+    # uses the built-in profile
+    history_profile_path: str = ""
+    traffic_image_dir: str = "traffic_images"
+    # CSV/JSON manifest giving each image's direction and timestamp (see
+    # traffic_sim.catalog); empty assigns traffic_image_dir's images by filename
+    image_manifest_path: str = ""
+    # Several cameras per approach: frames within camera_sync_seconds form one
+    # snapshot, and camera_overlap is how much their views overlap (1 takes the
+    # largest count, 0 adds them up; see traffic_sim.detection.fuse_counts)
+    camera_overlap: float = 1.0
+    camera_sync_seconds: float = 1.0
+    # Cap on YOLO inferences (one batch of an approach's cameras) per second
+    # when they are scheduled rather than run on every frame (see traffic_sim.inference)
+    max_inferences_per_second: float = 2.0
+    # Keep processed YOLO frames in memory-mapped files at this path prefix
+    # instead of RAM (see traffic_sim.framestore); empty keeps them in memory
+    frame_store_path: str = ""
+    frame_store_capacity: int = 4096
+
+    def __post_init__(self):
+        if self.lanes_per_direction < 1:
+            raise ValueError("lanes_per_direction must be at least 1")
+        if self.left_turn_ratio + self.right_turn_ratio > 1 and self.lanes_per_direction == 1:
+            raise ValueError("left_turn_ratio + right_turn_ratio cannot exceed 1 on a single lane")
+        if self.left_pocket_length < 0:
+            raise ValueError("left_pocket_length cannot be negative")
+        if self.max_inferences_per_second <= 0:
+            raise ValueError("max_inferences_per_second must be positive")
+        if not 0 <= self.camera_overlap <= 1:
+            raise ValueError("camera_overlap must be between 0 and 1")
+        if 2 * self.lanes_per_direction * self.lane_width > self.road_width:
+            raise ValueError(
+                f"road_width {self.road_width} is too narrow for "
+                f"{self.lanes_per_direction} lanes of {self.lane_width} each way")
+
+
+def _coerce(field_type, value):
+    if field_type in (tuple, "tuple"):
+        if isinstance(value, str):
+            value = json.loads(value)
+        return tuple((name, tuple(heads)) for name, heads in value)
+    if field_type in (int, "int"):
+        return int(value)
+    if field_type in (float, "float"):
+        return float(value)
+    return str(value)
+
+
+def _coerce_values(data, where):
+    types = {f.name: f.type for f in fields(SimConfig)}
+    unknown = set(data) - set(types)
+    if unknown:
+        raise ValueError(f"Unknown config keys in {where}: {', '.join(sorted(unknown))}")
+    return {k: _coerce(types[k], v) for k, v in data.items()}
+
+
+def config_from_dict(data):
+    """Build a :class:`SimConfig` from JSON-style values, e.g. ``dataclasses.asdict`` of another config."""
+    return replace(SimConfig(), **_coerce_values(data, "config"))
+
+
+def load_config(path=None, environ=None):
+    """Build a :class:`SimConfig` from defaults, ``path`` and the environment."""
+    environ = os.environ if environ is None else environ
+    types = {f.name: f.type for f in fields(SimConfig)}
+    values = {}
+
+    path = path or environ.get(ENV_PREFIX + "CONFIG")
+    if path:
+        with open(path) as f:
+            values.update(_coerce_values(json.load(f), path))
+
+    for name, field_type in types.items():
+        env_value = environ.get(ENV_PREFIX + name.upper())
+        if env_value is not None:
+            values[name] = _coerce(field_type, env_value)
+
+    return replace(SimConfig(), **values)
+
+
+# -----------------------------
+# Derived Geometry
+# -----------------------------
+def lane_suffixes(lanes_per_direction):
+    """``_L``/``_R`` for the usual two lanes, then ``_R2``, ``_R3``... further out."""
+    suffixes = ["_L", "_R"][:lanes_per_direction]
+    suffixes += [f"_R{i}" for i in range(2, lanes_per_direction)]
+    return suffixes
+
+
+# Per-direction thresholds on a car's progress ``s``: the front-bumper
+# coordinate along its axis of travel, multiplied by ``sign`` so that ``s``
+# always grows as the car advances.
+DirectionTable = namedtuple("DirectionTable", [
+    "sign",        # +1 travelling towards larger canvas coordinates, -1 otherwise
+    "vertical",    # True for North/South (moves along y)
+    "stop",        # s at which the front reaches the stop line
+    "box_enter",   # front inside the intersection once s exceeds this
+    "box_exit",    # rear has left the intersection once s exceeds this
+    "offscreen",   # rear has left the canvas once s exceeds this
+])
+
+
+class Geometry:
+    """Positions derived from a :class:`SimConfig`, computed once per simulation."""
+
+    def __init__(self, config):
+        self.config = config
+        self.center = config.canvas_width / 2
+        self.intersection_start = self.center - config.road_width / 2
+        self.intersection_end = self.center + config.road_width / 2
+        self.headway = config.car_length + config.safe_distance
+        self.lane_suffixes = lane_suffixes(config.lanes_per_direction)
+
+        # Front-bumper coordinate at which a car must stop on red
+        self.stop_line = {
+            "North": self.intersection_start - config.stop_line_margin,
+            "West": self.intersection_start - config.stop_line_margin,
+            "South": self.intersection_end + config.stop_line_margin,
+            "East": self.intersection_end + config.stop_line_margin,
+        }
+
+        # Top-left corner where a car enters each lane, and the step back to
+        # the next queued position behind it. Traffic keeps right: lane "_L"
+        # is next to the centre line.
+        self.spawn = {}
+        self.queue_step = {}
+        c, lw, cl = self.center, config.lane_width, config.car_length
+        for direction in DIRECTIONS:
+            for i, suffix in enumerate(self.lane_suffixes):
+                lane_name = direction + suffix
+                if direction == "North":
+                    self.spawn[lane_name] = (c - lw * (i + 1), -cl)
+                    self.queue_step[lane_name] = (0, -self.headway)
+                elif direction == "South":
+                    self.spawn[lane_name] = (c + lw * i, config.canvas_height)
+                    self.queue_step[lane_name] = (0, self.headway)
+                elif direction == "West":
+                    self.spawn[lane_name] = (-cl, c + lw * i)
+                    self.queue_step[lane_name] = (-self.headway, 0)
+                elif direction == "East":
+                    self.spawn[lane_name] = (config.canvas_width, c - lw * (i + 1))
+                    self.queue_step[lane_name] = (self.headway, 0)
+
+        self.lane_names = list(self.spawn)
+
+        self.tables = {}
+        for direction in DIRECTIONS:
+            sign = 1 if direction in ("North", "West") else -1
+            vertical = direction in ("North", "South")
+            extent = config.canvas_height if vertical else config.canvas_width
+            box_lo = min(sign * self.intersection_start, sign * self.intersection_end)
+            box_hi = max(sign * self.intersection_start, sign * self.intersection_end)
+            self.tables[direction] = DirectionTable(
+                sign=sign,
+                vertical=vertical,
+                stop=sign * self.stop_line[direction],
+                box_enter=box_lo,
+                box_exit=box_hi + cl,
+                offscreen=(extent if sign > 0 else 0) + 10 + cl,
+            )
+
+    def queue_position(self, lane_name, index):
+        """Top-left corner of the ``index``-th car queued back from the spawn point."""
+        (x, y), (dx, dy) = self.spawn[lane_name], self.queue_step[lane_name]
+        return x + dx * index, y + dy * index
@@ -0,0 +1,132 @@
+"""Time-varying demand: hourly volume profiles, a simulated clock and Poisson arrivals.
+
+A :class:`DemandProfile` holds vehicles/hour per approach for each hour of
+the day (from a CSV with an ``hour`` column and one column per direction).
+A :class:`DemandClock` maps simulated seconds onto a time of day, optionally
+accelerated so a run can sweep a whole day. :class:`ProfileSource` feeds the
+engine Poisson arrivals at the profile's current rate, so a morning peak is
+a burst of arrivals rather than a +25 s green bias.
+"""
+import csv
+
+from . import DIRECTIONS
+from .sources import TrafficSource
+
+DAY_SECONDS = 24 * 3600
+
+# Share of the peak hourly volume in each hour, with morning and evening peaks
+DEFAULT_SHAPE = [
+    0.10, 0.06, 0.05, 0.05, 0.08, 0.20, 0.55, 0.90, 1.00, 0.75, 0.60, 0.60,
+    0.65, 0.60, 0.60, 0.70, 0.85, 1.00, 0.90, 0.65, 0.45, 0.35, 0.25, 0.15,
+]
+
+# Hours counted as the planners' "Morning" and "Evening" periods
+PERIODS = {"Morning": range(6, 10), "Evening": range(16, 20)}
+
+
+class DemandProfile:
+    """Hourly vehicles/hour per direction, interpolated linearly between hours."""
+
+    def __init__(self, hourly):
+        for d in DIRECTIONS:
+            if len(hourly.get(d, ())) != 24:
+                raise ValueError(f"Demand profile needs 24 hourly values for {d}")
+        self.hourly = {d: [float(v) for v in hourly[d]] for d in DIRECTIONS}
+
+    @classmethod
+    def from_csv(cls, path):
+        """Read a CSV with ``hour`` (0-23) plus ``North,South,East,West`` volumes."""
+        hourly = {d: [0.0] * 24 for d in DIRECTIONS}
+        seen = set()
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                hour = int(row["hour"])
+                if not 0 <= hour < 24:
+                    raise ValueError(f"Hour {hour} out of range in {path}")
+                seen.add(hour)
+                for d in DIRECTIONS:
+                    hourly[d][hour] = float(row[d])
+        if len(seen) != 24:
+            raise ValueError(f"Demand profile {path} is missing hours {sorted(set(range(24)) - seen)}")
+        return cls(hourly)
+
+    @classmethod
+    def default(cls, peak_per_hour=1800, major=("North", "South"), minor_share=0.6):
+        """Built-in double-peak profile; ``major`` approaches carry the full peak."""
+        hourly = {}
+        for d in DIRECTIONS:
+            scale = peak_per_hour * (1.0 if d in major else minor_share)
+            hourly[d] = [scale * share for share in DEFAULT_SHAPE]
+        return cls(hourly)
+
+    def rate(self, direction, time_of_day):
+        """Vehicles per second at ``time_of_day`` seconds after midnight."""
+        hours = (time_of_day % DAY_SECONDS) / 3600.0
+        hour = int(hours)
+        frac = hours - hour
+        values = self.hourly[direction]
+        per_hour = values[hour] * (1 - frac) + values[(hour + 1) % 24] * frac
+        return per_hour / 3600.0
+
+
+class DemandClock:
+    """Time of day for a simulated time, starting at ``start_hour``.
+
+    With ``speedup`` above 1 the clock runs faster than the simulation (60
+    sweeps a day in 24 simulated minutes); arrival rates stay per simulated
+    second, so each hour of the profile simply lasts a shorter time.
+    """
+
+    def __init__(self, start_hour=0.0, speedup=1.0):
+        self.start_hour = start_hour
+        self.speedup = speedup
+
+    def time_of_day(self, sim_time):
+        return (self.start_hour * 3600.0 + sim_time * self.speedup) % DAY_SECONDS
+
+    def hour(self, sim_time):
+        return int(self.time_of_day(sim_time) // 3600)
+
+    def period(self, sim_time):
+        """``"Morning"``, ``"Evening"`` or ``"Normal"``, as the planners expect."""
+        hour = self.hour(sim_time)
+        for name, hours in PERIODS.items():
+            if hour in hours:
+                return name
+        return "Normal"
+
+
+class ProfileSource(TrafficSource):
+    """Poisson arrivals following a :class:`DemandProfile` on a :class:`DemandClock`.
+
+    Each cycle's counts are the vehicles expected per direction over the next
+    ``cycle_seconds``, and the simulation's ``time_of_day`` follows the clock.
+    """
+
+    prepopulate = False
+
+    def __init__(self, profile, clock=None, cycle_seconds=150, refreshes_per_hour=12):
+        self.profile = profile
+        self.cycle_seconds = cycle_seconds
+        self.refreshes_per_hour = refreshes_per_hour
+        self.set_clock(clock or DemandClock())
+
+    def set_clock(self, clock):
+        self.clock = clock
+        # Re-read the profile rate several times per profile hour
+        self.rate_refresh_seconds = 3600.0 / clock.speedup / self.refreshes_per_hour
+
+    def counts_for_cycle(self, sim):
+        now = self.clock.time_of_day(sim.sim_time)
+        sim.time_of_day = self.clock.period(sim.sim_time)
+        return {d: round(self.profile.rate(d, now) * self.cycle_seconds) for d in DIRECTIONS}
+
+    def arrival_rate(self, sim, direction):
+        return self.profile.rate(direction, self.clock.time_of_day(sim.sim_time))
+
+    def get_state(self):
+        # The clock is part of the run, so a resumed run keeps its time of day
+        return {"start_hour": self.clock.start_hour, "speedup": self.clock.speedup}
+
+    def set_state(self, state):
+        self.set_clock(DemandClock(state["start_hour"], state["speedup"]))
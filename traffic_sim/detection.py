@@ -0,0 +1,106 @@
+"""YOLO vehicle detection helpers."""
+import time
+
+# COCO class ids treated as vehicles: car, motorcycle, bus, truck
+VEHICLE_CLASSES = (2, 3, 5, 7)
+
+# Called with the wall time (seconds) of every model inference (e.g. exporter.SimulationExporter)
+inference_listeners = []
+
+
+def load_model(model_path):
+    """Load a YOLO model, returning None if ultralytics or the weights are unavailable."""
+    try:
+        from ultralytics import YOLO
+        model = YOLO(model_path, task='detect')
+        print("YOLO model loaded successfully")
+        return model
+    except Exception as e:
+        print(f"Error loading YOLO model: {e}")
+        return None
+
+
+def detect_vehicles(model, image, conf=None, iou=None):
+    """Run the model on one image and return vehicle boxes as (x1, y1, x2, y2, confidence).
+
+    ``conf`` is the minimum detection confidence and ``iou`` the overlap above
+    which non-maximum suppression merges boxes; None keeps the model's default.
+    """
+    return detect_vehicles_batch(model, [image], conf, iou)[0]
+
+
+def detect_vehicles_batch(model, images, conf=None, iou=None):
+    """Like :func:`detect_vehicles` for several images in one model call; one box list per image."""
+    options = {name: value for name, value in (("conf", conf), ("iou", iou)) if value is not None}
+    start = time.perf_counter()
+    results = model(list(images), verbose=False, **options)
+    for listener in inference_listeners:
+        listener(time.perf_counter() - start)
+    batch = []
+    for result in results:
+        boxes = []
+        for box in result.boxes:
+            if int(box.cls[0]) in VEHICLE_CLASSES:
+                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+                boxes.append((float(x1), float(y1), float(x2), float(y2), float(box.conf[0])))
+        batch.append(boxes)
+    return batch
+
+
+def process_image_with_yolo(model, image_path, conf=None, iou=None):
+    """Count vehicles in an image file.
+
+    Returns ``(count, processed_image)`` where the processed image has the
+    detections drawn on it, or ``(None, None)`` if the model is missing or the
+    image cannot be read.
+    """
+    return process_images_with_yolo(model, [image_path], conf, iou)[0]
+
+
+def process_images_with_yolo(model, image_paths, conf=None, iou=None):
+    """:func:`process_image_with_yolo` for several files, detected in one batch."""
+    results = [(None, None)] * len(image_paths)
+    if model is None:
+        print("YOLO model is not loaded")
+        return results
+
+    import cv2
+
+    images = {}
+    for i, image_path in enumerate(image_paths):
+        image = cv2.imread(image_path)
+        if image is None:
+            print(f"Could not load image: {image_path}")
+        else:
+            images[i] = image
+    if not images:
+        return results
+
+    try:
+        batch = detect_vehicles_batch(model, images.values(), conf, iou)
+    except Exception as e:
+        print(f"YOLO processing failed: {e}")
+        return results
+
+    for (i, image), boxes in zip(images.items(), batch):
+        processed_image = image.copy()
+        for x1, y1, x2, y2, _ in boxes:
+            cv2.rectangle(processed_image, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+        results[i] = (len(boxes), processed_image)
+    return results
+
+
+def fuse_counts(counts, overlap=1.0):
+    """One approach's count from its cameras' counts (None for a camera whose detection failed).
+
+    ``overlap`` is how much the cameras' views overlap. At 1 every camera sees
+    the same vehicles, so the largest count (the view that missed fewest)
+    wins; at 0 they see disjoint stretches of road and the counts add up. In
+    between, that share of the other cameras' vehicles is taken as already
+    counted. None if every camera failed.
+    """
+    valid = [count for count in counts if count is not None]
+    if not valid:
+        return None
+    best = max(valid)
+    return int(round(best + (1 - overlap) * (sum(valid) - best)))
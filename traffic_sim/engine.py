@@ -0,0 +1,669 @@
+"""Display-independent simulation engine.
+
+Runs the same rules as the Tk scripts (spawn, car following, stop lines and
+a cyclic signal plan) with car positions held in plain Python objects, so the
+simulation can run on servers without a display. Cars may also turn; see
+:mod:`traffic_sim.movements` for paths, conflicts and phase plans.
+Time is simulated: every :meth:`Simulation.step` advances
+``config.tick_seconds``, matching the scripts' ``root.after(20, ...)`` loop at
+the default speed.
+"""
+import random
+from collections import deque
+
+from . import DIRECTIONS
+from .config import Geometry, SimConfig
+from .movements import (build_paths, lane_movements, left_turn_share, phase_durations,
+                        resolve_phase_plan, turn_ratios, validate_phase_plan)
+from .planner import get_signal_durations
+from .scheduler import ArrivalScheduler
+from .signals import SignalState
+
+GREEN = SignalState.GREEN
+YELLOW = SignalState.YELLOW
+RED = SignalState.RED
+
+
+# -----------------------------
+# Car
+# -----------------------------
+class Car:
+    """A car reduced to its progress ``s`` along its path plus a lateral offset.
+
+    Every predicate is a single comparison of ``s`` against thresholds taken
+    from the car's :class:`~traffic_sim.movements.Path` when it is activated;
+    canvas coordinates are only derived when something needs to draw the car.
+    """
+
+    __slots__ = (
+        "lane_name", "direction", "length", "width", "sign", "vertical",
+        "stop", "box_enter", "box_exit", "offscreen", "s", "lateral",
+        "is_active", "waiting_at_light", "has_passed_intersection",
+        "is_in_intersection", "has_entered_intersection", "spawn_time", "delay",
+        "spawn", "path", "movement", "signal_head", "turn_start",
+    )
+
+    def __init__(self, lane_name, geometry):
+        self.lane_name = lane_name
+        self.direction = lane_name.split("_")[0]
+        table = geometry.tables[self.direction]
+        self.sign, self.vertical = table.sign, table.vertical
+        self.stop, self.box_enter = table.stop, table.box_enter
+        self.box_exit, self.offscreen = table.box_exit, table.offscreen
+        self.turn_start = table.box_enter
+        self.length = geometry.config.car_length
+        self.width = geometry.config.car_width
+        self.spawn = geometry.spawn[lane_name]
+        self.path = None
+        self.movement = "through"
+        self.signal_head = self.direction
+        self.s = 0.0
+        self.lateral = 0.0
+        self.is_active = False
+        self.waiting_at_light = False
+        self.has_passed_intersection = False
+        self.is_in_intersection = False
+        self.has_entered_intersection = False
+        self.spawn_time = 0.0
+        self.delay = 0.0
+
+    @property
+    def orientation(self):
+        return "vertical" if self.vertical else "horizontal"
+
+    def activate(self, x=None, y=None, now=0.0, path=None):
+        """Place the car with its bounding box's top-left corner at (x, y) on ``path``."""
+        self.is_active = True
+        self.waiting_at_light = False
+        self.has_passed_intersection = False
+        self.is_in_intersection = False
+        self.has_entered_intersection = False
+        self.spawn_time = now
+        self.delay = 0.0
+
+        if path is not None:
+            self.path = path
+            self.movement = path.movement
+            self.signal_head = path.signal_head
+            self.box_exit, self.offscreen = path.box_exit, path.offscreen
+
+        if x is None or y is None:
+            x, y = self.spawn
+        along, self.lateral = (y, x) if self.vertical else (x, y)
+        self.s = along + self.length if self.sign > 0 else -along
+
+    def deactivate(self):
+        self.is_active = False
+
+    def advance(self, distance):
+        self.s += distance
+
+    def get_coords(self):
+        """Canvas bounding box (x1, y1, x2, y2), for rendering."""
+        if self.path is None or self.s - self.length <= self.turn_start:
+            if self.sign > 0:
+                a1, a2 = self.s - self.length, self.s
+            else:
+                a1, a2 = -self.s, -self.s + self.length
+            b1, b2 = self.lateral, self.lateral + self.width
+            return (b1, a1, b2, a2) if self.vertical else (a1, b1, a2, b2)
+
+        # On or past the turn: centre the box on the path, aligned with the
+        # axis closest to the current heading
+        mid = self.s - self.length / 2
+        cx, cy = self.path.point_at(mid)
+        hx, hy = self.path.heading_at(mid)
+        half_w, half_l = self.width / 2, self.length / 2
+        if abs(hx) > abs(hy):
+            return (cx - half_l, cy - half_w, cx + half_l, cy + half_w)
+        return (cx - half_w, cy - half_l, cx + half_w, cy + half_l)
+
+    def get_front_pos(self):
+        return self.sign * self.s
+
+    def get_rear_pos(self):
+        return self.sign * (self.s - self.length)
+
+    def is_offscreen(self):
+        """True once the car has driven off the far side of the canvas."""
+        return self.s > self.offscreen
+
+    def is_at_stop_line(self):
+        return self.s >= self.stop
+
+    def is_in_intersection_area(self):
+        return self.box_enter < self.s < self.box_exit
+
+    def is_past_intersection(self):
+        return self.s > self.box_exit
+
+    def distance_to_intersection(self):
+        return max(0, self.stop - self.s)
+
+
+# -----------------------------
+# Simulation
+# -----------------------------
+class Simulation:
+    """One intersection: car pool, signal cycle and the traffic source feeding it."""
+
+    def __init__(self, source, planner=get_signal_durations, time_of_day="Normal", seed=None, config=None,
+                 phase_planner=None, controller=None):
+        self.config = config or SimConfig()
+        self.geometry = Geometry(self.config)
+        self.source = source
+        # ``planner`` gives green per direction; a ``phase_planner`` (see
+        # planner.PHASE_PLANNERS) allocates per phase group and takes precedence
+        self.planner = planner
+        self.phase_planner = phase_planner
+        # A controller (e.g. mpc.MPCController) sees the whole simulation and
+        # overrides both planners
+        self.controller = controller
+        self.time_of_day = time_of_day
+        self.rng = random.Random(seed)
+
+        self.phase_plan = resolve_phase_plan(self.config)
+        self.paths = build_paths(self.geometry, lane_movements(self.geometry))
+        validate_phase_plan(self.phase_plan, self.paths)
+        self.turn_ratios = turn_ratios(self.geometry)
+        # Lanes holding traffic a permissive left must yield to
+        self.yield_lanes = {
+            key: sorted({other[0] for other in path.conflicts})
+            for key, path in self.paths.items() if path.movement == "left"
+        }
+        self.gap_distance = self.config.permissive_gap_seconds / self.config.tick_seconds * self.config.base_car_speed
+
+        self.sim_time = 0.0
+        self.active_phase = None
+        self.active_phase_index = -1
+        # Set by an external controller (e.g. rl.IntersectionEnv) to pick the
+        # next phase instead of following the plan's order
+        self.next_phase_index = None
+        self.phase_durations = {}
+        self.time_left = 0
+        self.timer_countdown = 1.0
+        # Signal heads being cleared between phases and how long that has taken
+        self.clearing_heads = ()
+        self.clearance_elapsed = 0.0
+        # Permissive lefts waiting at the stop line or in their pocket when their green ended
+        self.sneakers = set()
+        self.current_traffic_counts = {}
+        # Directions whose counts are stand-ins because detection failed (set by the source)
+        self.degraded = dict.fromkeys(DIRECTIONS, False)
+        self.current_durations = {d: 15 for d in DIRECTIONS}
+        self.direction_timers = dict(self.current_durations)
+        # Authoritative SignalState per head; listeners are called with (head, state) on every change
+        self.signal_listeners = []
+        self.lights = {}
+        for d in DIRECTIONS:
+            self.lights[d] = RED
+            self.lights[d + "_left"] = RED
+        # Arrivals come from a per-lane event queue; those that cannot enter
+        # the visible lane yet wait in its ``upstream`` queue (arrival times)
+        self.scheduler = ArrivalScheduler(self.rng)
+        self.next_rate_refresh = float("inf")
+
+        # Pools start at max_cars_per_lane and grow on demand; free_cars holds
+        # each lane's inactive cars so taking one never scans the pool
+        self.car_pool = {}
+        self.free_cars = {}
+        self.active_cars = {}
+        self.upstream = {}
+        # Lanes with arrivals waiting upstream; a dict so admission order (and
+        # with it the random path choices) is reproducible
+        self.backlog = {}
+        # Progress of a car just spawned at each lane's entry point
+        self.entry_s = {}
+        for lane_name in self.geometry.lane_names:
+            self.car_pool[lane_name] = [Car(lane_name, self.geometry) for _ in range(self.config.max_cars_per_lane)]
+            self.free_cars[lane_name] = list(self.car_pool[lane_name])
+            self.active_cars[lane_name] = []
+            self.upstream[lane_name] = deque()
+            table = self.geometry.tables[lane_name.split("_")[0]]
+            x, y = self.geometry.spawn[lane_name]
+            along = y if table.vertical else x
+            self.entry_s[lane_name] = along + self.config.car_length if table.sign > 0 else -along
+        # Cars committed past the stop line that have not yet cleared the box
+        self.box_occupants = []
+
+        # Run statistics
+        self.total_cars_passed = 0
+        self.cars_on_screen = 0
+        self.cars_passed_by_direction = {d: 0 for d in DIRECTIONS}
+        self.total_delay = 0.0
+        self.cycles = []
+        self.clearance_times = []
+        # Called with the simulation once per simulated second (e.g. metrics.MetricsRecorder)
+        self.second_listeners = []
+        self.next_second = 1.0
+        self.upstream_peak = {lane_name: 0 for lane_name in self.geometry.lane_names}
+        # Seconds during which arrivals backed up beyond the visible lane
+        self.spillback_seconds = {lane_name: 0.0 for lane_name in self.geometry.lane_names}
+
+    # --- Car lifecycle ---
+    def _choose_path(self, lane_name):
+        roll = self.rng.random()
+        for movement, ratio in self.turn_ratios[lane_name].items():
+            roll -= ratio
+            if roll < 0:
+                break
+        return self.paths[(lane_name, movement)]
+
+    def _take_car(self, lane_name):
+        """An inactive car for ``lane_name``, growing the pool if all are in use."""
+        free = self.free_cars[lane_name]
+        if free:
+            return free.pop()
+        car = Car(lane_name, self.geometry)
+        self.car_pool[lane_name].append(car)
+        return car
+
+    def _activate(self, car, x=None, y=None):
+        car.activate(x, y, now=self.sim_time, path=self._choose_path(car.lane_name))
+        lane = self.active_cars[car.lane_name]
+        lane.append(car)
+        # Keep lanes ordered front-to-back so car following looks at the real
+        # leader; a car spawned behind the rest (the usual case) is already in place
+        if len(lane) > 1 and lane[-2].s < car.s:
+            lane.sort(key=lambda c: c.s, reverse=True)
+        self.cars_on_screen += 1
+
+    def _deactivate(self, car):
+        car.deactivate()
+        self.free_cars[car.lane_name].append(car)
+        if car in self.box_occupants:
+            self.box_occupants.remove(car)
+        self.active_cars[car.lane_name].remove(car)
+        self.cars_on_screen -= 1
+        self.total_cars_passed += 1
+        self.cars_passed_by_direction[car.direction] += 1
+        self.total_delay += car.delay
+
+    def pre_populate_cars(self):
+        """Queue up cars behind the spawn point in proportion to traffic."""
+        if not self.current_traffic_counts: return
+        total_traffic = sum(self.current_traffic_counts.values())
+        if total_traffic == 0: return
+
+        for direction, count in self.current_traffic_counts.items():
+            cars_per_lane = int(8 * count / total_traffic) // len(self.geometry.lane_suffixes)
+            for lane_suffix in self.geometry.lane_suffixes:
+                lane_name = direction + lane_suffix
+                for i in range(cars_per_lane):
+                    self._activate(self._take_car(lane_name), *self.geometry.queue_position(lane_name, i))
+                    self.source.car_spawned(self, direction)
+
+    def refresh_arrival_rates(self):
+        """Redraw the arrival schedule from the source's current per-direction rates."""
+        lanes = len(self.geometry.lane_suffixes)
+        rates = {}
+        for direction in DIRECTIONS:
+            rate = self.source.arrival_rate(self, direction) / lanes
+            for suffix in self.geometry.lane_suffixes:
+                rates[direction + suffix] = rate
+        self.scheduler.set_rates(self.sim_time, rates)
+        refresh = self.source.rate_refresh_seconds
+        self.next_rate_refresh = self.sim_time + refresh if refresh else float("inf")
+
+    def attempt_to_spawn_car(self):
+        """Admit the arrivals that are due; costs nothing on ticks without one."""
+        if self.sim_time >= self.next_rate_refresh:
+            self.refresh_arrival_rates()
+        if self.scheduler.heap and self.scheduler.heap[0][0] <= self.sim_time:
+            for lane_name in self.scheduler.pop_due(self.sim_time):
+                if self.source.allow_spawn(self, lane_name.split("_")[0]):
+                    self.upstream[lane_name].append(self.sim_time)
+                    self.backlog[lane_name] = None
+        if self.backlog:
+            tick = self.config.tick_seconds
+            for lane_name in list(self.backlog):
+                self._admit_arrivals(lane_name)
+                # Only arrivals the lane could not take this tick have spilled back
+                if lane_name in self.backlog:
+                    self.spillback_seconds[lane_name] += tick
+                    self.upstream_peak[lane_name] = max(self.upstream_peak[lane_name],
+                                                        len(self.upstream[lane_name]))
+
+    def _lane_entry_free(self, lane_name):
+        """True if the last car in the lane has moved a safe distance clear of the spawn point."""
+        cars = self.active_cars[lane_name]
+        return not cars or cars[-1].s - cars[-1].length >= self.entry_s[lane_name] + self.config.safe_distance
+
+    def _admit_arrivals(self, lane_name):
+        """Spawn a pending arrival if the lane entry is clear; the rest keep waiting upstream.
+
+        Time spent waiting upstream counts towards the car's delay.
+        """
+        pending = self.upstream[lane_name]
+        if self._lane_entry_free(lane_name):
+            car = self._take_car(lane_name)
+            self._activate(car)
+            car.delay = self.sim_time - pending.popleft()
+            self.source.car_spawned(self, car.direction)
+        if not pending:
+            self.backlog.pop(lane_name, None)
+
+    def _box_conflict(self, car):
+        """True if a car on a path conflicting with ``car``'s is still in the box."""
+        conflicts = car.path.conflicts
+        for other in self.box_occupants:
+            if other.path.key in conflicts:
+                return True
+        return False
+
+    def _must_yield(self, car):
+        """True if a left turn showing a permissive green faces an oncoming car within the critical gap.
+
+        Only the front uncommitted car of each conflicting lane is checked; a
+        car there that is itself waiting on red, or turning along a path that
+        does not cross ours, does not block the turn. Lefts waiting in their
+        pocket are looked past, since the cars behind them are not held up.
+        """
+        if car.movement != "left" or self.lights[car.direction] is not GREEN:
+            return False
+        conflicts = car.path.conflicts
+        pocket = self.config.left_pocket_length
+        for lane_name in self.yield_lanes[car.path.key]:
+            for other in self.active_cars[lane_name]:
+                if other.has_entered_intersection:
+                    continue
+                if (other.path.key in conflicts and self.lights[other.signal_head] is GREEN
+                        and other.stop - other.s < self.gap_distance):
+                    return True
+                if not (pocket and other.movement == "left" and other.s >= other.stop - pocket):
+                    break
+        return False
+
+    def move_cars(self):
+        speed = self.config.base_car_speed
+        min_gap = self.geometry.headway
+        tick = self.config.tick_seconds
+        pocket = self.config.left_pocket_length
+        lights = self.lights
+        for lane_name, active_cars in self.active_cars.items():
+            leader = None
+            # Nearest left turn and nearest other car ahead, for the left-turn pocket
+            last_left = last_other = None
+            overtaken = False
+            finished = False
+            for car in active_cars:
+                s = car.s
+                move = True
+                # Inside the pocket lefts and other cars queue side by side, so
+                # a leader of the other kind there does not hold the car up
+                if (pocket and leader is not None and (leader.movement == "left") != (car.movement == "left")
+                        and leader.s >= leader.stop - pocket):
+                    leader = last_left if car.movement == "left" else last_other
+                    overtaken = True
+                # Once a leader turning onto another path has its rear in the
+                # box, the two no longer share a lane
+                if leader is not None and (leader.path is car.path or leader.s - leader.length <= leader.turn_start):
+                    gap = leader.s - s
+                    if gap < min_gap:
+                        move = False
+                    if leader.waiting_at_light and gap - leader.length < min_gap:
+                        move = False
+
+                if car.has_entered_intersection:
+                    move = True
+                    car.waiting_at_light = False
+                elif s >= car.stop:
+                    # Commit to the box only on green, with the conflict points
+                    # clear and, for permissive lefts, a gap in oncoming traffic.
+                    # A left already waiting when its green ended may still
+                    # turn during the clearance.
+                    if ((lights[car.signal_head] is GREEN and not self._box_conflict(car) and not self._must_yield(car))
+                            or (car in self.sneakers and not self._box_conflict(car))):
+                        car.has_entered_intersection = True
+                        car.waiting_at_light = False
+                        move = True
+                        self.box_occupants.append(car)
+                    else:
+                        car.waiting_at_light = True
+                        move = False
+                else:
+                    car.waiting_at_light = False
+
+                car.is_in_intersection = car.box_enter < s < car.box_exit
+                if s > car.box_exit and not car.has_passed_intersection:
+                    car.has_passed_intersection = True
+                    self.box_occupants.remove(car)
+
+                if move:
+                    car.s = s + speed
+                    finished = finished or car.s > car.offscreen
+                else:
+                    car.delay += tick
+                leader = car
+                if car.movement == "left":
+                    last_left = car
+                else:
+                    last_other = car
+
+            if overtaken:
+                active_cars.sort(key=lambda c: c.s, reverse=True)
+            if finished:
+                for car in [c for c in active_cars if c.s > c.offscreen]:
+                    self._deactivate(car)
+
+    # --- Signal control ---
+    def _set_phase(self, index):
+        """Show green for every signal head of phase ``index`` and red for the rest."""
+        self.active_phase_index = index
+        self.active_phase, heads = self.phase_plan[index]
+        for head in self.lights:
+            self._set_light(head, GREEN if head in heads else RED)
+
+    def _set_light(self, head, state):
+        if self.lights[head] is not state:
+            self.lights[head] = state
+            for listener in self.signal_listeners:
+                listener(head, state)
+
+    def _direction_greens(self):
+        """Green seconds per direction for through traffic under the current phase durations."""
+        greens = {d: 0 for d in DIRECTIONS}
+        for name, heads in self.phase_plan:
+            for d in DIRECTIONS:
+                if d in heads:
+                    greens[d] += self.phase_durations[name]
+        return greens
+
+    def _begin_clearance(self):
+        """End the active phase: heads that stop being green turn yellow.
+
+        Heads shown in the next phase too stay green, so a phase that only
+        adds movements (e.g. protected lefts into through) needs no clearance.
+        Returns False in that case.
+        """
+        next_heads = self.phase_plan[self._next_index()][1]
+        self.clearing_heads = tuple(h for h in self.phase_plan[self.active_phase_index][1] if h not in next_heads)
+        if not self.clearing_heads:
+            return False
+        for head in self.clearing_heads:
+            self._set_light(head, YELLOW)
+        self.clearance_elapsed = 0.0
+        pocket = self.config.left_pocket_length
+        self.sneakers = {
+            car for cars in self.active_cars.values() for car in cars
+            if car.movement == "left" and not car.has_entered_intersection
+            and (car.waiting_at_light or (pocket and car.s >= car.stop - pocket))
+            and car.signal_head in self.clearing_heads and car.direction in self.clearing_heads
+        }
+        return True
+
+    def _update_clearance(self):
+        """Advance yellow/all-red; returns True once the box is clear for the next phase.
+
+        Yellow lasts ``yellow_seconds``. All-red then lasts only until the
+        last car that entered on the ending heads is past the intersection,
+        capped at ``max_all_red_seconds``.
+        """
+        self.clearance_elapsed += self.config.tick_seconds
+        yellow = self.config.yellow_seconds
+        if self.clearance_elapsed < yellow:
+            return False
+        if self.lights[self.clearing_heads[0]] is YELLOW:
+            for head in self.clearing_heads:
+                self._set_light(head, RED)
+        still_clearing = any(car.signal_head in self.clearing_heads for car in self.box_occupants)
+        if still_clearing and self.clearance_elapsed < yellow + self.config.max_all_red_seconds:
+            return False
+        self.clearance_times.append(self.clearance_elapsed)
+        self.clearing_heads = ()
+        self.sneakers = set()
+        return True
+
+    def _next_index(self):
+        if self.next_phase_index is not None:
+            return self.next_phase_index
+        return (self.active_phase_index + 1) % len(self.phase_plan)
+
+    def start_new_cycle(self):
+        index = self._next_index()
+        self.next_phase_index = None
+
+        if index == 0:
+            new_counts = self.source.counts_for_cycle(self)
+            if new_counts is not None:
+                self.current_traffic_counts = dict(new_counts)
+                # Before planning, so a controller forecasting from a snapshot
+                # sees this cycle's arrival rates and queues
+                self.refresh_arrival_rates()
+                if self.source.prepopulate:
+                    self.pre_populate_cars()
+            if self.controller is not None:
+                self.phase_durations = self.controller.plan(self)
+                self.current_durations = self._direction_greens()
+            elif self.phase_planner is not None:
+                self.phase_durations = self.phase_planner(
+                    self.phase_plan, self.current_traffic_counts, self.time_of_day,
+                    left_share=left_turn_share(self.geometry))
+                self.current_durations = self._direction_greens()
+            else:
+                self.current_durations = self.planner(self.current_traffic_counts, self.time_of_day)
+                self.phase_durations = phase_durations(self.phase_plan, self.current_durations, self.geometry)
+            self.direction_timers.update(self.current_durations)
+            self.cycles.append({
+                "cycle": len(self.cycles) + 1,
+                "start_time": round(self.sim_time, 3),
+                "counts": dict(self.current_traffic_counts),
+                "durations": dict(self.current_durations),
+                "phase_durations": dict(self.phase_durations),
+            })
+
+        self._set_phase(index)
+        self.time_left = self.phase_durations[self.active_phase]
+
+    def step(self):
+        """Advance the simulation by one tick."""
+        if self.active_phase is None:
+            self.start_new_cycle()
+
+        self.sim_time += self.config.tick_seconds
+        if self.clearing_heads:
+            if self._update_clearance():
+                self.start_new_cycle()
+                self.timer_countdown = 1.0
+        else:
+            self.timer_countdown -= self.config.tick_seconds
+            if self.timer_countdown <= 0:
+                for head in self.phase_plan[self.active_phase_index][1]:
+                    if head in self.direction_timers:
+                        self.direction_timers[head] = max(0, self.direction_timers[head] - 1)
+                if self.time_left > 0:
+                    self.time_left -= 1
+                elif not self._begin_clearance():
+                    self.start_new_cycle()
+                self.timer_countdown = 1.0
+
+        self.attempt_to_spawn_car()
+        self.move_cars()
+
+        if self.sim_time >= self.next_second - 1e-9:
+            self.next_second += 1.0
+            for listener in self.second_listeners:
+                listener(self)
+
+    # --- Snapshots ---
+    def snapshot(self):
+        """Capture the mutable state (cars, signals, clocks, statistics) as plain tuples.
+
+        Paths, geometry and the traffic source are not included; restore into
+        a simulation built with the same config.
+        """
+        lanes = {}
+        for lane_name, cars in self.active_cars.items():
+            lanes[lane_name] = tuple(
+                (c.s, c.lateral, c.movement, c.waiting_at_light, c.has_passed_intersection,
+                 c.is_in_intersection, c.has_entered_intersection, c.spawn_time, c.delay,
+                 c in self.box_occupants, c in self.sneakers)
+                for c in cars)
+        signals = (self.sim_time, self.active_phase, self.active_phase_index, self.next_phase_index,
+                   dict(self.phase_durations),
+                   self.time_left, self.timer_countdown, self.clearing_heads, self.clearance_elapsed,
+                   dict(self.lights), dict(self.direction_timers), dict(self.current_durations),
+                   dict(self.current_traffic_counts), {k: tuple(v) for k, v in self.upstream.items()},
+                   dict(self.scheduler.rates), list(self.scheduler.heap), self.next_rate_refresh,
+                   self.next_second, tuple(self.backlog))
+        stats = (self.total_cars_passed, self.cars_on_screen, dict(self.cars_passed_by_direction),
+                 self.total_delay, list(self.cycles), list(self.clearance_times),
+                 dict(self.upstream_peak), dict(self.spillback_seconds),
+                 {lane_name: len(pool) for lane_name, pool in self.car_pool.items()})
+        return lanes, signals, stats, self.rng.getstate()
+
+    def restore(self, state):
+        """Return to a state captured by :meth:`snapshot`."""
+        lanes, signals, stats, rng_state = state
+        (self.sim_time, self.active_phase, self.active_phase_index, self.next_phase_index, phase_durations,
+         self.time_left, self.timer_countdown, self.clearing_heads, self.clearance_elapsed,
+         lights, direction_timers, current_durations, counts, pending,
+         arrival_rates, arrival_heap, self.next_rate_refresh, self.next_second, backlog) = signals
+        self.phase_durations = dict(phase_durations)
+        self.lights = dict(lights)
+        for head, light in self.lights.items():
+            for listener in self.signal_listeners:
+                listener(head, light)
+        self.direction_timers = dict(direction_timers)
+        self.current_durations = dict(current_durations)
+        self.current_traffic_counts = dict(counts)
+        self.upstream = {lane_name: deque(times) for lane_name, times in pending.items()}
+        # Admission order (and with it the random path draws) follows the backlog's insertion order
+        self.backlog = dict.fromkeys(backlog)
+        self.scheduler.rates = dict(arrival_rates)
+        self.scheduler.heap = list(arrival_heap)
+        (self.total_cars_passed, self.cars_on_screen, by_direction,
+         self.total_delay, cycles, clearance_times, upstream_peak, spillback_seconds, pool_sizes) = stats
+        self.cars_passed_by_direction = dict(by_direction)
+        self.cycles = list(cycles)
+        self.clearance_times = list(clearance_times)
+        self.upstream_peak = dict(upstream_peak)
+        self.spillback_seconds = dict(spillback_seconds)
+        self.rng.setstate(rng_state)
+
+        self.box_occupants = []
+        self.sneakers = set()
+        for lane_name, pool in self.car_pool.items():
+            cars = lanes.get(lane_name, ())
+            # Pools only grow, so a restored one keeps the size it had reached
+            while len(pool) < max(len(cars), pool_sizes.get(lane_name, 0)):
+                pool.append(Car(lane_name, self.geometry))
+            active = self.active_cars[lane_name] = []
+            for car, values in zip(pool, cars):
+                car.activate(now=values[7], path=self.paths[(lane_name, values[2])])
+                (car.s, car.lateral, _, car.waiting_at_light, car.has_passed_intersection,
+                 car.is_in_intersection, car.has_entered_intersection, _, car.delay, in_box, sneaker) = values
+                active.append(car)
+                if in_box:
+                    self.box_occupants.append(car)
+                if sneaker:
+                    self.sneakers.add(car)
+            for car in pool[len(cars):]:
+                car.deactivate()
+            self.free_cars[lane_name] = pool[len(cars):]
+
+    def run(self, duration):
+        """Advance ``duration`` simulated seconds."""
+        end_time = self.sim_time + duration
+        while self.sim_time < end_time - 1e-9:
+            self.step()
@@ -0,0 +1,95 @@
+"""Smoothing of per-direction vehicle counts from successive detection frames.
+
+Raw per-frame counts are noisy: a missed truck or a doubly-detected car
+changes the count, and a planner fed raw counts thrashes its green times.
+:class:`CountEstimator` keeps an exponentially weighted mean and variance
+per direction and ignores frames that disagree wildly with them.
+"""
+import math
+
+
+class CountEstimator:
+    """EWMA of counts per direction with outlier rejection.
+
+    ``alpha`` is the weight of each new frame. A count more than
+    ``outlier_sigma`` standard deviations from the mean is taken as a
+    detection glitch and ignored, unless ``max_rejections`` frames in a row
+    are rejected, in which case traffic really changed and the estimate
+    restarts from the new count. The deviation is never taken below
+    ``sqrt(mean)``, the spread of a Poisson count, so a steady run of frames
+    does not make every small change an outlier.
+
+    A failed detection (``None``) marks the direction as degraded and falls
+    back to the last good estimate or, before there is one, to the vehicles
+    ``profile`` (a :class:`~traffic_sim.demand.DemandProfile`) expects over
+    ``window_seconds`` at the given time of day.
+    """
+
+    def __init__(self, alpha=0.3, outlier_sigma=3.0, max_rejections=3, profile=None, window_seconds=150):
+        self.alpha = alpha
+        self.outlier_sigma = outlier_sigma
+        self.max_rejections = max_rejections
+        self.profile = profile
+        self.window_seconds = window_seconds
+        self.mean = {}
+        self.var = {}
+        self.rejected = {}
+        # Directions whose latest frame failed, so their estimate is a stand-in
+        self.degraded = {}
+
+    def reset(self):
+        self.mean.clear()
+        self.var.clear()
+        self.rejected.clear()
+        self.degraded.clear()
+
+    def estimate(self, direction, default=None):
+        """Current smoothed count, or ``default`` before the first frame."""
+        mean = self.mean.get(direction)
+        return default if mean is None else int(round(mean))
+
+    def historical(self, direction, time_of_day=None):
+        """Count the profile expects at ``time_of_day`` (seconds after midnight), or None without one."""
+        if self.profile is None or time_of_day is None:
+            return None
+        return int(round(self.profile.rate(direction, time_of_day) * self.window_seconds))
+
+    def update(self, direction, count, time_of_day=None):
+        """Fold in one frame's raw count (None for a failed detection); returns the estimate."""
+        self.degraded[direction] = count is None
+        if count is None:
+            return self.estimate(direction, self.historical(direction, time_of_day))
+        mean = self.mean.get(direction)
+        if mean is None:
+            self._restart(direction, count)
+            return count
+
+        diff = count - mean
+        sigma = max(math.sqrt(self.var[direction]), math.sqrt(max(mean, 1.0)))
+        if abs(diff) > self.outlier_sigma * sigma:
+            self.rejected[direction] += 1
+            if self.rejected[direction] < self.max_rejections:
+                return self.estimate(direction)
+            self._restart(direction, count)
+            return count
+
+        self.rejected[direction] = 0
+        increment = self.alpha * diff
+        self.mean[direction] = mean + increment
+        self.var[direction] = (1 - self.alpha) * (self.var[direction] + diff * increment)
+        return self.estimate(direction)
+
+    def get_state(self):
+        return {"mean": dict(self.mean), "var": dict(self.var), "rejected": dict(self.rejected),
+                "degraded": dict(self.degraded)}
+
+    def set_state(self, state):
+        self.mean = dict(state["mean"])
+        self.var = dict(state["var"])
+        self.rejected = dict(state["rejected"])
+        self.degraded = dict(state.get("degraded", {}))
+
+    def _restart(self, direction, count):
+        self.mean[direction] = float(count)
+        self.var[direction] = 0.0
+        self.rejected[direction] = 0
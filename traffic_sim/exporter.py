@@ -0,0 +1,211 @@
+"""Prometheus text-format metrics endpoint for a running simulation.
+
+Metrics are plain Python objects written only by the simulation thread and
+read by the HTTP thread when scraped, so recording takes no lock: a counter
+or gauge update is one attribute store and a histogram observation is one
+bisect plus two additions. :class:`MetricsServer` serves
+``GET /metrics`` from a daemon thread, so a scrape never blocks the Tk loop.
+
+Only the standard library is used.
+"""
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import DIRECTIONS
+from . import detection
+
+# Upper bounds (seconds) for tick and inference timings
+TICK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+INFERENCE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Metric:
+    """Counter or gauge, optionally with one label (e.g. ``direction``)."""
+
+    def __init__(self, name, help_text, kind="gauge", label=None):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label = label
+        self.values = {None: 0.0} if label is None else {}
+
+    def set(self, value, key=None):
+        self.values[key] = value
+
+    def inc(self, amount=1, key=None):
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self):
+        for key, value in list(self.values.items()):
+            labels = "" if key is None else f'{{{self.label}="{key}"}}'
+            yield f"{self.name}{labels} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram; :meth:`observe` is cheap enough to call every tick."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        counts = list(self.counts)
+        cumulative = 0
+        for bound, n in zip(self.buckets + ("+Inf",), counts):
+            cumulative += n
+            yield f'{self.name}_bucket{{le="{bound}"}} {cumulative}'
+        yield f"{self.name}_sum {self.sum}"
+        yield f"{self.name}_count {cumulative}"
+
+
+class Registry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# HTTP Server
+# -----------------------------
+class MetricsServer:
+    """Serves a registry at ``http://host:port/metrics`` from a daemon thread."""
+
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] != "/metrics":
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# -----------------------------
+# Simulation Metrics
+# -----------------------------
+class SimulationExporter:
+    """Simulation counters, gauges and timing histograms for scraping.
+
+    State gauges are refreshed once per simulated second from the engine's
+    ``second_listeners``; tick durations are recorded by stepping through
+    :meth:`step`, and YOLO inference latency by every
+    :func:`~traffic_sim.detection.detect_vehicles_batch` call (one observation
+    per batch) while the exporter is attached.
+    """
+
+    def __init__(self, sim=None, registry=None):
+        self.sim = None
+        self.registry = registry or Registry()
+        add = self.registry.add
+        self.cars_passed = add(Metric("traffic_cars_passed_total", "Cars that cleared the intersection.", "counter"))
+        self.cars_on_screen = add(Metric("traffic_cars_on_screen", "Cars on the visible road."))
+        self.queue = add(Metric("traffic_queue_vehicles", "Cars on the approach that have not entered the "
+                                "intersection, including those waiting upstream.", label="direction"))
+        self.upstream = add(Metric("traffic_upstream_queue_depth", "Arrivals waiting beyond the visible road.",
+                                   label="direction"))
+        self.inference_queue = add(Metric("traffic_yolo_inference_queue_depth", "Camera snapshots waiting for "
+                                          "YOLO inference.", label="direction"))
+        self.green = add(Metric("traffic_green_seconds", "Green time allocated this cycle.", label="direction"))
+        self.degraded = add(Metric("traffic_direction_degraded", "1 while a direction's counts are a fallback "
+                                   "because detection failed.", label="direction"))
+        self.sim_time = add(Metric("traffic_sim_time_seconds", "Simulated seconds elapsed."))
+        self.tick_seconds = add(Histogram("traffic_tick_duration_seconds", "Wall time of one engine tick.",
+                                          TICK_BUCKETS))
+        self.inference_seconds = add(Histogram("traffic_yolo_inference_seconds", "Wall time of one YOLO "
+                                               "inference call (a batch of camera images).", INFERENCE_BUCKETS))
+        detection.inference_listeners.append(self.inference_seconds.observe)
+        if sim is not None:
+            self.attach(sim)
+
+    def attach(self, sim):
+        """Export ``sim``; create the exporter first to also time detections run while building a source."""
+        self.sim = sim
+        sim.second_listeners.append(self.sample)
+        self.sample(sim)
+
+    def sample(self, sim):
+        self.cars_passed.set(sim.total_cars_passed)
+        self.cars_on_screen.set(sim.cars_on_screen)
+        self.sim_time.set(round(sim.sim_time, 3))
+        queues = dict.fromkeys(DIRECTIONS, 0)
+        upstream = dict.fromkeys(DIRECTIONS, 0)
+        for lane_name, cars in sim.active_cars.items():
+            direction = lane_name.split("_")[0]
+            waiting = len(sim.upstream[lane_name])
+            upstream[direction] += waiting
+            queues[direction] += waiting + sum(1 for car in cars if not car.has_entered_intersection)
+        pending = sim.source.pending_inferences()
+        for d in DIRECTIONS:
+            self.queue.set(queues[d], d)
+            self.upstream.set(upstream[d], d)
+            self.inference_queue.set(pending.get(d, 0), d)
+            self.green.set(sim.current_durations.get(d, 0), d)
+            self.degraded.set(int(sim.degraded[d]), d)
+
+    def step(self):
+        """Advance the simulation one tick, timing it."""
+        start = time.perf_counter()
+        self.sim.step()
+        self.tick_seconds.observe(time.perf_counter() - start)
+
+    def run(self, duration):
+        """Like :meth:`Simulation.run`, timing every tick."""
+        end_time = self.sim.sim_time + duration
+        while self.sim.sim_time < end_time - 1e-9:
+            self.step()
+
+    def close(self):
+        if self.inference_seconds.observe in detection.inference_listeners:
+            detection.inference_listeners.remove(self.inference_seconds.observe)
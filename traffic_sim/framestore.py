@@ -0,0 +1,111 @@
+"""Processed detection frames kept in memory-mapped files instead of RAM.
+
+A :class:`FrameStore` holds annotated thumbnails in one ``.npy`` array of
+fixed-size slots, plus an index array recording each slot's direction,
+timestamp, vehicle count and thumbnail size. Both are opened with
+``numpy.lib.format.open_memmap``, so frame pages are file-backed: the kernel
+can write them out and drop them, and the process heap does not grow with
+the number of frames stored. Reading a frame returns a view into the map,
+not a copy. When every slot is used the oldest frame is overwritten, which
+also bounds the files.
+Frames are identified by the sequence number :meth:`FrameStore.add` returns;
+looking up an overwritten frame gives None.
+
+Requires numpy; :meth:`FrameStore.add` also needs OpenCV to shrink frames.
+"""
+import os
+import time
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from . import DIRECTIONS
+
+# Thumbnail slot size; matches the 4x3 inch, 80 dpi inspector figure
+THUMB_HEIGHT = 240
+THUMB_WIDTH = 320
+
+INDEX_DTYPE = np.dtype([("seq", "<i8"), ("direction", "i1"), ("count", "<i4"), ("timestamp", "<f8"),
+                        ("height", "<u2"), ("width", "<u2")])
+
+
+class FrameStore:
+    """Fixed-capacity ring of BGR thumbnails backed by ``<path>.frames.npy`` and ``<path>.index.npy``.
+
+    An existing store with the same capacity and slot size is reopened, so
+    frames survive restarts.
+    """
+
+    def __init__(self, path, capacity=4096, height=THUMB_HEIGHT, width=THUMB_WIDTH):
+        self.frames_path = f"{path}.frames.npy"
+        self.index_path = f"{path}.index.npy"
+        shape = (capacity, height, width, 3)
+        if os.path.exists(self.frames_path) and os.path.exists(self.index_path):
+            self.frames = open_memmap(self.frames_path, mode="r+")
+            self.index = open_memmap(self.index_path, mode="r+")
+            if self.frames.shape != shape or self.index.shape != (capacity,):
+                raise ValueError(f"Frame store {path} has shape {self.frames.shape}, expected {shape}")
+        else:
+            self.frames = open_memmap(self.frames_path, mode="w+", dtype=np.uint8, shape=shape)
+            self.index = open_memmap(self.index_path, mode="w+", dtype=INDEX_DTYPE, shape=(capacity,))
+            self.index["seq"] = -1
+        self.capacity = capacity
+        self.next_seq = int(self.index["seq"].max()) + 1
+        self._ids = {}
+
+    def __len__(self):
+        return int((self.index["seq"] >= 0).sum())
+
+    def add(self, direction, image, count, timestamp=None):
+        """Shrink ``image`` into the oldest slot and index it; returns the frame id."""
+        frame_id = self.next_seq
+        slot = frame_id % self.capacity
+        h, w = image.shape[:2]
+        _, slot_h, slot_w, _ = self.frames.shape
+        scale = min(slot_h / h, slot_w / w, 1.0)
+        th, tw = max(1, int(h * scale)), max(1, int(w * scale))
+        if scale < 1:
+            import cv2
+            image = cv2.resize(image, (tw, th), interpolation=cv2.INTER_AREA)
+        self.frames[slot, :th, :tw] = image
+        self.index[slot] = (frame_id, DIRECTIONS.index(direction), count,
+                            time.time() if timestamp is None else timestamp, th, tw)
+        self.next_seq += 1
+        self._ids.clear()
+        return frame_id
+
+    def _entry(self, frame_id):
+        slot = frame_id % self.capacity
+        entry = self.index[slot]
+        return (slot, entry) if entry["seq"] == frame_id else (slot, None)
+
+    def frame(self, frame_id):
+        """The thumbnail as a view into the memory map, or None once overwritten."""
+        slot, entry = self._entry(frame_id)
+        if entry is None:
+            return None
+        return self.frames[slot, :entry["height"], :entry["width"]]
+
+    def info(self, frame_id):
+        """``(direction, count, timestamp)`` recorded for the frame, or None once overwritten."""
+        _, entry = self._entry(frame_id)
+        if entry is None:
+            return None
+        return DIRECTIONS[entry["direction"]], int(entry["count"]), float(entry["timestamp"])
+
+    def ids(self, direction):
+        """Ids of the stored frames for ``direction``, oldest first."""
+        if direction not in self._ids:
+            seq = self.index["seq"]
+            found = seq[(seq >= 0) & (self.index["direction"] == DIRECTIONS.index(direction))]
+            self._ids[direction] = np.sort(found).tolist()
+        return self._ids[direction]
+
+    def clear(self):
+        self.index["seq"] = -1
+        self.next_seq = 0
+        self._ids.clear()
+
+    def flush(self):
+        self.frames.flush()
+        self.index.flush()
@@ -0,0 +1,346 @@
+"""Tk front-end for the headless engine with level-of-detail rendering.
+
+The engine owns every car; the window only draws them. Rendering scales to
+thousands of vehicles:
+
+- canvas items are recycled rather than created per car, and hidden when
+  not needed;
+- past ``detail_threshold`` visible cars only bodies are drawn (no cabin);
+- cars waiting upstream of the visible road are shown as one queue-length
+  bar per approach instead of individual cars;
+- with ``--image`` (needs numpy) the whole road and every car is painted
+  into one array and shown as a single ``PhotoImage`` per frame.
+
+``--charts`` (needs numpy and matplotlib) opens a second window with live
+per-second queue, green, count and throughput charts; ``--metrics-port``
+serves Prometheus metrics from a background thread, and ``--api-port``
+(needs aiohttp) the control API of :mod:`traffic_sim.api`.
+
+Run with ``python -m traffic_sim.gui``.
+"""
+import argparse
+import time
+import tkinter as tk
+from dataclasses import replace
+from tkinter import ttk
+
+from . import DIRECTIONS
+from .config import load_config
+from .engine import Simulation
+from .exporter import MetricsServer, SimulationExporter
+from .movements import PHASE_PLANS
+from .signals import LIGHT_COLORS
+from .sources import RandomSource
+
+CAR_COLORS = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#9B59B6", "#1ABC9C", "#E74C3C", "#F39C12", "#D35400"]
+ROAD_COLOR = "gray20"
+BACKGROUND = "#4F4F4F"
+DETAIL_THRESHOLD = 200
+# Wall-clock budget per frame for engine steps, so the window stays responsive
+STEP_BUDGET_SECONDS = 0.015
+
+
+def _rgb(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+# -----------------------------
+# Canvas Rendering
+# -----------------------------
+class CanvasRenderer:
+    """Draws each car with recycled canvas rectangles, dropping cabins past the detail threshold.
+
+    A car keeps its items while it is active, so a frame only moves them;
+    items of cars that left are hidden and handed to the next new car.
+    """
+
+    def __init__(self, canvas, sim, detail_threshold=DETAIL_THRESHOLD):
+        self.canvas = canvas
+        self.sim = sim
+        self.detail_threshold = detail_threshold
+        self.bodies = {}
+        self.cabins = {}
+        self.free_bodies = []
+        self.free_cabins = []
+
+    def _take(self, free, **options):
+        if free:
+            return free.pop()
+        return self.canvas.create_rectangle(0, 0, 0, 0, outline="black", **options)
+
+    def _release(self, items, free, keep):
+        for car in [car for car in items if car not in keep]:
+            item = items.pop(car)
+            self.canvas.itemconfig(item, state=tk.HIDDEN)
+            free.append(item)
+
+    def draw(self, cars):
+        canvas = self.canvas
+        detailed = len(cars) <= self.detail_threshold
+        visible = set(cars)
+        self._release(self.bodies, self.free_bodies, visible)
+        self._release(self.cabins, self.free_cabins, visible if detailed else ())
+
+        for car in cars:
+            x1, y1, x2, y2 = car.get_coords()
+            body = self.bodies.get(car)
+            if body is None:
+                body = self.bodies[car] = self._take(self.free_bodies)
+                canvas.itemconfig(body, fill=CAR_COLORS[id(car) % len(CAR_COLORS)], state=tk.NORMAL)
+            canvas.coords(body, x1, y1, x2, y2)
+            if not detailed:
+                continue
+            cabin = self.cabins.get(car)
+            if cabin is None:
+                cabin = self.cabins[car] = self._take(self.free_cabins, fill="light gray")
+                canvas.itemconfig(cabin, state=tk.NORMAL)
+            canvas.tag_raise(cabin, body)
+            if x2 - x1 < y2 - y1:
+                canvas.coords(cabin, x1 + 2, y1 + (y2 - y1) * 0.2, x2 - 2, y1 + (y2 - y1) * 0.7)
+            else:
+                canvas.coords(cabin, x1 + (x2 - x1) * 0.2, y1 + 2, x1 + (x2 - x1) * 0.7, y2 - 2)
+
+
+# -----------------------------
+# Single-Image Rendering
+# -----------------------------
+class ImageRenderer:
+    """Paints the road and all cars into one numpy frame shown as a single ``PhotoImage``."""
+
+    def __init__(self, canvas, sim):
+        import numpy as np
+
+        self.np = np
+        self.canvas = canvas
+        self.sim = sim
+        config = sim.config
+        self.width, self.height = config.canvas_width, config.canvas_height
+        self.background = self._background()
+        self.colors = np.array([_rgb(c) for c in CAR_COLORS], dtype=np.uint8)
+        self.header = f"P6 {self.width} {self.height} 255 ".encode()
+        self.photo = tk.PhotoImage(width=self.width, height=self.height)
+        self.image_item = canvas.create_image(0, 0, image=self.photo, anchor="nw")
+        canvas.tag_lower(self.image_item)
+
+    def _background(self):
+        np = self.np
+        geometry = self.sim.geometry
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = _rgb(BACKGROUND)
+        start, end = int(geometry.intersection_start), int(geometry.intersection_end)
+        frame[:, start:end] = (51, 51, 51)
+        frame[start:end, :] = (51, 51, 51)
+        for line in (geometry.stop_line["North"], geometry.stop_line["South"]):
+            frame[int(line) - 2:int(line) + 2, start:end] = (255, 255, 255)
+            frame[start:end, int(line) - 2:int(line) + 2] = (255, 255, 255)
+        return frame
+
+    def draw(self, cars):
+        frame = self.background.copy()
+        w, h = self.width, self.height
+        colors = self.colors
+        for car in cars:
+            x1, y1, x2, y2 = car.get_coords()
+            x1, y1 = max(0, int(x1)), max(0, int(y1))
+            x2, y2 = min(w, int(x2)), min(h, int(y2))
+            if x1 < x2 and y1 < y2:
+                frame[y1:y2, x1:x2] = colors[id(car) % len(colors)]
+        self.photo.configure(data=self.header + frame.tobytes(), format="PPM")
+
+
+# -----------------------------
+# Window
+# -----------------------------
+class SimulationWindow:
+    """Engine-backed simulation window with queue bars and level-of-detail car rendering."""
+
+    def __init__(self, root, sim, image_mode=False, detail_threshold=DETAIL_THRESHOLD):
+        self.root = root
+        self.sim = sim
+        self.is_paused = False
+        self.chart = None
+        self.exporter = None
+        config = sim.config
+        geometry = sim.geometry
+        self.canvas = tk.Canvas(root, width=config.canvas_width, height=config.canvas_height, bg=BACKGROUND)
+        self.canvas.grid(row=0, column=0, rowspan=20, padx=10, pady=10)
+
+        if image_mode:
+            self.renderer = ImageRenderer(self.canvas, sim)
+        else:
+            self._draw_road()
+            self.renderer = CanvasRenderer(self.canvas, sim, detail_threshold)
+
+        c = geometry.center
+        self.canvas.create_rectangle(c - 8, c - 8, c + 8, c + 8, fill="black")
+        offsets = {"North": (0, -13), "South": (0, 13), "East": (13, 0), "West": (-13, 0)}
+        self.lights = {}
+        for d, (dx, dy) in offsets.items():
+            self.lights[d] = self.canvas.create_oval(c + dx - 7, c + dy - 7, c + dx + 7, c + dy + 7, fill="red")
+            lx, ly = c + dx * 2, c + dy * 2
+            self.lights[d + "_left"] = self.canvas.create_oval(lx - 4, ly - 4, lx + 4, ly + 4, fill="red")
+        # Lights are redrawn only when the engine reports a change
+        for head, state in sim.lights.items():
+            self.show_light(head, state)
+        sim.signal_listeners.append(self.show_light)
+
+        # Queue-length bars for cars waiting upstream of the visible road
+        self.queue_bars = {}
+        for d in DIRECTIONS:
+            bar = self.canvas.create_rectangle(0, 0, 0, 0, fill="orange", outline="")
+            text = self.canvas.create_text(0, 0, text="", fill="white", font=("Arial", 9, "bold"))
+            self.queue_bars[d] = (bar, text)
+
+        self._build_controls()
+
+    def _draw_road(self):
+        canvas, geometry, config = self.canvas, self.sim.geometry, self.sim.config
+        start, end, c = geometry.intersection_start, geometry.intersection_end, geometry.center
+        canvas.create_rectangle(start, 0, end, config.canvas_height, fill=ROAD_COLOR, outline="")
+        canvas.create_rectangle(0, start, config.canvas_width, end, fill=ROAD_COLOR, outline="")
+        for i in range(0, int(start), 25):
+            canvas.create_line(c, i, c, i + 15, fill="yellow", width=2, dash=(5, 10))
+            canvas.create_line(i, c, i + 15, c, fill="yellow", width=2, dash=(5, 10))
+        for i in range(int(end) + 10, config.canvas_width, 25):
+            canvas.create_line(c, i, c, i + 15, fill="yellow", width=2, dash=(5, 10))
+            canvas.create_line(i, c, i + 15, c, fill="yellow", width=2, dash=(5, 10))
+        sl, el = geometry.stop_line["North"], geometry.stop_line["South"]
+        canvas.create_line(start, sl, end, sl, fill="white", width=4)
+        canvas.create_line(start, el, end, el, fill="white", width=4)
+        canvas.create_line(sl, start, sl, end, fill="white", width=4)
+        canvas.create_line(el, start, el, end, fill="white", width=4)
+
+    def _build_controls(self):
+        control_frame = tk.Frame(self.root, padx=10, pady=10)
+        control_frame.grid(row=0, column=1, rowspan=20, sticky="n")
+        tk.Label(control_frame, text="Simulation Control", font=("Arial", 16, "bold")).pack(pady=10, anchor="w")
+        self.pause_button = tk.Button(control_frame, text="Pause", width=12, command=self.toggle_pause)
+        self.pause_button.pack(pady=5, fill="x")
+        tk.Label(control_frame, text="Time of Day:", font=("Arial", 12, "bold")).pack(pady=(10, 0), anchor="w")
+        self.time_of_day_var = tk.StringVar(value=self.sim.time_of_day)
+        for time_option in ["Normal", "Morning", "Evening"]:
+            ttk.Radiobutton(control_frame, text=time_option, variable=self.time_of_day_var, value=time_option,
+                            command=lambda: setattr(self.sim, "time_of_day", self.time_of_day_var.get())).pack(anchor="w")
+
+        tk.Label(control_frame, text="Time Tick Speed:", font=("Arial", 12, "bold")).pack(pady=(20, 0), anchor="w")
+        self.speed_slider = ttk.Scale(control_frame, from_=1, to=50, orient="horizontal")
+        self.speed_slider.set(1)
+        self.speed_slider.pack(fill="x", pady=5)
+
+        detail_frame = tk.Frame(control_frame, pady=10, relief="groove", borderwidth=2)
+        detail_frame.pack(pady=20, fill="x")
+        tk.Label(detail_frame, text="Simulation Details", font=("Arial", 12, "bold")).pack(anchor="w")
+        self.labels = {}
+        for key, title in [("phase", "Active Phase:"), ("time_left", "Time Left:"), ("passed", "Total Cars Passed:"),
+                           ("on_screen", "Cars on Screen:"), ("upstream", "Waiting Upstream:"),
+                           ("fps", "Frame Time:")]:
+            tk.Label(detail_frame, text=title, font=("Arial", 10)).pack(anchor="w", pady=2)
+            self.labels[key] = tk.Label(detail_frame, text="0", font=("Arial", 10))
+            self.labels[key].pack(anchor="w")
+
+    def show_light(self, head, state):
+        if head in self.lights:
+            self.canvas.itemconfig(self.lights[head], fill=LIGHT_COLORS[state])
+
+    def toggle_pause(self):
+        self.is_paused = not self.is_paused
+        self.pause_button.config(text="Resume" if self.is_paused else "Pause")
+
+    def _draw_queue_bars(self):
+        sim, geometry = self.sim, self.sim.geometry
+        c, half = geometry.center, sim.config.road_width / 4
+        width, height = sim.config.canvas_width, sim.config.canvas_height
+        for d in DIRECTIONS:
+            waiting = sum(len(sim.upstream[d + suffix]) for suffix in geometry.lane_suffixes)
+            bar, text = self.queue_bars[d]
+            length = min(geometry.intersection_start - 40, waiting * 2)
+            # Bars sit on the approach lanes at the canvas edge cars enter from
+            if d == "North":
+                box, label = (c - half - 6, 0, c - half + 6, length), (c - half, length + 10)
+            elif d == "South":
+                box, label = (c + half - 6, height - length, c + half + 6, height), (c + half, height - length - 10)
+            elif d == "West":
+                box, label = (0, c + half - 6, length, c + half + 6), (length + 18, c + half)
+            else:
+                box, label = (width - length, c - half - 6, width, c - half + 6), (width - length - 18, c - half)
+            self.canvas.coords(bar, *box)
+            self.canvas.coords(text, *label)
+            self.canvas.itemconfig(text, text=str(waiting) if waiting else "")
+            self.canvas.tag_raise(bar)
+            self.canvas.tag_raise(text)
+
+    def update(self):
+        frame_start = time.perf_counter()
+        sim = self.sim
+        if not self.is_paused:
+            # Run up to ``speed`` engine ticks, but never past the frame budget
+            step = self.exporter.step if self.exporter else sim.step
+            for _ in range(int(self.speed_slider.get())):
+                step()
+                if time.perf_counter() - frame_start > STEP_BUDGET_SECONDS:
+                    break
+
+            cars = [car for lane in sim.active_cars.values() for car in lane]
+            self.renderer.draw(cars)
+            self._draw_queue_bars()
+
+            self.labels["phase"].config(text=str(sim.active_phase))
+            self.labels["time_left"].config(text=f"{sim.time_left}s")
+            self.labels["passed"].config(text=str(sim.total_cars_passed))
+            self.labels["on_screen"].config(text=str(sim.cars_on_screen))
+            self.labels["upstream"].config(text=str(sum(len(q) for q in sim.upstream.values())))
+            self.labels["fps"].config(text=f"{(time.perf_counter() - frame_start) * 1000:.1f} ms")
+            if self.chart:
+                self.chart.refresh()
+        self.root.after(20, self.update)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m traffic_sim.gui", description=__doc__.splitlines()[0])
+    parser.add_argument("--config", help="JSON config file (see traffic_sim.config)")
+    parser.add_argument("--phase-plan", choices=sorted(PHASE_PLANS), help="signal phase plan (default: from config)")
+    parser.add_argument("--image", action="store_true", help="render each frame as one numpy image (needs numpy)")
+    parser.add_argument("--detail-threshold", type=int, default=DETAIL_THRESHOLD,
+                        help="draw car cabins only up to this many visible cars")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible runs")
+    parser.add_argument("--charts", action="store_true",
+                        help="show live time-series charts in a second window (needs numpy and matplotlib)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--api-port", type=int,
+                        help="accept pushed counts and stream events at http://127.0.0.1:PORT (needs aiohttp)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if args.phase_plan:
+        config = replace(config, phase_plan=args.phase_plan)
+
+    root = tk.Tk()
+    root.title("Continuous Flow AI Traffic Simulation")
+    source = RandomSource()
+    if args.api_port is not None:
+        from .api import ApiServer, ControlBridge, PushSource
+
+        bridge = ControlBridge()
+        source = PushSource(bridge, fallback=source)
+    sim = Simulation(source, seed=args.seed, config=config)
+    if args.api_port is not None:
+        bridge.attach(sim)
+        ApiServer(bridge, port=args.api_port).start()
+    window = SimulationWindow(root, sim, image_mode=args.image, detail_threshold=args.detail_threshold)
+    if args.charts:
+        from .charts import LiveChart
+        from .metrics import MetricsRecorder
+
+        chart_window = tk.Toplevel(root)
+        chart_window.title("Traffic Metrics")
+        window.chart = LiveChart(chart_window, MetricsRecorder(sim))
+    if args.metrics_port is not None:
+        window.exporter = SimulationExporter(sim)
+        MetricsServer(window.exporter.registry, port=args.metrics_port).start()
+    window.update()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Rationing YOLO inference across cameras under a CPU budget.
+
+Running the detector on every frame from every approach costs more CPU than
+a busy intersection can spare, and most of that work is wasted. The planner
+reads counts only when it re-plans at the start of a cycle. A count inferred
+long before then is stale by the time it is used.
+
+:class:`InferenceScheduler` caps inferences per second with a token bucket.
+It spends each inference on the direction whose count is stalest relative to
+how soon the count is needed. :func:`seconds_until_needed` gives that time
+for a running simulation: the time to the next re-plan, plus how far into the
+next cycle the direction's green starts. :class:`CameraFeedSource` replays a
+:class:`~traffic_sim.catalog.FrameCatalog` as live camera feeds and infers
+only what the scheduler allows.
+"""
+import math
+
+from . import DIRECTIONS
+from .detection import fuse_counts, process_images_with_yolo
+from .estimation import CountEstimator
+from .sources import TrafficSource
+
+
+class InferenceScheduler:
+    """Token-bucket cap of ``max_per_second`` inferences, spent on the most overdue direction.
+
+    A direction's priority is the seconds since it was last inferred, divided
+    by one plus the seconds until its count is next needed. A direction that
+    has never been inferred goes first. Up to ``burst`` inferences (default:
+    one second's worth) can be saved up while nothing is due.
+    """
+
+    def __init__(self, max_per_second=2.0, burst=None):
+        if max_per_second <= 0:
+            raise ValueError("max_per_second must be positive")
+        self.max_per_second = max_per_second
+        self.burst = burst if burst is not None else max(1.0, max_per_second)
+        self.tokens = self.burst
+        self.last_refill = None
+        self.last_inferred = {}
+
+    def reset(self):
+        self.tokens = self.burst
+        self.last_refill = None
+        self.last_inferred.clear()
+
+    def _refill(self, now):
+        if self.last_refill is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.max_per_second)
+        self.last_refill = now
+
+    def priority(self, direction, now, needed_in):
+        last = self.last_inferred.get(direction)
+        if last is None:
+            return math.inf
+        return (now - last) / (1.0 + max(0.0, needed_in))
+
+    def choose(self, now, needed_in, candidates=None):
+        """Spend one inference on the direction to infer at ``now``; None if over the cap or nothing is due.
+
+        ``needed_in`` maps each direction to the seconds until its count is
+        next used. ``candidates`` limits the choice, e.g. to directions with a
+        frame not yet inferred.
+        """
+        self._refill(now)
+        candidates = list(needed_in if candidates is None else candidates)
+        # Tolerate float drift in simulated time, so a token due at ``now`` is available
+        if self.tokens < 1 - 1e-9 or not candidates:
+            return None
+        direction = max(candidates, key=lambda d: (self.priority(d, now, needed_in[d]), -needed_in[d]))
+        self.tokens -= 1
+        self.last_inferred[direction] = now
+        return direction
+
+    def get_state(self):
+        return {"tokens": self.tokens, "last_refill": self.last_refill, "last_inferred": dict(self.last_inferred)}
+
+    def set_state(self, state):
+        self.tokens = state["tokens"]
+        self.last_refill = state["last_refill"]
+        self.last_inferred = dict(state["last_inferred"])
+
+
+def seconds_until_needed(sim):
+    """Seconds until each direction's count is next used by ``sim``'s planner.
+
+    That is the time left in the current cycle, plus the offset of the
+    direction's first green phase within a cycle, using the current phase
+    durations as an estimate of the next cycle's.
+    """
+    plan = sim.phase_plan
+    durations = sim.phase_durations
+    index = sim.active_phase_index
+    remaining = 0.0
+    if index >= 0:
+        remaining = sim.time_left + sum(durations.get(name, 0) for name, _ in plan[index + 1:])
+    needed = {}
+    offset = 0.0
+    for name, heads in plan:
+        for d in DIRECTIONS:
+            if d in heads and d not in needed:
+                needed[d] = remaining + offset
+        offset += durations.get(name, 0)
+    for d in DIRECTIONS:
+        needed.setdefault(d, remaining)
+    return needed
+
+
+class CameraFeedSource(TrafficSource):
+    """Replays a frame catalog as live camera feeds, inferring only what ``scheduler`` allows.
+
+    Simulated time ``t`` shows each camera's latest frame taken by
+    ``origin + t`` (default: the catalog's earliest timestamp). Each simulated
+    second and at every re-plan, directions with a frame not yet inferred
+    compete for the scheduler's budget. The chosen direction's cameras are
+    detected in one batch and their counts fused. Counts pass through
+    ``estimator``, so a direction not yet inferred, or whose detection failed,
+    runs on its fallback and is flagged in ``sim.degraded``.
+
+    Call :meth:`attach` once the simulation exists, to infer between re-plans
+    as well.
+    """
+
+    def __init__(self, catalog, model, scheduler=None, estimator=None, clock=None, conf=None, iou=None,
+                 camera_overlap=1.0, camera_sync_seconds=1.0, origin=None):
+        self.catalog = catalog
+        self.model = model
+        self.scheduler = scheduler or InferenceScheduler()
+        self.estimator = estimator or CountEstimator(alpha=1.0, outlier_sigma=float("inf"))
+        self.clock = clock
+        self.conf = conf
+        self.iou = iou
+        self.camera_overlap = camera_overlap
+        self.camera_sync_seconds = camera_sync_seconds
+        if origin is None:
+            origin = min((timestamps[0] for timestamps in catalog.timestamps.values() if timestamps), default=0.0)
+        self.origin = origin
+        # Timestamp of the newest frame inferred per direction
+        self.seen = {}
+        self.inferences = 0
+        # Directions whose newest frame the last poll left uninferred, over budget
+        self.pending = set()
+
+    def attach(self, sim):
+        sim.second_listeners.append(self.poll)
+
+    def _snapshot(self, direction, at):
+        """Each camera's latest frame, dropping any more than ``camera_sync_seconds`` older than the newest."""
+        frames = [self.catalog.latest_frame(direction, at, camera) for camera in self.catalog.cameras(direction)]
+        frames = [frame for frame in frames if frame is not None]
+        if not frames:
+            return []
+        newest = max(frame.timestamp for frame in frames)
+        return [frame for frame in frames if newest - frame.timestamp <= self.camera_sync_seconds]
+
+    def _time_of_day(self, sim):
+        return self.clock.time_of_day(sim.sim_time) if self.clock is not None else None
+
+    def poll(self, sim):
+        """Run the inferences the scheduler allows at ``sim``'s current time."""
+        at = self.origin + sim.sim_time
+        snapshots = {}
+        for d in DIRECTIONS:
+            latest = self.catalog.latest_frame(d, at)
+            if latest is not None and latest.timestamp > self.seen.get(d, -math.inf):
+                snapshots[d] = self._snapshot(d, at)
+        needed_in = seconds_until_needed(sim)
+        while snapshots:
+            direction = self.scheduler.choose(sim.sim_time, needed_in, snapshots)
+            if direction is None:
+                break
+            snapshot = snapshots.pop(direction)
+            results = process_images_with_yolo(self.model, [frame.path for frame in snapshot], self.conf, self.iou)
+            self.inferences += 1
+            self.seen[direction] = max(frame.timestamp for frame in snapshot)
+            self.estimator.update(direction, fuse_counts([count for count, _ in results], self.camera_overlap),
+                                  self._time_of_day(sim))
+        self.pending = set(snapshots)
+
+    def pending_inferences(self):
+        return {d: int(d in self.pending) for d in DIRECTIONS}
+
+    def counts_for_cycle(self, sim):
+        self.poll(sim)
+        counts = {}
+        for d in DIRECTIONS:
+            estimate = self.estimator.estimate(d)
+            if estimate is None:
+                estimate = self.estimator.update(d, None, self._time_of_day(sim))
+            sim.degraded[d] = self.estimator.degraded.get(d, False)
+            counts[d] = estimate or 0
+        return counts
+
+    def get_state(self):
+        return {"seen": self.seen, "inferences": self.inferences, "scheduler": self.scheduler.get_state(),
+                "estimator": self.estimator.get_state()}
+
+    def set_state(self, state):
+        self.seen = dict(state["seen"])
+        self.inferences = state["inferences"]
+        self.scheduler.set_state(state["scheduler"])
+        self.estimator.set_state(state["estimator"])
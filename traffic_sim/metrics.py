@@ -0,0 +1,110 @@
+"""Per-second time series kept in fixed-capacity numpy ring buffers.
+
+:class:`MetricsRecorder` samples a running simulation once per simulated
+second (queue per approach, cars passed, green allocation, detector count
+and whether that count is a fallback) into a :class:`RingBuffer`. Memory is
+fixed at construction: after ``capacity`` samples the oldest are overwritten,
+so a multi-day run costs no more than the window it keeps. A day of 1 s
+samples takes 8 bytes per column per second, about 0.7 MB for each of the
+``COLUMNS``.
+
+Requires numpy.
+"""
+import csv
+
+import numpy as np
+
+from . import DIRECTIONS
+
+
+class RingBuffer:
+    """Fixed-size table of float rows; appends overwrite the oldest row once full."""
+
+    def __init__(self, capacity, columns):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.data = np.zeros((capacity, len(self.columns)))
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _ordered(self, rows):
+        """Oldest-to-newest view of the stored rows (a copy only once the buffer has wrapped)."""
+        if self.size < self.capacity:
+            return rows[:self.size]
+        return np.concatenate([rows[self.head:], rows[:self.head]])
+
+    def column(self, name):
+        return self._ordered(self.data[:, self.index[name]])
+
+    def table(self):
+        return self._ordered(self.data)
+
+    def latest(self, name):
+        if not self.size:
+            return None
+        return self.data[(self.head - 1) % self.capacity, self.index[name]]
+
+
+# -----------------------------
+# Simulation Metrics
+# -----------------------------
+COLUMNS = (["time", "passed"] + [f"queue_{d}" for d in DIRECTIONS]
+           + [f"green_{d}" for d in DIRECTIONS] + [f"count_{d}" for d in DIRECTIONS]
+           + [f"degraded_{d}" for d in DIRECTIONS] + ["upstream"])
+
+
+class MetricsRecorder:
+    """Samples a simulation once per simulated second into a :class:`RingBuffer`.
+
+    ``queue_<direction>`` counts cars on the approach that have not entered
+    the intersection, including those waiting upstream; ``passed`` is cars
+    that cleared the intersection during the second; ``green_<direction>`` is
+    the direction's green for the current cycle and ``count_<direction>`` the
+    detector count it was planned from; ``degraded_<direction>`` is 1 while
+    that count is a fallback because detection failed.
+    """
+
+    def __init__(self, sim, capacity=24 * 3600):
+        self.buffer = RingBuffer(capacity, COLUMNS)
+        self.last_passed = sim.total_cars_passed
+        self.row = np.zeros(len(COLUMNS))
+        sim.second_listeners.append(self.sample)
+
+    def sample(self, sim):
+        row = self.row
+        row[0] = sim.sim_time
+        row[1] = sim.total_cars_passed - self.last_passed
+        self.last_passed = sim.total_cars_passed
+
+        queues = dict.fromkeys(DIRECTIONS, 0)
+        for lane_name, cars in sim.active_cars.items():
+            direction = lane_name.split("_")[0]
+            queues[direction] += len(sim.upstream[lane_name])
+            for car in cars:
+                if not car.has_entered_intersection:
+                    queues[direction] += 1
+        upstream = sum(len(times) for times in sim.upstream.values())
+
+        n = len(DIRECTIONS)
+        for i, d in enumerate(DIRECTIONS):
+            row[2 + i] = queues[d]
+            row[2 + n + i] = sim.current_durations.get(d, 0)
+            row[2 + 2 * n + i] = sim.current_traffic_counts.get(d, 0)
+            row[2 + 3 * n + i] = sim.degraded[d]
+        row[-1] = upstream
+        self.buffer.append(row)
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.buffer.columns)
+            writer.writerows(self.buffer.table().tolist())
@@ -0,0 +1,270 @@
+"""Turning movements: paths through the intersection, conflicts and phase plans.
+
+Every lane feeds one or more movements (``through``, ``left`` from the
+innermost lane, ``right`` from the outermost). A :class:`Path` describes where
+a car on that movement is for a given progress ``s``: straight along its
+approach, a quarter-circle through the box for turns, then straight along the
+exit leg. Two paths conflict when their in-box sections come closer than a
+car width, and a car may only commit to the box when no car on a conflicting
+path is still inside it.
+"""
+import math
+
+from . import DIRECTIONS
+
+MOVEMENTS = ("left", "through", "right")
+
+# Direction whose lanes a turning car joins (named by where those cars come from)
+LEFT_EXIT = {"North": "West", "South": "East", "West": "South", "East": "North"}
+RIGHT_EXIT = {"North": "East", "South": "West", "West": "North", "East": "South"}
+
+# Phase plans: each phase is (name, signal heads shown green). A head is the
+# direction itself for through/right traffic, or "<direction>_left" for the
+# left-turn arrow.
+PHASE_PLANS = {
+    # One approach at a time, as in the original scripts
+    "split": [
+        ("North", ("North", "North_left")),
+        ("South", ("South", "South_left")),
+        ("East", ("East", "East_left")),
+        ("West", ("West", "West_left")),
+    ],
+    # Opposing approaches together, lefts permissive (yielding to oncoming cars)
+    "concurrent": [
+        ("NS_through", ("North", "South", "North_left", "South_left")),
+        ("EW_through", ("East", "West", "East_left", "West_left")),
+    ],
+    # Protected lefts for each axis, then both opposing through movements
+    # together with permissive lefts that yield to oncoming cars
+    "protected_left": [
+        ("NS_left", ("North_left", "South_left")),
+        ("NS_through", ("North", "South", "North_left", "South_left")),
+        ("EW_left", ("East_left", "West_left")),
+        ("EW_through", ("East", "West", "East_left", "West_left")),
+    ],
+}
+
+MIN_PHASE_GREEN = 5
+# A left-arrow-only phase just empties the left-turn pockets
+MIN_LEFT_GREEN = 3
+
+
+def signal_head(direction, movement):
+    return direction + "_left" if movement == "left" else direction
+
+
+def resolve_phase_plan(config):
+    """The configured ``phase_groups`` if any, otherwise the named ``phase_plan``."""
+    if config.phase_groups:
+        return [(name, tuple(heads)) for name, heads in config.phase_groups]
+    if config.phase_plan not in PHASE_PLANS:
+        raise ValueError(f"Unknown phase plan {config.phase_plan!r}; choose from {', '.join(PHASE_PLANS)}")
+    return PHASE_PLANS[config.phase_plan]
+
+
+def validate_phase_plan(plan, paths):
+    """Reject phases that show green to conflicting movements at the same time.
+
+    A left arrow shown alongside its own approach's through head is permissive:
+    those cars yield at the box, so its conflicts with oncoming traffic are
+    allowed. Every other pair of heads in a phase must be conflict-free.
+    """
+    heads = {signal_head(p.direction, p.movement) for p in paths.values()}
+    for name, phase_heads in plan:
+        unknown = set(phase_heads) - heads
+        if unknown:
+            raise ValueError(f"Phase {name!r} has unknown signal heads: {', '.join(sorted(unknown))}")
+        protected = [h for h in phase_heads if not (h.endswith("_left") and h.split("_")[0] in phase_heads)]
+        for i, head_a in enumerate(protected):
+            for head_b in protected[i + 1:]:
+                keys_b = {p.key for p in paths.values() if p.signal_head == head_b}
+                for path in paths.values():
+                    if path.signal_head == head_a and path.conflicts & keys_b:
+                        raise ValueError(f"Phase {name!r} gives conflicting movements {head_a} and {head_b} green together")
+
+
+def _heading(table):
+    """Unit vector of travel for a direction table."""
+    return (0, table.sign) if table.vertical else (table.sign, 0)
+
+
+class Path:
+    """A car's route for one (lane, movement) pair, parameterised by progress ``s``."""
+
+    def __init__(self, geometry, lane_name, movement, exit_lane=None):
+        config = geometry.config
+        self.lane_name = lane_name
+        self.direction = lane_name.split("_")[0]
+        self.movement = movement
+        self.key = (lane_name, movement)
+        self.signal_head = signal_head(self.direction, movement)
+        self.length = config.car_length
+        self.conflicts = frozenset()
+
+        table = geometry.tables[self.direction]
+        self.h0 = _heading(table)
+        # Lateral coordinate of the car's centre line on the approach
+        spawn_x, spawn_y = geometry.spawn[lane_name]
+        self.lateral = (spawn_x if table.vertical else spawn_y) + config.car_width / 2
+        self.turn_start = table.box_enter
+        self.stop = table.stop
+
+        if exit_lane is None:
+            self.radius = 0.0
+            self.arc_length = 0.0
+            self.box_exit = table.box_exit
+            self.offscreen = table.offscreen
+            self.h1 = self.h0
+            return
+
+        exit_direction = exit_lane.split("_")[0]
+        exit_table = geometry.tables[exit_direction]
+        self.h1 = _heading(exit_table)
+        ex_x, ex_y = geometry.spawn[exit_lane]
+        exit_lateral = (ex_x if exit_table.vertical else ex_y) + config.car_width / 2
+
+        # The arc leaves the approach tangentially and meets the exit lane's
+        # centre line tangentially, so the radius is the lateral offset to it
+        self.radius = table.sign * exit_lateral - self.turn_start
+        if self.radius <= 0:
+            raise ValueError(f"{lane_name} cannot turn {movement} into {exit_lane}")
+        self.arc_length = self.radius * math.pi / 2
+
+        ex, ey = self.point_at(self.turn_start)
+        self.center = (ex + self.radius * self.h1[0], ey + self.radius * self.h1[1])
+        self.exit_point = (self.center[0] + self.radius * self.h0[0], self.center[1] + self.radius * self.h0[1])
+
+        # Distance along the exit leg from the arc's end to the far box edge
+        # and to the canvas edge
+        exit_along = self.exit_point[1] if exit_table.vertical else self.exit_point[0]
+        box_edge = geometry.intersection_end if exit_table.sign > 0 else geometry.intersection_start
+        canvas_edge = (config.canvas_height if exit_table.vertical else config.canvas_width) if exit_table.sign > 0 else 0
+        to_box_edge = max(0.0, (box_edge - exit_along) * exit_table.sign)
+        to_canvas_edge = (canvas_edge - exit_along) * exit_table.sign
+
+        arc_end = self.turn_start + self.arc_length
+        self.box_exit = arc_end + to_box_edge + self.length
+        self.offscreen = arc_end + to_canvas_edge + 10 + self.length
+
+    def point_at(self, s):
+        """Canvas position of the point reached at progress ``s``."""
+        s0 = self.turn_start
+        if s <= s0 or self.arc_length == 0.0:
+            if self.h0[0]:
+                return (self.h0[0] * s, self.lateral)
+            return (self.lateral, self.h0[1] * s)
+
+        u = s - s0
+        cx, cy = self.center
+        r = self.radius
+        if u <= self.arc_length:
+            theta = u / r
+            c, sn = math.cos(theta), math.sin(theta)
+            return (cx + r * (-self.h1[0] * c + self.h0[0] * sn),
+                    cy + r * (-self.h1[1] * c + self.h0[1] * sn))
+
+        beyond = u - self.arc_length
+        return (self.exit_point[0] + self.h1[0] * beyond, self.exit_point[1] + self.h1[1] * beyond)
+
+    def heading_at(self, s):
+        u = s - self.turn_start
+        if u <= 0 or self.arc_length == 0.0:
+            return self.h0
+        if u >= self.arc_length:
+            return self.h1
+        theta = u / self.radius
+        c, sn = math.cos(theta), math.sin(theta)
+        return (self.h0[0] * c + self.h1[0] * sn, self.h0[1] * c + self.h1[1] * sn)
+
+    def box_points(self, samples=24):
+        """Sample centre-line points of the in-box section."""
+        start, end = self.turn_start, self.box_exit - self.length
+        return [self.point_at(start + (end - start) * i / (samples - 1)) for i in range(samples)]
+
+
+def build_paths(geometry, lane_movements):
+    """Create every :class:`Path` and fill in each path's conflict set."""
+    paths = {}
+    for lane_name, movements in lane_movements.items():
+        direction = lane_name.split("_")[0]
+        for movement in movements:
+            if movement == "through":
+                exit_lane = None
+            elif movement == "left":
+                exit_lane = LEFT_EXIT[direction] + geometry.lane_suffixes[0]
+            else:
+                exit_lane = RIGHT_EXIT[direction] + geometry.lane_suffixes[-1]
+            paths[(lane_name, movement)] = Path(geometry, lane_name, movement, exit_lane)
+
+    clearance = geometry.config.car_width
+    sampled = {key: path.box_points() for key, path in paths.items()}
+    for key, path in paths.items():
+        conflicts = set()
+        for other_key, other in paths.items():
+            if other.direction == path.direction:
+                continue
+            if _min_distance(sampled[key], sampled[other_key]) < clearance:
+                conflicts.add(other_key)
+        path.conflicts = frozenset(conflicts)
+    return paths
+
+
+def _min_distance(points_a, points_b):
+    return min(math.hypot(ax - bx, ay - by) for ax, ay in points_a for bx, by in points_b)
+
+
+def lane_movements(geometry):
+    """Movements each lane serves: lefts from the inner lane, rights from the outer one."""
+    suffixes = geometry.lane_suffixes
+    result = {}
+    for direction in DIRECTIONS:
+        for i, suffix in enumerate(suffixes):
+            movements = ["through"]
+            if i == 0:
+                movements.append("left")
+            if i == len(suffixes) - 1:
+                movements.append("right")
+            result[direction + suffix] = movements
+    return result
+
+
+def turn_ratios(geometry):
+    """Per-lane movement probabilities from the configured left/right ratios."""
+    config = geometry.config
+    ratios = {}
+    for lane_name, movements in lane_movements(geometry).items():
+        lane_ratios = {}
+        if "left" in movements:
+            lane_ratios["left"] = config.left_turn_ratio
+        if "right" in movements:
+            lane_ratios["right"] = config.right_turn_ratio
+        lane_ratios["through"] = max(0.0, 1.0 - sum(lane_ratios.values()))
+        ratios[lane_name] = lane_ratios
+    return ratios
+
+
+def left_turn_share(geometry):
+    """Fraction of an approach's traffic that turns left (left lane share times left ratio)."""
+    return geometry.config.left_turn_ratio / len(geometry.lane_suffixes)
+
+
+def phase_durations(plan, durations, geometry):
+    """Green time per phase from the planner's per-direction durations.
+
+    A phase gets the longest green among the directions it serves. A
+    left-arrow-only phase serves just the left-turning share of a direction's
+    traffic, so its green is scaled down accordingly (to no less than
+    ``MIN_LEFT_GREEN``).
+    """
+    left_share = left_turn_share(geometry)
+    result = {}
+    for name, heads in plan:
+        green = 0
+        left_only = True
+        for head in heads:
+            direction = head.split("_")[0]
+            share = left_share if direction not in heads else 1.0
+            left_only = left_only and direction not in heads
+            green = max(green, durations.get(direction, 0) * share)
+        result[name] = max(MIN_LEFT_GREEN if left_only else MIN_PHASE_GREEN, int(round(green)))
+    return result
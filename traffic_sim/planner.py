@@ -0,0 +1,89 @@
+"""Green-time planners for the signal controller."""
+from . import DIRECTIONS
+
+
+def get_signal_durations(traffic, time_of_day, arrival_rates=None,
+                         min_d=15, max_d=60, total_cycle=150):
+    """Split one cycle's green time across directions.
+
+    ``traffic`` is the number of vehicles queued (or visible) per direction.
+    When ``arrival_rates`` (vehicles/minute per direction) are given, the
+    demand for a direction is its queue plus the vehicles expected to arrive
+    during one cycle, so a short queue on a busy approach still earns green.
+    """
+    demand = dict(traffic)
+    if arrival_rates:
+        for d, rate in arrival_rates.items():
+            demand[d] = demand.get(d, 0) + rate * total_cycle / 60.0
+
+    total_demand = sum(demand.values())
+    if total_demand == 0: return {d: min_d for d in DIRECTIONS}
+
+    durations = {}
+    for d, count in demand.items():
+        durations[d] = max(min_d, min(max_d, int((count / total_demand) * total_cycle)))
+
+    if time_of_day == "Morning":
+        for d in ["North", "South"]: durations[d] = min(max_d, durations[d] + 25)
+    elif time_of_day == "Evening":
+        for d in ["East", "West"]: durations[d] = min(max_d, durations[d] + 25)
+    return durations
+
+
+def get_compact_durations(traffic, time_of_day, min_d=5, max_d=11):
+    """Short 5-11 s greens scaled by traffic share, as in ``yolo12.py``."""
+    total_traffic = sum(traffic.values())
+    if total_traffic == 0: return {d: min_d for d in DIRECTIONS}
+    return {d: round(min_d + count / total_traffic * (max_d - min_d)) for d, count in traffic.items()}
+
+
+def get_fixed_durations(traffic, time_of_day, duration=30):
+    """Fixed-time baseline that ignores traffic."""
+    return {d: duration for d in DIRECTIONS}
+
+
+def get_phase_durations(phases, traffic, time_of_day, left_share=0.1, arrival_rates=None,
+                        min_g=15, max_g=60, min_left=3, total_cycle=150):
+    """Split one cycle's green time across phase groups rather than directions.
+
+    ``phases`` is a list of ``(name, signal heads)``. Movements in the same
+    phase run concurrently, so a phase needs as much green as its busiest
+    approach: its demand is the largest among the directions it serves, where
+    an approach only shown a left arrow contributes its left-turning share.
+    """
+    demand = dict(traffic)
+    if arrival_rates:
+        for d, rate in arrival_rates.items():
+            demand[d] = demand.get(d, 0) + rate * total_cycle / 60.0
+
+    phase_demand = {}
+    left_only = {}
+    for name, heads in phases:
+        served = {h.split("_")[0] for h in heads}
+        through = {d for d in served if d in heads}
+        phase_demand[name] = max(demand.get(d, 0) * (1.0 if d in through else left_share) for d in served)
+        left_only[name] = not through
+
+    total_demand = sum(phase_demand.values())
+    durations = {}
+    for name, _ in phases:
+        low = min_left if left_only[name] else min_g
+        share = phase_demand[name] / total_demand if total_demand else 0
+        durations[name] = max(low, min(max_g, int(share * total_cycle)))
+
+    boosted = {"Morning": ("North", "South"), "Evening": ("East", "West")}.get(time_of_day, ())
+    for name, heads in phases:
+        if not left_only[name] and any(d in heads for d in boosted):
+            durations[name] = min(max_g, durations[name] + 25)
+    return durations
+
+
+PHASE_PLANNERS = {
+    "phase": get_phase_durations,
+}
+
+PLANNERS = {
+    "proportional": get_signal_durations,
+    "compact": get_compact_durations,
+    "fixed": get_fixed_durations,
+}
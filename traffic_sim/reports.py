@@ -0,0 +1,58 @@
+"""Run summaries for headless simulations, written as JSON or CSV."""
+import csv
+import json
+
+from . import DIRECTIONS
+
+
+def build_report(sim):
+    """Summarise throughput, delay and per-cycle green times for a finished run."""
+    hours = sim.sim_time / 3600.0
+    passed = sim.total_cars_passed
+    return {
+        "sim_seconds": round(sim.sim_time, 3),
+        "throughput": {
+            "total_cars_passed": passed,
+            "cars_per_hour": round(passed / hours, 2) if hours > 0 else 0.0,
+            "by_direction": dict(sim.cars_passed_by_direction),
+        },
+        "delay": {
+            "total_seconds": round(sim.total_delay, 3),
+            "average_seconds": round(sim.total_delay / passed, 3) if passed else 0.0,
+        },
+        "clearance": {
+            "changes": len(sim.clearance_times),
+            "average_seconds": round(sum(sim.clearance_times) / len(sim.clearance_times), 3) if sim.clearance_times else 0.0,
+            "total_seconds": round(sum(sim.clearance_times), 3),
+        },
+        "queues": {
+            "upstream_now": {lane: len(times) for lane, times in sim.upstream.items()},
+            "upstream_peak": dict(sim.upstream_peak),
+            "spillback_seconds": {lane: round(t, 3) for lane, t in sim.spillback_seconds.items()},
+            "pool_size": {lane: len(pool) for lane, pool in sim.car_pool.items()},
+        },
+        "cars_on_screen": sim.cars_on_screen,
+        "degraded": [d for d in DIRECTIONS if sim.degraded[d]],
+        "cycles": sim.cycles,
+    }
+
+
+def write_json(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def write_csv(report, path):
+    """One row per signal cycle with the counts and green time for each direction."""
+    fieldnames = ["cycle", "start_time"]
+    fieldnames += [f"{d.lower()}_count" for d in DIRECTIONS]
+    fieldnames += [f"{d.lower()}_green" for d in DIRECTIONS]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for cycle in report["cycles"]:
+            row = {"cycle": cycle["cycle"], "start_time": cycle["start_time"]}
+            for d in DIRECTIONS:
+                row[f"{d.lower()}_count"] = cycle["counts"].get(d, 0)
+                row[f"{d.lower()}_green"] = cycle["durations"].get(d, 0)
+            writer.writerow(row)
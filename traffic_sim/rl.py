@@ -0,0 +1,244 @@
+"""Gymnasium environments for learning signal control.
+
+Two environments share one observation and action layout, so a policy
+trained on the fast one can be evaluated on the detailed one:
+
+- :class:`IntersectionEnv` drives the full headless engine. Good for
+  evaluation, but every decision simulates hundreds of ticks.
+- :class:`QueueVectorEnv` is a point-queue model of many intersections held
+  in numpy arrays and stepped together, fast enough (hundreds of thousands
+  of environment steps per second) for training on a CPU.
+
+Observation: vehicles queued per signal head (sorted head names, counting
+arrivals still waiting upstream of the visible lane), demand per direction,
+then a one-hot of the active phase. Action: ``(phase, green)``, the phase to
+show next and an index into :data:`GREEN_CHOICES`. Reward: the negative
+vehicle-seconds of delay accrued during the step, upstream waits included.
+
+Requires ``gymnasium`` and ``numpy`` (``pip install gymnasium``).
+"""
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode
+from gymnasium.vector.utils import batch_space
+
+from . import DIRECTIONS
+from .config import Geometry, SimConfig
+from .engine import Simulation
+from .movements import left_turn_share, resolve_phase_plan, signal_head
+from .sources import RandomSource, spawn_rate
+
+GREEN_CHOICES = (5, 10, 15, 20, 30, 45, 60)
+# Share of a permissive left's capacity left over by oncoming traffic
+PERMISSIVE_FACTOR = 0.5
+
+
+def signal_heads(phase_plan):
+    return sorted({head for _, heads in phase_plan for head in heads})
+
+
+def _spaces(phase_plan):
+    size = len(signal_heads(phase_plan)) + len(DIRECTIONS) + len(phase_plan)
+    observation_space = spaces.Box(0.0, np.inf, shape=(size,), dtype=np.float32)
+    action_space = spaces.MultiDiscrete([len(phase_plan), len(GREEN_CHOICES)])
+    return observation_space, action_space
+
+
+# -----------------------------
+# Engine-backed Environment
+# -----------------------------
+class IntersectionEnv(gym.Env):
+    """The headless engine as a Gymnasium environment; one step is one phase."""
+
+    metadata = {"render_modes": []}
+
+    def __init__(self, config=None, source_factory=RandomSource, episode_seconds=3600.0):
+        self.config = config or SimConfig()
+        self.source_factory = source_factory
+        self.episode_seconds = episode_seconds
+        self.sim = None
+        self.phase_plan = resolve_phase_plan(self.config)
+        self.heads = signal_heads(self.phase_plan)
+        self.observation_space, self.action_space = _spaces(self.phase_plan)
+
+    def _delay(self):
+        # Arrivals still waiting upstream have been delayed since they arrived
+        sim = self.sim
+        return (sim.total_delay + sum(c.delay for cars in sim.active_cars.values() for c in cars)
+                + sum(sim.sim_time - t for pending in sim.upstream.values() for t in pending))
+
+    def _observation(self):
+        sim = self.sim
+        queues = dict.fromkeys(self.heads, 0)
+        for cars in sim.active_cars.values():
+            for car in cars:
+                if not car.has_entered_intersection:
+                    queues[car.signal_head] += 1
+        # Upstream arrivals have not picked a movement yet; split them by the lane's turn ratios
+        for lane_name, pending in sim.upstream.items():
+            if pending:
+                direction = lane_name.split("_")[0]
+                for movement, ratio in sim.turn_ratios[lane_name].items():
+                    queues[signal_head(direction, movement)] += len(pending) * ratio
+        phase = np.zeros(len(self.phase_plan), dtype=np.float32)
+        phase[sim.active_phase_index] = 1.0
+        demand = [sim.current_traffic_counts.get(d, 0) for d in DIRECTIONS]
+        return np.concatenate([np.array([queues[h] for h in self.heads] + demand, dtype=np.float32), phase])
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        sim_seed = int(self.np_random.integers(2 ** 31))
+        self.sim = Simulation(self.source_factory(), seed=sim_seed, config=self.config)
+        self.sim.step()
+        return self._observation(), {}
+
+    def step(self, action):
+        phase, choice = int(action[0]), int(action[1])
+        green = GREEN_CHOICES[choice]
+        sim = self.sim
+        before = self._delay()
+
+        if phase != sim.active_phase_index:
+            # End the current phase on the next tick; clearance runs as usual
+            sim.next_phase_index = phase
+            sim.time_left = 0
+            sim.timer_countdown = 0.0
+            while sim.active_phase_index != phase or sim.clearing_heads:
+                sim.step()
+        # Hold the phase for exactly ``green`` seconds
+        sim.time_left = green + 1
+        sim.run(green)
+
+        reward = before - self._delay()
+        truncated = sim.sim_time >= self.episode_seconds
+        info = {"cars_passed": sim.total_cars_passed, "sim_time": sim.sim_time}
+        return self._observation(), reward, False, truncated, info
+
+
+# -----------------------------
+# Vectorized Queue Model
+# -----------------------------
+class QueueVectorEnv(gym.vector.VectorEnv):
+    """``num_envs`` intersections as point queues, stepped together in numpy.
+
+    Each signal head discharges at the saturation flow of its lanes while
+    green (permissive lefts at :data:`PERMISSIVE_FACTOR` of that); arrivals
+    are Poisson with per-direction rates drawn at reset from the same count
+    range as :class:`~traffic_sim.sources.RandomSource` and converted with the
+    engine's spawn rule. Switching phase costs ``yellow_seconds`` of green.
+    Episodes that reach ``episode_seconds`` are reset within the same step
+    (``AutoresetMode.SAME_STEP``): their final observation and info are in
+    ``infos["final_obs"]`` and ``infos["final_info"]``, masked by
+    ``infos["_final_obs"]`` and ``infos["_final_info"]``.
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs=256, config=None, episode_seconds=3600.0, count_range=(10, 100)):
+        self.config = config or SimConfig()
+        geometry = Geometry(self.config)
+        self.num_envs = num_envs
+        self.episode_seconds = episode_seconds
+        self.count_range = count_range
+        self.phase_plan = resolve_phase_plan(self.config)
+        self.heads = signal_heads(self.phase_plan)
+        self.single_observation_space, self.single_action_space = _spaces(self.phase_plan)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        lanes = len(geometry.lane_suffixes)
+        per_lane = self.config.base_car_speed / self.config.tick_seconds / geometry.headway
+        left_share = left_turn_share(geometry)
+        n_heads, n_phases = len(self.heads), len(self.phase_plan)
+
+        # Vehicles/second each head discharges during each phase's green
+        self.capacity = np.zeros((n_phases, n_heads))
+        for p, (_, phase_heads) in enumerate(self.phase_plan):
+            for h, head in enumerate(self.heads):
+                if head not in phase_heads:
+                    continue
+                direction = head.split("_")[0]
+                if head == direction:
+                    self.capacity[p, h] = per_lane * lanes
+                elif direction in phase_heads:
+                    self.capacity[p, h] = per_lane * PERMISSIVE_FACTOR
+                else:
+                    self.capacity[p, h] = per_lane
+
+        # Share of each direction's arrivals joining each head
+        self.split = np.zeros((len(DIRECTIONS), n_heads))
+        for h, head in enumerate(self.heads):
+            d = DIRECTIONS.index(head.split("_")[0])
+            self.split[d, h] = left_share if head.endswith("_left") else 1.0 - left_share
+
+        self.green_choices = np.array(GREEN_CHOICES, dtype=np.float64)
+        self.queues = np.zeros((num_envs, n_heads))
+        self.counts = np.zeros((num_envs, len(DIRECTIONS)))
+        self.rates = np.zeros((num_envs, len(DIRECTIONS)))
+        self.phase = np.zeros(num_envs, dtype=np.int64)
+        self.time = np.zeros(num_envs)
+        self.passed = np.zeros(num_envs)
+        self._rng = np.random.default_rng()
+
+    def _reset_envs(self, mask):
+        n = int(mask.sum())
+        low, high = self.count_range
+        counts = self._rng.integers(low, high + 1, size=(n, len(DIRECTIONS))).astype(np.float64)
+        share = counts / counts.sum(axis=1, keepdims=True)
+        self.counts[mask] = counts
+        # The engine's arrival rate for these counts (TrafficSource.arrival_rate)
+        self.rates[mask] = spawn_rate(share, self.config)
+        self.queues[mask] = 0.0
+        self.phase[mask] = 0
+        self.time[mask] = 0.0
+        self.passed[mask] = 0.0
+
+    def _observation(self):
+        one_hot = np.zeros((self.num_envs, len(self.phase_plan)))
+        one_hot[np.arange(self.num_envs), self.phase] = 1.0
+        return np.concatenate([self.queues, self.counts, one_hot], axis=1).astype(np.float32)
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._observation(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        phase, green = actions[:, 0], self.green_choices[actions[:, 1]]
+        switching = phase != self.phase
+        lost = np.where(switching, self.config.yellow_seconds, 0.0)
+        duration = green + lost
+
+        arrivals = self._rng.poisson((self.rates * duration[:, None]) @ self.split)
+        served = np.minimum(self.queues + arrivals, self.capacity[phase] * green[:, None])
+        start = self.queues
+        self.queues = start + arrivals - served
+        # Trapezoid over the step: every queued vehicle accrues delay
+        rewards = -((start + self.queues) / 2.0).sum(axis=1) * duration
+
+        self.phase = phase
+        self.time += duration
+        self.passed += served.sum(axis=1)
+        truncated = self.time >= self.episode_seconds
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        infos = {}
+        if truncated.any():
+            # Laid out as gymnasium's own vector envs do: one entry per env,
+            # None (or 0) for the ones still running, with a mask alongside
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            for i, obs in zip(np.flatnonzero(truncated), self._observation()[truncated]):
+                final_obs[i] = obs
+            infos["final_obs"] = final_obs
+            infos["_final_obs"] = truncated
+            infos["final_info"] = {
+                "cars_passed": np.where(truncated, self.passed, 0.0),
+                "_cars_passed": truncated,
+                "sim_time": np.where(truncated, self.time, 0.0),
+                "_sim_time": truncated,
+            }
+            infos["_final_info"] = truncated
+            self._reset_envs(truncated)
+        return self._observation(), rewards.astype(np.float32), terminated, truncated, infos
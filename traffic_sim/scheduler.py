@@ -0,0 +1,39 @@
+"""Event-driven arrivals: a heap of next-arrival times per lane.
+
+Instead of rolling a spawn chance for every direction on every tick, each
+lane's next arrival time is pre-drawn from an exponential distribution at the
+lane's current rate and kept in a priority queue. A tick only does work when
+an arrival is due. Rates may change at any time; because exponential gaps are
+memoryless, :meth:`ArrivalScheduler.set_rates` simply redraws every lane's
+next arrival from the current time.
+"""
+import heapq
+
+
+class ArrivalScheduler:
+    """Poisson arrivals per lane, ordered by due time."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.rates = {}
+        self.heap = []
+
+    def set_rates(self, now, rates):
+        """Use ``rates`` (vehicles/second per lane) from ``now`` on."""
+        self.rates = dict(rates)
+        self.heap = [(now + self.rng.expovariate(rate), lane_name)
+                     for lane_name, rate in self.rates.items() if rate > 0]
+        heapq.heapify(self.heap)
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else float("inf")
+
+    def pop_due(self, now):
+        """Lanes with an arrival due by ``now``, in time order, scheduling each lane's next one."""
+        due = []
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            when, lane_name = heapq.heappop(heap)
+            due.append(lane_name)
+            heapq.heappush(heap, (when + self.rng.expovariate(self.rates[lane_name]), lane_name))
+        return due
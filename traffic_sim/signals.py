@@ -0,0 +1,20 @@
+"""Signal state shared by the engine, the scripts and the renderers.
+
+The controller sets a :class:`SignalState` per signal head and everything
+else reads that state; colours exist only for drawing.
+"""
+from enum import Enum
+
+
+class SignalState(Enum):
+    RED = 0
+    YELLOW = 1
+    GREEN = 2
+
+
+# Fill colour of the light drawn for each state
+LIGHT_COLORS = {
+    SignalState.RED: "red",
+    SignalState.YELLOW: "yellow",
+    SignalState.GREEN: "lime green",
+}
@@ -0,0 +1,175 @@
+"""Traffic sources that feed per-direction vehicle counts into the engine."""
+import csv
+
+from . import DIRECTIONS
+from .catalog import load_catalog
+from .detection import fuse_counts, load_model, process_images_with_yolo
+from .estimation import CountEstimator
+
+
+def spawn_rate(share, config):
+    """Vehicles/second the scripts' spawn rule gives a direction with ``share`` of the counts.
+
+    After each ``spawn_interval`` a car spawns with a per-tick chance of 0.2
+    plus 0.3 times the share. Works elementwise on numpy arrays too.
+    """
+    chance = 0.2 + share * 0.3
+    return 1.0 / (config.spawn_interval + config.tick_seconds / chance)
+
+
+class TrafficSource:
+    """Base class; the engine calls these hooks while it runs."""
+
+    # Whether new counts also queue up cars behind the spawn points
+    prepopulate = True
+    # Seconds between arrival-rate refreshes; None refreshes only when counts change
+    rate_refresh_seconds = None
+
+    def counts_for_cycle(self, sim):
+        """Counts for the cycle about to start, or None to keep the current ones."""
+        return None
+
+    def arrival_rate(self, sim, direction):
+        """Vehicles/second arriving on ``direction``.
+
+        The default reproduces the scripts' spawn rule (see :func:`spawn_rate`).
+        """
+        counts = sim.current_traffic_counts
+        total = sum(counts.values())
+        if not total:
+            return 0.0
+        return spawn_rate(counts.get(direction, 0) / total, sim.config)
+
+    def allow_spawn(self, sim, direction):
+        return True
+
+    def car_spawned(self, sim, direction):
+        pass
+
+    def pending_inferences(self):
+        """Camera snapshots per direction waiting for detection; empty for sources without cameras."""
+        return {}
+
+    def get_state(self):
+        """JSON-serializable position within the source's data, saved in checkpoints."""
+        return None
+
+    def set_state(self, state):
+        pass
+
+
+class RandomSource(TrafficSource):
+    """Fresh random counts every cycle, as in ``traffic10.py``."""
+
+    def __init__(self, low=10, high=100):
+        self.low = low
+        self.high = high
+
+    def counts_for_cycle(self, sim):
+        return {d: sim.rng.randint(self.low, self.high) for d in DIRECTIONS}
+
+
+class TraceSource(TrafficSource):
+    """Replays per-cycle counts from a CSV with one column per direction.
+
+    The last row is held once the trace is exhausted.
+    """
+
+    def __init__(self, path):
+        with open(path, newline="") as f:
+            self.rows = [{d: int(float(row[d])) for d in DIRECTIONS} for row in csv.DictReader(f)]
+        if not self.rows:
+            raise ValueError(f"Trace {path} has no rows")
+        self.index = 0
+
+    def counts_for_cycle(self, sim):
+        row = self.rows[min(self.index, len(self.rows) - 1)]
+        self.index += 1
+        return row
+
+    def get_state(self):
+        return {"index": self.index}
+
+    def set_state(self, state):
+        self.index = state["index"]
+
+
+class ImageDirSource(TrafficSource):
+    """Counts from YOLO detections on a folder of images, as in ``yolo12.py``.
+
+    Images come from ``manifest`` (see :mod:`traffic_sim.catalog`) in
+    timestamp order when given; otherwise they are sorted by the first number
+    in their filename and assigned to directions round-robin. Each direction
+    moves on to its next image once as many cars as the current image showed
+    have been spawned.
+
+    With several cameras per approach (the manifest's ``camera`` column), each
+    image is a snapshot: the cameras' frames taken within
+    ``camera_sync_seconds`` of each other, detected in one batch, with counts
+    fused by :func:`~traffic_sim.detection.fuse_counts` using
+    ``camera_overlap``. Counts pass through ``estimator`` (a :class:`~traffic_sim.estimation.CountEstimator`)
+    when given, so one bad image does not swing the planner.
+
+    An image that could not be read or detected on (or a model that failed to
+    load) gives no count; the direction is flagged in ``sim.degraded`` and
+    runs on the estimator's fallback, looked up at the time of day of
+    ``clock`` (a :class:`~traffic_sim.demand.DemandClock`) when given.
+    """
+
+    def __init__(self, image_dir, model_path, conf=None, iou=None, estimator=None, clock=None, manifest=None,
+                 camera_overlap=1.0, camera_sync_seconds=1.0):
+        catalog = load_catalog(image_dir, manifest)
+        if not len(catalog):
+            raise ValueError(f"No images found in {manifest or image_dir}")
+
+        model = load_model(model_path)
+        self.counts = {d: [] for d in DIRECTIONS}
+        for d in DIRECTIONS:
+            for snapshot in catalog.snapshots(d, camera_sync_seconds):
+                results = process_images_with_yolo(model, [frame.path for frame in snapshot], conf, iou)
+                # None when every camera failed, so the snapshot still takes its turn in the rotation
+                self.counts[d].append(fuse_counts([count for count, _ in results], camera_overlap))
+        self.image_index = {d: 0 for d in DIRECTIONS}
+        self.spawned = {d: 0 for d in DIRECTIONS}
+        self.started = False
+        # Without smoothing, an estimator that passes counts straight through still supplies the fallback
+        self.estimator = estimator or CountEstimator(alpha=1.0, outlier_sigma=float("inf"))
+        self.clock = clock
+
+    def _count(self, sim, direction):
+        counts = self.counts[direction]
+        count = counts[self.image_index[direction]] if counts else None
+        time_of_day = self.clock.time_of_day(sim.sim_time) if self.clock is not None else None
+        estimate = self.estimator.update(direction, count, time_of_day)
+        sim.degraded[direction] = self.estimator.degraded[direction]
+        return estimate or 0
+
+    def counts_for_cycle(self, sim):
+        if self.started:
+            return None
+        self.started = True
+        return {d: self._count(sim, d) for d in DIRECTIONS}
+
+    def allow_spawn(self, sim, direction):
+        if self.spawned[direction] < sim.current_traffic_counts.get(direction, 0):
+            return True
+        counts = self.counts[direction]
+        if len(counts) > 1:
+            self.image_index[direction] = (self.image_index[direction] + 1) % len(counts)
+            sim.current_traffic_counts[direction] = self._count(sim, direction)
+            self.spawned[direction] = 0
+        return False
+
+    def car_spawned(self, sim, direction):
+        self.spawned[direction] += 1
+
+    def get_state(self):
+        return {"image_index": self.image_index, "spawned": self.spawned, "started": self.started,
+                "estimator": self.estimator.get_state()}
+
+    def set_state(self, state):
+        self.image_index = dict(state["image_index"])
+        self.spawned = dict(state["spawned"])
+        self.started = state["started"]
+        if state.get("estimator") is not None:
+            self.estimator.set_state(state["estimator"])
@@ -0,0 +1,85 @@
+"""Display helpers shared by the Tk scripts.
+
+:class:`CanvasLights` holds the authoritative :class:`~traffic_sim.signals.SignalState`
+per approach and only draws it on the canvas. :class:`StatusLine` carries
+notices from YOLO worker threads to a status label drawn by the Tk loop, so a
+worker never waits on a dialog, and colours the count of each direction
+running on fallback counts.
+
+Nothing here imports tkinter; the widgets are passed in.
+"""
+import queue
+import time
+
+from .signals import LIGHT_COLORS, SignalState
+
+# Count label colour while a direction's counts are a fallback
+DEGRADED_COLOR = "orange"
+
+
+def time_of_day():
+    """Seconds since local midnight, for looking up the historical profile."""
+    now = time.localtime()
+    return now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
+
+
+class CanvasLights:
+    """Signal state per approach; the canvas ovals in ``lights`` only display it."""
+
+    def __init__(self, canvas, lights):
+        self.canvas = canvas
+        self.lights = lights
+        self.state = {head: SignalState.RED for head in lights}
+
+    def set(self, head, state):
+        self.state[head] = state
+        self.canvas.itemconfig(self.lights[head], fill=LIGHT_COLORS[state])
+
+    def is_green(self, head):
+        return self.state[head] is SignalState.GREEN
+
+
+class StatusLine:
+    """Worker notices and degraded-count highlights, shown by the Tk loop.
+
+    :meth:`notify` may be called from any thread. :meth:`show` runs on the Tk
+    thread once :meth:`attach` has given it the status label and each
+    direction's count label. ``color_option`` is ``"fg"`` for tk labels and
+    ``"foreground"`` for ttk ones.
+    """
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.notices = queue.Queue()
+        self.label = None
+        self.count_labels = {}
+        self.color_option = "fg"
+        self.normal_color = "black"
+        # Directions currently drawn as degraded
+        self.shown_degraded = {}
+
+    def notify(self, message):
+        print(message)
+        self.notices.put(message)
+
+    def attach(self, label, count_labels, color_option="fg", normal_color="black"):
+        self.label = label
+        self.count_labels = dict(count_labels)
+        self.color_option = color_option
+        self.normal_color = normal_color
+        self.shown_degraded = dict.fromkeys(self.count_labels, False)
+
+    def show(self):
+        """Show the latest notice and highlight directions running on fallback counts."""
+        if self.label is None:
+            return
+        try:
+            while True:
+                self.label.config(text=self.notices.get_nowait())
+        except queue.Empty:
+            pass
+        for d, label in self.count_labels.items():
+            degraded = self.estimator.degraded.get(d, False)
+            if degraded != self.shown_degraded[d]:
+                self.shown_degraded[d] = degraded
+                label.config(**{self.color_option: DEGRADED_COLOR if degraded else self.normal_color})
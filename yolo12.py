@@ -1,9 +1,9 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 import random
 import time
 import threading
-import cv2
+import queue
 import numpy as np
 import os
 from PIL import Image, ImageTk
@@ -11,7 +11,14 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from ultralytics import YOLO
 from tkinter import font
-import re  # Added for extracting numbers from filenames
+from traffic_sim.catalog import load_catalog
+from traffic_sim.config import load_config
+from traffic_sim.demand import DemandProfile
+from traffic_sim.detection import fuse_counts, process_images_with_yolo
+from traffic_sim.estimation import CountEstimator
+from traffic_sim.inference import InferenceScheduler
+from traffic_sim.signals import SignalState
+from traffic_sim.widgets import CanvasLights, StatusLine, time_of_day
 
 # --- [ Original global variables and simulation logic remain unchanged ] ---
 
@@ -34,28 +41,72 @@ directions = ["North", "South", "East", "West"]
 active_direction_sequence = ["North", "South", "East", "West"]
 active_direction_index = -1
 
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 800
-ROAD_WIDTH = 200
-LANE_WIDTH = 50
+CONFIG = load_config()
+CANVAS_WIDTH = CONFIG.canvas_width
+CANVAS_HEIGHT = CONFIG.canvas_height
+ROAD_WIDTH = CONFIG.road_width
+LANE_WIDTH = CONFIG.lane_width
 CENTER = CANVAS_WIDTH / 2
 INTERSECTION_START = CENTER - (ROAD_WIDTH / 2)
 INTERSECTION_END = CENTER + (ROAD_WIDTH / 2)
-STOP_LINE_MARGIN = 15
-CAR_LENGTH = 30
-CAR_WIDTH = 20
-SAFE_DISTANCE = 15
-MAX_CARS_PER_LANE = 20
-BASE_CAR_SPEED = 5.0
+STOP_LINE_MARGIN = CONFIG.stop_line_margin
+CAR_LENGTH = CONFIG.car_length
+CAR_WIDTH = CONFIG.car_width
+SAFE_DISTANCE = CONFIG.safe_distance
+MAX_CARS_PER_LANE = CONFIG.max_cars_per_lane
+BASE_CAR_SPEED = CONFIG.base_car_speed
 
 # Track last spawn time for each direction to add delays
 last_spawn_time = {direction: 0 for direction in directions}
 
 # YOLO model initialization
-YOLO_MODEL_PATH = r"C:\Python\traffic_images\yolov8n.pt"  # Using the default YOLOv8 nano model
+YOLO_MODEL_PATH = CONFIG.yolo_model_path
 
 # Directory for traffic images
-TRAFFIC_IMAGE_DIR = r"C:\Python\traffic_images"
+TRAFFIC_IMAGE_DIR = CONFIG.traffic_image_dir
+
+# Smooths each direction's counts across images and rejects glitches. A failed
+# detection falls back to the last good count, or before one to the historical
+# profile's count for the time of day, and marks the direction as degraded.
+history_profile = (DemandProfile.from_csv(CONFIG.history_profile_path) if CONFIG.history_profile_path
+                   else DemandProfile.default())
+count_estimator = CountEstimator(CONFIG.count_smoothing, CONFIG.count_outlier_sigma, profile=history_profile)
+
+# Only the first snapshot per direction is inferred at capture; the rest are
+# inferred in the background as the rotation approaches them, at most
+# max_inferences_per_second, favouring directions the next re-plan needs soonest
+inference_scheduler = InferenceScheduler(CONFIG.max_inferences_per_second)
+yolo_snapshots = {direction: [] for direction in directions}
+pending_snapshots = {direction: set() for direction in directions}
+
+def pending_inferences():
+    """Snapshots per direction still waiting for inference, for the metrics exporter's queue-depth gauge."""
+    return {d: len(pending_snapshots[d]) for d in directions}
+
+status = StatusLine(count_estimator)
+notify = status.notify
+
+# Every YOLO job (a capture or a scheduled inference) runs in turn on one
+# worker thread, so the frame store is only ever written from there
+yolo_jobs = queue.Queue()
+# Set while a scheduled inference is queued or running
+inference_queued = threading.Event()
+
+def yolo_worker():
+    while True:
+        job, args = yolo_jobs.get()
+        try:
+            job(*args)
+        except Exception as e:
+            notify(f"YOLO job failed: {e}")
+
+threading.Thread(target=yolo_worker, daemon=True).start()
+
+# Processed images go to a memory-mapped frame store when configured, so RAM stays flat
+frame_store = None
+if CONFIG.frame_store_path:
+    from traffic_sim.framestore import FrameStore
+    frame_store = FrameStore(CONFIG.frame_store_path, CONFIG.frame_store_capacity)
     
 # Initialize YOLO model
 try:
@@ -211,41 +262,25 @@ def get_signal_durations(traffic, time_of_day):
    
     return durations
 
-def process_image_with_yolo(direction, image_path):
+def process_snapshot_with_yolo(direction, image_paths):
+    """Detect on one snapshot (one image per camera) in a single batch; returns the fused count and the best view."""
     if yolo_model is None:
-        messagebox.showerror("Error", "YOLO model failed to load. Using random counts instead.")
-        return random.randint(5, 20), None
+        notify(f"YOLO model failed to load; {direction} uses its fallback count")
+        return None, None
     
-    try:
-        image = cv2.imread(image_path)
-        if image is None:
-            messagebox.showerror("Error", f"Could not load image: {image_path}")
-            return random.randint(5, 20), None
-        
-        results = yolo_model(image)
-        vehicle_classes = [2, 3, 5, 7]
-        vehicle_count = 0
-        processed_image = image.copy()
-        
-        for result in results:
-            for box in result.boxes:
-                class_id = int(box.cls[0])
-                if class_id in vehicle_classes:
-                    vehicle_count += 1
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    cv2.rectangle(processed_image, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-        
-        print(f"YOLO detected {vehicle_count} vehicles in {direction} direction from {os.path.basename(image_path)}")
-        return vehicle_count, processed_image
-        
-    except Exception as e:
-        messagebox.showerror("Error", f"YOLO processing failed: {str(e)}")
-        return random.randint(5, 20), None
-
-def extract_number_from_filename(filename):
-    # Extract numbers from filename using regular expression
-    numbers = re.findall(r'\d+', filename)
-    return int(numbers[0]) if numbers else 0
+    results = process_images_with_yolo(yolo_model, image_paths, CONFIG.detection_confidence, CONFIG.detection_iou)
+    for image_path, (vehicle_count, _) in zip(image_paths, results):
+        if vehicle_count is None:
+            notify(f"YOLO detection failed on {os.path.basename(image_path)}")
+        else:
+            print(f"YOLO detected {vehicle_count} vehicles in {direction} direction from {os.path.basename(image_path)}")
+    count = fuse_counts([vehicle_count for vehicle_count, _ in results], CONFIG.camera_overlap)
+    if count is None:
+        return None, None
+    
+    # The inspector shows the camera that saw the most vehicles
+    best = max((result for result in results if result[0] is not None), key=lambda result: result[0])
+    return count, best[1]
 
 def capture_yolo_input():
     global yolo_counts, yolo_processed_images
@@ -254,42 +289,46 @@ def capture_yolo_input():
     for direction in directions:
         yolo_counts[direction] = []
         yolo_processed_images[direction] = []
+        yolo_snapshots[direction] = []
+        pending_snapshots[direction] = set()
         current_image_index[direction] = 0
         cars_spawned_from_current_image[direction] = 0
         yolo_inputs_received[direction] = False
+    if frame_store is not None:
+        frame_store.clear()
+    count_estimator.reset()
+    inference_scheduler.reset()
     
-    if not os.path.exists(TRAFFIC_IMAGE_DIR):
+    if not CONFIG.image_manifest_path and not os.path.exists(TRAFFIC_IMAGE_DIR):
         os.makedirs(TRAFFIC_IMAGE_DIR)
-        messagebox.showinfo("Info", f"Created {TRAFFIC_IMAGE_DIR} directory. Please add traffic images and try again.")
+        notify(f"Created {TRAFFIC_IMAGE_DIR} directory. Please add traffic images and try again.")
         for direction in directions:
             yolo_inputs_received[direction] = True
         return
     
-    # Get all image files and sort them by number in filename
-    image_files = []
-    for file in os.listdir(TRAFFIC_IMAGE_DIR):
-        if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-            image_files.append(os.path.join(TRAFFIC_IMAGE_DIR, file))
+    # Frames per direction from the manifest, else round-robin by the number in
+    # each filename; the catalog is only rebuilt when the folder or manifest changes
+    catalog = load_catalog(TRAFFIC_IMAGE_DIR, CONFIG.image_manifest_path)
     
-    if not image_files:
-        messagebox.showerror("Error", f"No images found in {TRAFFIC_IMAGE_DIR} directory")
+    if not len(catalog):
+        notify(f"No images found in {TRAFFIC_IMAGE_DIR} directory; using fallback counts")
         for direction in directions:
-            yolo_counts[direction] = [random.randint(5, 20)]
+            yolo_counts[direction] = [None]
             yolo_processed_images[direction] = [None]
             yolo_inputs_received[direction] = True
+        check_all_inputs_received()
         return
     
-    # Sort images by number in filename
-    image_files.sort(key=lambda x: extract_number_from_filename(os.path.basename(x)))
-    
-    # Assign images to directions in a circular fashion
-    for i, image_path in enumerate(image_files):
-        direction_index = i % len(directions)
-        direction = directions[direction_index]
-        
-        count, processed_image = process_image_with_yolo(direction, image_path)
-        yolo_counts[direction].append(count)
-        yolo_processed_images[direction].append(processed_image)
+    # Each snapshot is one frame per camera on the approach, detected together;
+    # the first one now, so the simulation can start, the rest when scheduled
+    for direction in directions:
+        yolo_snapshots[direction] = [[frame.path for frame in snapshot]
+                                     for snapshot in catalog.snapshots(direction, CONFIG.camera_sync_seconds)]
+        yolo_counts[direction] = [None] * len(yolo_snapshots[direction])
+        yolo_processed_images[direction] = [None] * len(yolo_snapshots[direction])
+        pending_snapshots[direction] = set(range(len(yolo_snapshots[direction])))
+        if yolo_snapshots[direction]:
+            infer_snapshot(direction, 0)
     
     # Mark all directions as received
     for direction in directions:
@@ -297,7 +336,7 @@ def capture_yolo_input():
     
     # Update the display for the first image of each direction
     for direction in directions:
-        if yolo_counts[direction]:
+        if yolo_counts[direction] and yolo_counts[direction][0] is not None:
             lane_labels[direction][0].config(text=f"{yolo_counts[direction][0]}")
     
     if yolo_view_direction.get() in directions:
@@ -305,6 +344,52 @@ def capture_yolo_input():
     
     check_all_inputs_received()
 
+def infer_snapshot(direction, index):
+    if index not in pending_snapshots[direction]:
+        return  # Already inferred, or a new capture replaced the snapshots meanwhile
+    count, processed_image = process_snapshot_with_yolo(direction, yolo_snapshots[direction][index])
+    if frame_store is not None and processed_image is not None:
+        # Keep only the frame id; the pixels live in the memory map
+        processed_image = frame_store.add(direction, processed_image, count)
+    yolo_counts[direction][index] = count
+    yolo_processed_images[direction][index] = processed_image
+    pending_snapshots[direction].discard(index)
+
+def seconds_until_counts_needed():
+    """Seconds until each direction's count is next used: the next re-plan, plus its green's offset in the cycle."""
+    remaining = time_left + sum(current_durations.get(d, 0)
+                                for d in active_direction_sequence[active_direction_index + 1:])
+    needed = {}
+    offset = 0
+    for d in active_direction_sequence:
+        needed.setdefault(d, remaining + offset)
+        offset += current_durations.get(d, 0)
+    return needed
+
+def run_scheduled_inference(direction, index):
+    try:
+        infer_snapshot(direction, index)
+    finally:
+        inference_queued.clear()
+
+def schedule_inference():
+    """Queue one inference on the worker if the budget allows, on the direction whose next image most needs it."""
+    if not simulation_started or inference_queued.is_set():
+        return
+    upcoming = {}
+    for d in directions:
+        if yolo_counts[d]:
+            next_index = (current_image_index[d] + 1) % len(yolo_counts[d])
+            if next_index in pending_snapshots[d]:
+                upcoming[d] = next_index
+    if not upcoming:
+        return
+    direction = inference_scheduler.choose(time.time(), seconds_until_counts_needed(), upcoming)
+    if direction is None:
+        return
+    inference_queued.set()
+    yolo_jobs.put((run_scheduled_inference, (direction, upcoming[direction])))
+
 def check_all_inputs_received():
     global simulation_started, current_traffic_counts
     
@@ -312,14 +397,13 @@ def check_all_inputs_received():
         simulation_started = True
         
         for direction in directions:
-            if yolo_counts[direction]:
-                current_traffic_counts[direction] = yolo_counts[direction][0]
-            else:
-                current_traffic_counts[direction] = random.randint(5, 20)
+            count = yolo_counts[direction][0] if yolo_counts[direction] else None
+            current_traffic_counts[direction] = count_estimator.update(direction, count, time_of_day()) or 0
+            lane_labels[direction][0].config(text=f"{current_traffic_counts[direction]}")
 
         pre_populate_cars()       
         start_new_cycle()
-        messagebox.showinfo("Info", "All lane inputs received. Simulation starting!")
+        notify("All lane inputs received. Simulation starting!")
 
 def start_yolo_capture():
     yolo_button.config(state=tk.DISABLED, text="Processing...")
@@ -328,9 +412,7 @@ def start_yolo_capture():
         capture_yolo_input()
         yolo_button.config(state=tk.NORMAL, text="Capture YOLO Input")
 
-    thread = threading.Thread(target=process_all_directions)
-    thread.daemon = True
-    thread.start()
+    yolo_jobs.put((process_all_directions, ()))
 
 def pre_populate_cars():
     if not current_traffic_counts: return
@@ -375,7 +457,12 @@ def attempt_to_spawn_car():
         if cars_spawned_from_current_image[direction] >= count:
             if yolo_counts[direction] and len(yolo_counts[direction]) > 1:
                 current_image_index[direction] = (current_image_index[direction] + 1) % len(yolo_counts[direction])
-                current_traffic_counts[direction] = yolo_counts[direction][current_image_index[direction]]
+                # An image the scheduler has not reached yet keeps the current count
+                if current_image_index[direction] not in pending_snapshots[direction]:
+                    smoothed = count_estimator.update(direction, yolo_counts[direction][current_image_index[direction]],
+                                                      time_of_day())
+                    if smoothed is not None:
+                        current_traffic_counts[direction] = smoothed
                 cars_spawned_from_current_image[direction] = 0
                 if direction == yolo_view_direction.get():
                     update_yolo_inspector_view()
@@ -399,7 +486,7 @@ def move_cars():
     
     for lane_name, car_list in car_pool.items():
         direction = lane_name.split("_")[0]
-        is_green = canvas.itemcget(lights[direction], "fill") == "lime green"
+        is_green = signal_lights.is_green(direction)
         
         active_cars = [c for c in car_list if c.is_active]
         for i, car in enumerate(active_cars):
@@ -449,24 +536,9 @@ def move_cars():
                 elif car.direction == "East": car.move(-current_speed, 0)
 
             if car.is_offscreen(): car.deactivate()
-def update_car_movement(car):
-
-  # Get the position of the stop line for the car's current road
-  stop_line_position = get_stop_line_for(car.road)
-
-  # Check if the car is still approaching the intersection
-  if car.position < stop_line_position:
-    # --- THIS IS THE FIX ---
-    # Car is before the line, so force it to stay in its current lane.
-    # It should only move forward.
-    car.follow_current_lane_path()
-  else:
-    # Car is now inside the intersection.
-    # Allow it to follow its main path, which includes turning or merging.
-    car.navigate_intersection_path()
 def start_new_cycle():
     global active_direction_index, active_direction, time_left, current_durations
-    for direction in directions: canvas.itemconfig(lights[direction], fill="red")
+    for direction in directions: signal_lights.set(direction, SignalState.RED)
     active_direction_index = (active_direction_index + 1) % len(active_direction_sequence)
     active_direction = active_direction_sequence[active_direction_index]
     
@@ -476,11 +548,13 @@ def start_new_cycle():
         for direction in directions: direction_timers[direction] = current_durations[direction]
 
     time_left = current_durations[active_direction]
-    canvas.itemconfig(lights[active_direction], fill="lime green")
+    signal_lights.set(active_direction, SignalState.GREEN)
     for d in directions: lane_labels[d][1].config(text=f"{current_durations.get(d, 0)}s")
 
 def update_simulation():
     global time_left, last_time, timer_countdown
+    status.show()
+    schedule_inference()
     if not is_paused and simulation_started:
         current_time = time.time()
         delta_time = current_time - last_time
@@ -547,6 +621,8 @@ lights = {
     "West": canvas.create_oval(CENTER - 20, CENTER - 7, CENTER - 6, CENTER + 7, fill="red"),
 }
 
+signal_lights = CanvasLights(canvas, lights)
+
 # --- Main Control Panel ---
 main_control_frame = ttk.Frame(root, padding=10)
 main_control_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 10), pady=10)
@@ -611,6 +687,10 @@ total_cars_label.grid(row=0, column=1, sticky='w', padx=5)
 ttk.Label(details_labelframe, text="Cars on Screen:", font=BOLD_LABEL_FONT).grid(row=1, column=0, sticky='w')
 screen_cars_label = ttk.Label(details_labelframe, text="0", font=LABEL_FONT)
 screen_cars_label.grid(row=1, column=1, sticky='w', padx=5)
+ttk.Label(details_labelframe, text="Status:", font=BOLD_LABEL_FONT).grid(row=2, column=0, sticky='nw')
+status_label = ttk.Label(details_labelframe, text="Ready", font=LABEL_FONT, wraplength=220)
+status_label.grid(row=2, column=1, sticky='w', padx=5)
+status.attach(status_label, {d: lane_labels[d][0] for d in directions}, "foreground", "")
 
 
 # --- YOLO Image Inspector ---
@@ -648,12 +728,19 @@ def display_processed_image(direction, image_index):
         image_info_label.config(text=f"{direction}: No Images")
         return
     
+    if image_index in pending_snapshots[direction]:
+        image_info_label.config(text=f"{direction}: Image {image_index+1} not inferred yet")
+        return
+    
     processed_image = yolo_processed_images[direction][image_index]
+    if frame_store is not None and processed_image is not None:
+        processed_image = frame_store.frame(processed_image)
     if processed_image is None:
         image_info_label.config(text=f"{direction}: Image {image_index+1} Error")
         return
 
-    processed_image_rgb = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
+    # Reversed-channel view: BGR to RGB without copying the frame
+    processed_image_rgb = processed_image[..., ::-1]
     
     fig = plt.Figure(figsize=(4, 3), dpi=80)
     ax = fig.add_subplot(111)
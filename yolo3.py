@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 import random
 import time
 import threading
@@ -9,6 +9,11 @@ import os
 from PIL import Image, ImageTk
 # Note: You'll need to install ultralytics for YOLO: pip install ultralytics
 from ultralytics import YOLO
+from traffic_sim.config import load_config
+from traffic_sim.demand import DemandProfile
+from traffic_sim.estimation import CountEstimator
+from traffic_sim.signals import SignalState
+from traffic_sim.widgets import CanvasLights, StatusLine, time_of_day
 
 # Global variables
 is_paused = False
@@ -26,29 +31,39 @@ directions = ["North", "South", "East", "West"]
 active_direction_sequence = ["North", "South", "East", "West"]
 active_direction_index = -1
 
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 800
-ROAD_WIDTH = 200
-LANE_WIDTH = 50
+CONFIG = load_config()
+CANVAS_WIDTH = CONFIG.canvas_width
+CANVAS_HEIGHT = CONFIG.canvas_height
+ROAD_WIDTH = CONFIG.road_width
+LANE_WIDTH = CONFIG.lane_width
 CENTER = CANVAS_WIDTH / 2
 INTERSECTION_START = CENTER - (ROAD_WIDTH / 2)
 INTERSECTION_END = CENTER + (ROAD_WIDTH / 2)
-STOP_LINE_MARGIN = 15
-CAR_LENGTH = 30
-CAR_WIDTH = 20
-SAFE_DISTANCE = 15
-MAX_CARS_PER_LANE = 20
-BASE_CAR_SPEED = 5.0
+STOP_LINE_MARGIN = CONFIG.stop_line_margin
+CAR_LENGTH = CONFIG.car_length
+CAR_WIDTH = CONFIG.car_width
+SAFE_DISTANCE = CONFIG.safe_distance
+MAX_CARS_PER_LANE = CONFIG.max_cars_per_lane
+BASE_CAR_SPEED = CONFIG.base_car_speed
 
 # Track last spawn time for each direction to add delays
 last_spawn_time = {direction: 0 for direction in directions}
 
 # YOLO model initialization - Update this path to your actual YOLO model
 # For example: "yolov8n.pt", "yolov8s.pt", or your custom trained model
-YOLO_MODEL_PATH = r"C:\Python\traffic_image"  # Replace with your actual model path
+YOLO_MODEL_PATH = CONFIG.yolo_model_path
 
 # Directory for traffic images
-TRAFFIC_IMAGE_DIR = r"C:\Python\traffic_image"
+TRAFFIC_IMAGE_DIR = CONFIG.traffic_image_dir
+
+# A failed detection falls back to the last good count, or before one to the
+# historical profile's count for the time of day, and marks the direction as degraded
+history_profile = (DemandProfile.from_csv(CONFIG.history_profile_path) if CONFIG.history_profile_path
+                   else DemandProfile.default())
+count_estimator = CountEstimator(CONFIG.count_smoothing, CONFIG.count_outlier_sigma, profile=history_profile)
+
+status = StatusLine(count_estimator)
+notify = status.notify
 
 # Initialize YOLO model
 try:
@@ -207,16 +222,16 @@ def get_signal_durations(traffic, time_of_day):
     return durations
 
 def process_image_with_yolo(direction):
-    """Process an image for a specific direction using YOLO and return car count"""
+    """Process an image for a specific direction using YOLO and return car count, or None on failure"""
     # Check if YOLO model is loaded
     if yolo_model is None:
-        messagebox.showerror("Error", "YOLO model failed to load. Using random counts instead.")
-        return random.randint(5, 20)
+        notify(f"YOLO model failed to load; {direction} uses its fallback count")
+        return None
     
     # Check if directory exists
     if not os.path.exists(TRAFFIC_IMAGE_DIR):
-        messagebox.showerror("Error", f"Directory {TRAFFIC_IMAGE_DIR} does not exist!")
-        return random.randint(5, 20)
+        notify(f"Directory {TRAFFIC_IMAGE_DIR} does not exist; {direction} uses its fallback count")
+        return None
     
     # Look for image files with direction in the name
     image_files = []
@@ -225,8 +240,8 @@ def process_image_with_yolo(direction):
             image_files.append(os.path.join(TRAFFIC_IMAGE_DIR, file))
     
     if not image_files:
-        messagebox.showerror("Error", f"No image found for {direction} direction in {TRAFFIC_IMAGE_DIR}")
-        return random.randint(5, 20)
+        notify(f"No image found for {direction} direction in {TRAFFIC_IMAGE_DIR}; using its fallback count")
+        return None
     
     # Use the first matching image
     file_path = image_files[0]
@@ -236,8 +251,8 @@ def process_image_with_yolo(direction):
         # Read the image
         image = cv2.imread(file_path)
         if image is None:
-            messagebox.showerror("Error", f"Could not load image: {file_path}")
-            return random.randint(5, 20)
+            notify(f"Could not load image: {file_path}")
+            return None
         
         # Run YOLO inference
         results = yolo_model(image)
@@ -256,12 +271,12 @@ def process_image_with_yolo(direction):
         return vehicle_count
         
     except Exception as e:
-        messagebox.showerror("Error", f"YOLO processing failed: {str(e)}")
-        return random.randint(5, 20)
+        notify(f"YOLO processing failed on {os.path.basename(file_path)}: {e}")
+        return None
 
 def capture_yolo_input(direction):
     """Capture and process YOLO input for a specific direction"""
-    count = process_image_with_yolo(direction)
+    count = count_estimator.update(direction, process_image_with_yolo(direction), time_of_day()) or 0
     yolo_counts[direction] = count
     yolo_inputs_received[direction] = True
     
@@ -281,10 +296,11 @@ def check_all_inputs_received():
         
         # Start the simulation
         start_new_cycle()
-        messagebox.showinfo("Info", "All lane inputs received. Simulation starting!")
+        notify("All lane inputs received. Simulation starting!")
 
 def start_yolo_capture():
     """Start the process of capturing YOLO inputs for all lanes"""
+    count_estimator.reset()
     # Reset the received flags
     for direction in directions:
         yolo_inputs_received[direction] = False
@@ -325,6 +341,8 @@ lights = {
     "West": canvas.create_oval(CENTER - 20, CENTER - 7, CENTER - 6, CENTER + 7, fill="red"),
 }
 
+signal_lights = CanvasLights(canvas, lights)
+
 # Create car pool
 car_pool = {}
 car_colors = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#9B59B6", "#1ABC9C", "#E74C3C", "#F39C12", "#D35400"]
@@ -389,6 +407,10 @@ total_cars_label.pack(anchor="w")
 tk.Label(detail_frame, text="Cars on Screen:", font=("Arial", 10)).pack(anchor="w", pady=2)
 screen_cars_label = tk.Label(detail_frame, text="0", font=("Arial", 10))
 screen_cars_label.pack(anchor="w")
+tk.Label(detail_frame, text="Status:", font=("Arial", 10)).pack(anchor="w", pady=2)
+status_label = tk.Label(detail_frame, text="Ready", font=("Arial", 10), wraplength=220, justify="left")
+status_label.pack(anchor="w")
+status.attach(status_label, {d: lane_labels[d][0] for d in directions}, "fg", "black")
 
 # Initialize timing variables
 last_time = time.time()
@@ -478,7 +500,7 @@ def move_cars():
     
     for lane_name, car_list in car_pool.items():
         direction = lane_name.split("_")[0]
-        is_green = canvas.itemcget(lights[direction], "fill") == "lime green"
+        is_green = signal_lights.is_green(direction)
         
         active_cars = [c for c in car_list if c.is_active]
         for i, car in enumerate(active_cars):
@@ -529,7 +551,7 @@ def start_new_cycle():
     global active_direction_index, active_direction, time_left, current_durations
     
     for direction in directions:
-        canvas.itemconfig(lights[direction], fill="red")
+        signal_lights.set(direction, SignalState.RED)
     
     active_direction_index = (active_direction_index + 1) % len(active_direction_sequence)
     active_direction = active_direction_sequence[active_direction_index]
@@ -545,13 +567,14 @@ def start_new_cycle():
 
     time_left = current_durations[active_direction]
     
-    canvas.itemconfig(lights[active_direction], fill="lime green")
+    signal_lights.set(active_direction, SignalState.GREEN)
 
     for d in directions:
         lane_labels[d][1].config(text=f"{current_durations.get(d, 0)}s")
 
 def update_simulation():
     global time_left, last_time, timer_countdown
+    status.show()
     if not is_paused and simulation_started:
         current_time = time.time()
         delta_time = current_time - last_time
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 import random
 import time
 import threading
@@ -10,6 +10,12 @@ from PIL import Image, ImageTk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from ultralytics import YOLO
+from traffic_sim.catalog import load_catalog
+from traffic_sim.config import load_config
+from traffic_sim.demand import DemandProfile
+from traffic_sim.estimation import CountEstimator
+from traffic_sim.signals import SignalState
+from traffic_sim.widgets import CanvasLights, StatusLine, time_of_day
 
 # Global variables
 is_paused = False
@@ -30,29 +36,46 @@ directions = ["North", "South", "East", "West"]
 active_direction_sequence = ["North", "South", "East", "West"]
 active_direction_index = -1
 
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 800
-ROAD_WIDTH = 200
-LANE_WIDTH = 50
+CONFIG = load_config()
+CANVAS_WIDTH = CONFIG.canvas_width
+CANVAS_HEIGHT = CONFIG.canvas_height
+ROAD_WIDTH = CONFIG.road_width
+LANE_WIDTH = CONFIG.lane_width
 CENTER = CANVAS_WIDTH / 2
 INTERSECTION_START = CENTER - (ROAD_WIDTH / 2)
 INTERSECTION_END = CENTER + (ROAD_WIDTH / 2)
-STOP_LINE_MARGIN = 15
-CAR_LENGTH = 30
-CAR_WIDTH = 20
-SAFE_DISTANCE = 15
-MAX_CARS_PER_LANE = 20
-BASE_CAR_SPEED = 5.0
+STOP_LINE_MARGIN = CONFIG.stop_line_margin
+CAR_LENGTH = CONFIG.car_length
+CAR_WIDTH = CONFIG.car_width
+SAFE_DISTANCE = CONFIG.safe_distance
+MAX_CARS_PER_LANE = CONFIG.max_cars_per_lane
+BASE_CAR_SPEED = CONFIG.base_car_speed
 
 # Track last spawn time for each direction to add delays
 last_spawn_time = {direction: 0 for direction in directions}
 
 # YOLO model initialization
-YOLO_MODEL_PATH = r"C:\Python\traffic_images\yolov8n.pt"  # Using the default YOLOv8 nano model
+YOLO_MODEL_PATH = CONFIG.yolo_model_path
 
 # Directory for traffic images
-TRAFFIC_IMAGE_DIR = "traffic_images"
-    
+TRAFFIC_IMAGE_DIR = CONFIG.traffic_image_dir
+
+# Processed images go to a memory-mapped frame store when configured, so RAM stays flat
+frame_store = None
+if CONFIG.frame_store_path:
+    from traffic_sim.framestore import FrameStore
+    frame_store = FrameStore(CONFIG.frame_store_path, CONFIG.frame_store_capacity)
+
+# Smooths each direction's counts across images and rejects glitches. A failed
+# detection falls back to the last good count, or before one to the historical
+# profile's count for the time of day, and marks the direction as degraded.
+history_profile = (DemandProfile.from_csv(CONFIG.history_profile_path) if CONFIG.history_profile_path
+                   else DemandProfile.default())
+count_estimator = CountEstimator(CONFIG.count_smoothing, CONFIG.count_outlier_sigma, profile=history_profile)
+
+status = StatusLine(count_estimator)
+notify = status.notify
+
 # Initialize YOLO model
 try:
     yolo_model = YOLO(YOLO_MODEL_PATH, task='detect')
@@ -209,16 +232,16 @@ def get_signal_durations(traffic, time_of_day):
     return durations
 
 def process_image_with_yolo(direction, image_path):
-    """Process an image for a specific direction using YOLO and return car count and processed image"""
+    """Process an image for a specific direction using YOLO and return car count (None on failure) and processed image"""
     if yolo_model is None:
-        messagebox.showerror("Error", "YOLO model failed to load. Using random counts instead.")
-        return random.randint(5, 20), None
+        notify(f"YOLO model failed to load; {direction} uses its fallback count")
+        return None, None
     
     try:
         image = cv2.imread(image_path)
         if image is None:
-            messagebox.showerror("Error", f"Could not load image: {image_path}")
-            return random.randint(5, 20), None
+            notify(f"Could not load image: {image_path}")
+            return None, None
         
         results = yolo_model(image)
         
@@ -242,8 +265,8 @@ def process_image_with_yolo(direction, image_path):
         return vehicle_count, processed_image
         
     except Exception as e:
-        messagebox.showerror("Error", f"YOLO processing failed: {str(e)}")
-        return random.randint(5, 20), None
+        notify(f"YOLO processing failed on {os.path.basename(image_path)}: {e}")
+        return None, None
 
 def capture_yolo_input(direction):
     """Capture and process YOLO input for a specific direction"""
@@ -254,48 +277,49 @@ def capture_yolo_input(direction):
     yolo_processed_images[direction] = []
     
     # Create the traffic_images directory if it doesn't exist
-    if not os.path.exists(TRAFFIC_IMAGE_DIR):
+    if not CONFIG.image_manifest_path and not os.path.exists(TRAFFIC_IMAGE_DIR):
         os.makedirs(TRAFFIC_IMAGE_DIR)
-        messagebox.showinfo("Info", f"Created {TRAFFIC_IMAGE_DIR} directory. Please add traffic images and try again.")
+        notify(f"Created {TRAFFIC_IMAGE_DIR} directory. Please add traffic images and try again.")
         yolo_inputs_received[direction] = True
         return
     
-    image_files = []
-    for file in os.listdir(TRAFFIC_IMAGE_DIR):
-        if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-            # Check if the filename contains the direction (case-insensitive)
-            if direction.lower() in file.lower():
-                image_files.append(os.path.join(TRAFFIC_IMAGE_DIR, file))
+    # Frames from the manifest, else the images whose filename contains the
+    # direction (or every image if none do); shared by all four directions and
+    # only rebuilt when the folder or manifest changes
+    catalog = load_catalog(TRAFFIC_IMAGE_DIR, CONFIG.image_manifest_path, match="name")
+    image_files = [frame.path for frame in catalog.frames[direction]]
     
     if not image_files:
-        # If no specific direction images found, use any image as fallback
-        for file in os.listdir(TRAFFIC_IMAGE_DIR):
-            if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                image_files.append(os.path.join(TRAFFIC_IMAGE_DIR, file))
-        
-        if not image_files:
-            messagebox.showerror("Error", f"No images found in {TRAFFIC_IMAGE_DIR} directory")
-            yolo_counts[direction] = [random.randint(5, 20)]
-            yolo_processed_images[direction] = [None]
-            yolo_inputs_received[direction] = True
-            return
+        notify(f"No images found for {direction}; using its fallback count")
+        yolo_counts[direction] = [None]
+        yolo_processed_images[direction] = [None]
+        yolo_inputs_received[direction] = True
+        return
     
     # Process all images for this direction
     for image_path in image_files:
         count, processed_image = process_image_with_yolo(direction, image_path)
         yolo_counts[direction].append(count)
+        if frame_store is not None and processed_image is not None:
+            # Keep only the frame id; the pixels live in the memory map
+            processed_image = frame_store.add(direction, processed_image, count)
         yolo_processed_images[direction].append(processed_image)
     
     yolo_inputs_received[direction] = True
     
     if yolo_counts[direction]:
-        lane_labels[direction][0].config(text=f"{yolo_counts[direction][0]} (1/{len(yolo_counts[direction])})")
+        lane_labels[direction][0].config(text=image_count_text(direction, 0))
     
     if yolo_processed_images[direction] and yolo_processed_images[direction][0] is not None:
         display_processed_image(direction, 0)
     
     check_all_inputs_received()
 
+def image_count_text(direction, image_index):
+    """Count detected in one image and its position, e.g. "12 (2/5)"; "-" where detection failed"""
+    count = yolo_counts[direction][image_index]
+    return f"{'-' if count is None else count} ({image_index+1}/{len(yolo_counts[direction])})"
+
 def display_processed_image(direction, image_index):
     """Display the YOLO-processed image with car outlines"""
     global current_displayed_image
@@ -304,13 +328,16 @@ def display_processed_image(direction, image_index):
         return
     
     processed_image = yolo_processed_images[direction][image_index]
+    if frame_store is not None and processed_image is not None:
+        processed_image = frame_store.frame(processed_image)
     if processed_image is None:
         return
     
     if current_displayed_image:
         current_displayed_image.get_tk_widget().destroy()
     
-    processed_image_rgb = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
+    # Reversed-channel view: BGR to RGB without copying the frame
+    processed_image_rgb = processed_image[..., ::-1]
     
     fig = plt.Figure(figsize=(4, 3))
     ax = fig.add_subplot(111)
@@ -332,9 +359,7 @@ def show_next_image(direction):
     display_processed_image(direction, current_image_index[direction])
     
     if yolo_counts[direction]:
-        lane_labels[direction][0].config(
-            text=f"{yolo_counts[direction][current_image_index[direction]]} ({current_image_index[direction]+1}/{len(yolo_counts[direction])})"
-        )
+        lane_labels[direction][0].config(text=image_count_text(direction, current_image_index[direction]))
 
 def show_previous_image(direction):
     """Show the previous image for the given direction"""
@@ -345,9 +370,7 @@ def show_previous_image(direction):
     display_processed_image(direction, current_image_index[direction])
     
     if yolo_counts[direction]:
-        lane_labels[direction][0].config(
-            text=f"{yolo_counts[direction][current_image_index[direction]]} ({current_image_index[direction]+1}/{len(yolo_counts[direction])})"
-        )
+        lane_labels[direction][0].config(text=image_count_text(direction, current_image_index[direction]))
 
 def check_all_inputs_received():
     """Check if all lane inputs have been received from YOLO"""
@@ -357,17 +380,16 @@ def check_all_inputs_received():
         simulation_started = True
         
         for direction in directions:
-            if yolo_counts[direction]:
-                current_traffic_counts[direction] = yolo_counts[direction][0]
-            else:
-                current_traffic_counts[direction] = random.randint(5, 20)
+            count = yolo_counts[direction][0] if yolo_counts[direction] else None
+            current_traffic_counts[direction] = count_estimator.update(direction, count, time_of_day()) or 0
 
         pre_populate_cars()       
         start_new_cycle()
-        messagebox.showinfo("Info", "All lane inputs received. Simulation starting!")
+        notify("All lane inputs received. Simulation starting!")
 
 def start_yolo_capture():
     """Start the process of capturing YOLO inputs for all lanes"""
+    count_estimator.reset()
     for direction in directions:
         yolo_inputs_received[direction] = False
         yolo_counts[direction] = []
@@ -375,6 +397,8 @@ def start_yolo_capture():
     
     # Use a single thread to process all directions sequentially to avoid conflicts
     def process_all_directions():
+        if frame_store is not None:
+            frame_store.clear()
         for direction in directions:
             capture_yolo_input(direction)
     
@@ -410,6 +434,8 @@ lights = {
     "West": canvas.create_oval(CENTER - 20, CENTER - 7, CENTER - 6, CENTER + 7, fill="red"),
 }
 
+signal_lights = CanvasLights(canvas, lights)
+
 # Create car pool
 car_pool = {}
 car_colors = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#9B59B6", "#1ABC9C", "#E74C3C", "#F39C12", "#D35400"]
@@ -474,6 +500,10 @@ total_cars_label.pack(anchor="w")
 tk.Label(detail_frame, text="Cars on Screen:", font=("Arial", 10)).pack(anchor="w", pady=2)
 screen_cars_label = tk.Label(detail_frame, text="0", font=("Arial", 10))
 screen_cars_label.pack(anchor="w")
+tk.Label(detail_frame, text="Status:", font=("Arial", 10)).pack(anchor="w", pady=2)
+status_label = tk.Label(detail_frame, text="Ready", font=("Arial", 10), wraplength=220, justify="left")
+status_label.pack(anchor="w")
+status.attach(status_label, {d: lane_labels[d][0] for d in directions}, "fg", "black")
 
 # Image display frame
 image_display_frame = tk.Frame(control_frame)
@@ -560,7 +590,10 @@ def attempt_to_spawn_car():
             # Move to next image if available
             if yolo_counts[direction] and len(yolo_counts[direction]) > 1:
                 current_image_index[direction] = (current_image_index[direction] + 1) % len(yolo_counts[direction])
-                current_traffic_counts[direction] = yolo_counts[direction][current_image_index[direction]]
+                smoothed = count_estimator.update(direction, yolo_counts[direction][current_image_index[direction]],
+                                                  time_of_day())
+                if smoothed is not None:
+                    current_traffic_counts[direction] = smoothed
                 cars_spawned_from_current_image[direction] = 0
                 display_processed_image(direction, current_image_index[direction])
             continue
@@ -590,7 +623,7 @@ def move_cars():
     
     for lane_name, car_list in car_pool.items():
         direction = lane_name.split("_")[0]
-        is_green = canvas.itemcget(lights[direction], "fill") == "lime green"
+        is_green = signal_lights.is_green(direction)
         
         active_cars = [c for c in car_list if c.is_active]
         for i, car in enumerate(active_cars):
@@ -635,7 +668,7 @@ def start_new_cycle():
     global active_direction_index, active_direction, time_left, current_durations
     
     for direction in directions:
-        canvas.itemconfig(lights[direction], fill="red")
+        signal_lights.set(direction, SignalState.RED)
     
     active_direction_index = (active_direction_index + 1) % len(active_direction_sequence)
     active_direction = active_direction_sequence[active_direction_index]
@@ -649,13 +682,14 @@ def start_new_cycle():
 
     time_left = current_durations[active_direction]
     
-    canvas.itemconfig(lights[active_direction], fill="lime green")
+    signal_lights.set(active_direction, SignalState.GREEN)
 
     for d in directions:
         lane_labels[d][1].config(text=f"{current_durations.get(d, 0)}s")
 
 def update_simulation():
     global time_left, last_time, timer_countdown
+    status.show()
     if not is_paused and simulation_started:
         current_time = time.time()
         delta_time = current_time - last_time
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 import random
 import time
 import threading
@@ -11,6 +11,11 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from ultralytics import YOLO
 from tkinter import font
+from traffic_sim.config import load_config
+from traffic_sim.demand import DemandProfile
+from traffic_sim.estimation import CountEstimator
+from traffic_sim.signals import SignalState
+from traffic_sim.widgets import CanvasLights, StatusLine, time_of_day
 
 # --- [ Original global variables and simulation logic remain unchanged ] ---
 
@@ -33,29 +38,46 @@ directions = ["North", "South", "East", "West"]
 active_direction_sequence = ["North", "South", "East", "West"]
 active_direction_index = -1
 
-CANVAS_WIDTH = 800
-CANVAS_HEIGHT = 800
-ROAD_WIDTH = 200
-LANE_WIDTH = 50
+CONFIG = load_config()
+CANVAS_WIDTH = CONFIG.canvas_width
+CANVAS_HEIGHT = CONFIG.canvas_height
+ROAD_WIDTH = CONFIG.road_width
+LANE_WIDTH = CONFIG.lane_width
 CENTER = CANVAS_WIDTH / 2
 INTERSECTION_START = CENTER - (ROAD_WIDTH / 2)
 INTERSECTION_END = CENTER + (ROAD_WIDTH / 2)
-STOP_LINE_MARGIN = 15
-CAR_LENGTH = 30
-CAR_WIDTH = 20
-SAFE_DISTANCE = 15
-MAX_CARS_PER_LANE = 20
-BASE_CAR_SPEED = 5.0
+STOP_LINE_MARGIN = CONFIG.stop_line_margin
+CAR_LENGTH = CONFIG.car_length
+CAR_WIDTH = CONFIG.car_width
+SAFE_DISTANCE = CONFIG.safe_distance
+MAX_CARS_PER_LANE = CONFIG.max_cars_per_lane
+BASE_CAR_SPEED = CONFIG.base_car_speed
 
 # Track last spawn time for each direction to add delays
 last_spawn_time = {direction: 0 for direction in directions}
 
 # YOLO model initialization
-YOLO_MODEL_PATH = r"C:\Python\traffic_images\yolov8n.pt"  # Using the default YOLOv8 nano model
+YOLO_MODEL_PATH = CONFIG.yolo_model_path
 
 # Directory for traffic images
-TRAFFIC_IMAGE_DIR = r"C:\Python\traffic_images"
-    
+TRAFFIC_IMAGE_DIR = CONFIG.traffic_image_dir
+
+# Processed images go to a memory-mapped frame store when configured, so RAM stays flat
+frame_store = None
+if CONFIG.frame_store_path:
+    from traffic_sim.framestore import FrameStore
+    frame_store = FrameStore(CONFIG.frame_store_path, CONFIG.frame_store_capacity)
+
+# Smooths each direction's counts across images and rejects glitches. A failed
+# detection falls back to the last good count, or before one to the historical
+# profile's count for the time of day, and marks the direction as degraded.
+history_profile = (DemandProfile.from_csv(CONFIG.history_profile_path) if CONFIG.history_profile_path
+                   else DemandProfile.default())
+count_estimator = CountEstimator(CONFIG.count_smoothing, CONFIG.count_outlier_sigma, profile=history_profile)
+
+status = StatusLine(count_estimator)
+notify = status.notify
+
 # Initialize YOLO model
 try:
     yolo_model = YOLO(YOLO_MODEL_PATH, task='detect')
@@ -214,14 +236,14 @@ def get_signal_durations(traffic, time_of_day):
 
 def process_image_with_yolo(direction, image_path):
     if yolo_model is None:
-        messagebox.showerror("Error", "YOLO model failed to load. Using random counts instead.")
-        return random.randint(5, 20), None
+        notify(f"YOLO model failed to load; {direction} uses its fallback count")
+        return None, None
     
     try:
         image = cv2.imread(image_path)
         if image is None:
-            messagebox.showerror("Error", f"Could not load image: {image_path}")
-            return random.randint(5, 20), None
+            notify(f"Could not load image: {image_path}")
+            return None, None
         
         results = yolo_model(image)
         vehicle_classes = [2, 3, 5, 7]
@@ -240,8 +262,8 @@ def process_image_with_yolo(direction, image_path):
         return vehicle_count, processed_image
         
     except Exception as e:
-        messagebox.showerror("Error", f"YOLO processing failed: {str(e)}")
-        return random.randint(5, 20), None
+        notify(f"YOLO processing failed on {os.path.basename(image_path)}: {e}")
+        return None, None
 
 def capture_yolo_input(direction):
     current_image_index[direction] = 0
@@ -252,7 +274,7 @@ def capture_yolo_input(direction):
     
     if not os.path.exists(TRAFFIC_IMAGE_DIR):
         os.makedirs(TRAFFIC_IMAGE_DIR)
-        messagebox.showinfo("Info", f"Created {TRAFFIC_IMAGE_DIR} directory. Please add traffic images and try again.")
+        notify(f"Created {TRAFFIC_IMAGE_DIR} directory. Please add traffic images and try again.")
         yolo_inputs_received[direction] = True
         return
     
@@ -267,8 +289,8 @@ def capture_yolo_input(direction):
             if file.lower().endswith(('.png', '.jpg', '.jpeg')):
                 image_files.append(os.path.join(TRAFFIC_IMAGE_DIR, file))
         if not image_files:
-            messagebox.showerror("Error", f"No images found in {TRAFFIC_IMAGE_DIR} directory")
-            yolo_counts[direction] = [random.randint(5, 20)]
+            notify(f"No images found in {TRAFFIC_IMAGE_DIR} directory; using fallback counts")
+            yolo_counts[direction] = [None]
             yolo_processed_images[direction] = [None]
             yolo_inputs_received[direction] = True
             return
@@ -276,12 +298,16 @@ def capture_yolo_input(direction):
     for image_path in image_files:
         count, processed_image = process_image_with_yolo(direction, image_path)
         yolo_counts[direction].append(count)
+        if frame_store is not None and processed_image is not None:
+            # Keep only the frame id; the pixels live in the memory map
+            processed_image = frame_store.add(direction, processed_image, count)
         yolo_processed_images[direction].append(processed_image)
     
     yolo_inputs_received[direction] = True
     
     if yolo_counts[direction]:
-        lane_labels[direction][0].config(text=f"{yolo_counts[direction][0]}")
+        count = yolo_counts[direction][0]
+        lane_labels[direction][0].config(text="-" if count is None else f"{count}")
 
     if direction == yolo_view_direction.get():
         update_yolo_inspector_view()
@@ -295,23 +321,25 @@ def check_all_inputs_received():
         simulation_started = True
         
         for direction in directions:
-            if yolo_counts[direction]:
-                current_traffic_counts[direction] = yolo_counts[direction][0]
-            else:
-                current_traffic_counts[direction] = random.randint(5, 20)
+            count = yolo_counts[direction][0] if yolo_counts[direction] else None
+            current_traffic_counts[direction] = count_estimator.update(direction, count, time_of_day()) or 0
+            lane_labels[direction][0].config(text=f"{current_traffic_counts[direction]}")
 
         pre_populate_cars()       
         start_new_cycle()
-        messagebox.showinfo("Info", "All lane inputs received. Simulation starting!")
+        notify("All lane inputs received. Simulation starting!")
 
 def start_yolo_capture():
     yolo_button.config(state=tk.DISABLED, text="Processing...")
+    count_estimator.reset()
     for direction in directions:
         yolo_inputs_received[direction] = False
         yolo_counts[direction] = []
         lane_labels[direction][0].config(text="0")
     
     def process_all_directions():
+        if frame_store is not None:
+            frame_store.clear()
         for direction in directions:
             capture_yolo_input(direction)
         yolo_button.config(state=tk.NORMAL, text="Capture YOLO Input")
@@ -363,7 +391,10 @@ def attempt_to_spawn_car():
         if cars_spawned_from_current_image[direction] >= count:
             if yolo_counts[direction] and len(yolo_counts[direction]) > 1:
                 current_image_index[direction] = (current_image_index[direction] + 1) % len(yolo_counts[direction])
-                current_traffic_counts[direction] = yolo_counts[direction][current_image_index[direction]]
+                smoothed = count_estimator.update(direction, yolo_counts[direction][current_image_index[direction]],
+                                                  time_of_day())
+                if smoothed is not None:
+                    current_traffic_counts[direction] = smoothed
                 cars_spawned_from_current_image[direction] = 0
                 if direction == yolo_view_direction.get():
                     update_yolo_inspector_view()
@@ -387,7 +418,7 @@ def move_cars():
     
     for lane_name, car_list in car_pool.items():
         direction = lane_name.split("_")[0]
-        is_green = canvas.itemcget(lights[direction], "fill") == "lime green"
+        is_green = signal_lights.is_green(direction)
         
         active_cars = [c for c in car_list if c.is_active]
         for i, car in enumerate(active_cars):
@@ -424,7 +455,7 @@ def move_cars():
 
 def start_new_cycle():
     global active_direction_index, active_direction, time_left, current_durations
-    for direction in directions: canvas.itemconfig(lights[direction], fill="red")
+    for direction in directions: signal_lights.set(direction, SignalState.RED)
     active_direction_index = (active_direction_index + 1) % len(active_direction_sequence)
     active_direction = active_direction_sequence[active_direction_index]
     
@@ -434,11 +465,12 @@ def start_new_cycle():
         for direction in directions: direction_timers[direction] = current_durations[direction]
 
     time_left = current_durations[active_direction]
-    canvas.itemconfig(lights[active_direction], fill="lime green")
+    signal_lights.set(active_direction, SignalState.GREEN)
     for d in directions: lane_labels[d][1].config(text=f"{current_durations.get(d, 0)}s")
 
 def update_simulation():
     global time_left, last_time, timer_countdown
+    status.show()
     if not is_paused and simulation_started:
         current_time = time.time()
         delta_time = current_time - last_time
@@ -505,6 +537,8 @@ lights = {
     "West": canvas.create_oval(CENTER - 20, CENTER - 7, CENTER - 6, CENTER + 7, fill="red"),
 }
 
+signal_lights = CanvasLights(canvas, lights)
+
 # --- Main Control Panel ---
 main_control_frame = ttk.Frame(root, padding=10)
 main_control_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 10), pady=10)
@@ -569,6 +603,10 @@ total_cars_label.grid(row=0, column=1, sticky='w', padx=5)
 ttk.Label(details_labelframe, text="Cars on Screen:", font=BOLD_LABEL_FONT).grid(row=1, column=0, sticky='w')
 screen_cars_label = ttk.Label(details_labelframe, text="0", font=LABEL_FONT)
 screen_cars_label.grid(row=1, column=1, sticky='w', padx=5)
+ttk.Label(details_labelframe, text="Status:", font=BOLD_LABEL_FONT).grid(row=2, column=0, sticky='nw')
+status_label = ttk.Label(details_labelframe, text="Ready", font=LABEL_FONT, wraplength=220)
+status_label.grid(row=2, column=1, sticky='w', padx=5)
+status.attach(status_label, {d: lane_labels[d][0] for d in directions}, "foreground", "")
 
 
 # --- YOLO Image Inspector ---
@@ -607,11 +645,14 @@ def display_processed_image(direction, image_index):
         return
     
     processed_image = yolo_processed_images[direction][image_index]
+    if frame_store is not None and processed_image is not None:
+        processed_image = frame_store.frame(processed_image)
     if processed_image is None:
         image_info_label.config(text=f"{direction}: Image {image_index+1} Error")
         return
 
-    processed_image_rgb = cv2.cvtColor(processed_image, cv2.COLOR_BGR2RGB)
+    # Reversed-channel view: BGR to RGB without copying the frame
+    processed_image_rgb = processed_image[..., ::-1]
     
     fig = plt.Figure(figsize=(4, 3), dpi=80)
     ax = fig.add_subplot(111)